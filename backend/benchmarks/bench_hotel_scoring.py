@@ -0,0 +1,89 @@
+"""
+Benchmark hotel preference ranking against the per-hotel scoring loop it replaced.
+
+Run from the backend directory:
+    python benchmarks/bench_hotel_scoring.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommendations.hotel_scoring import HotelColumns, rank_hotels  # noqa: E402
+
+AMENITIES = ['Free WiFi', 'Breakfast', 'Pool', 'Spa', 'Gym', 'Concierge', 'Fine Dining', 'Kitchen',
+             'Comfortable Rooms', 'Clean Rooms', 'Central Location', 'Social Areas', 'Tours', 'Parking']
+PREFERENCE = ('mid-range', {'price_range': (80, 180), 'amenities': ['Free WiFi', 'Breakfast', 'Comfortable Rooms']})
+
+
+def make_hotels(count, seed=0):
+    rng = random.Random(seed)
+    hotels = []
+    for i in range(count):
+        hotel = {
+            'name': f'Hotel {i}',
+            'price_per_night': rng.choice([rng.randint(20, 900), round(rng.uniform(20, 900), 2), None]),
+            'rating': rng.choice([round(rng.uniform(1, 5), 1), None]),
+            'amenities': rng.sample(AMENITIES, rng.randint(0, 6)),
+        }
+        if rng.random() < 0.8:
+            hotel['stars'] = rng.choice([0, 1, 2, 3, 4, 5, None])
+        if rng.random() < 0.3:
+            hotel['star_rating'] = rng.randint(1, 5)
+        hotels.append(hotel)
+    return hotels
+
+
+def legacy_rank(hotels, hotel_preference, hotel_pref_config, limit=None):
+    """The original per-hotel scoring loop"""
+    price_min, price_max = hotel_pref_config.get('price_range', (0, 1000))
+    scored = []
+    for hotel in hotels:
+        price = hotel.get('price_per_night', 0) or 0
+        score = 0
+        if price_min <= price <= price_max:
+            score += 50
+        elif price < price_min:
+            score += 30
+        else:
+            score += max(0, 20 - (price - price_max) / 50)
+        score += (hotel.get('rating', 0) or 0) * 5
+        score += len(set(hotel.get('amenities', []) or []) & set(hotel_pref_config.get('amenities', []) or [])) * 5
+        stars = hotel.get('stars', 3) or hotel.get('star_rating', 3) or 3
+        if hotel_preference == 'luxury' and stars >= 5:
+            score += 20
+        elif hotel_preference in ('boutique', 'mid-range') and 3 <= stars <= 4:
+            score += 15
+        elif hotel_preference == 'budget' and stars <= 3:
+            score += 15
+        elif hotel_preference == 'hostel' and stars <= 2:
+            score += 15
+        scored.append((score, hotel))
+    return [hotel for _, hotel in sorted(scored, key=lambda x: x[0], reverse=True)[:limit]]
+
+
+def best_time(func, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+if __name__ == '__main__':
+    print(f"{'hotels':>8} {'limit':>6} {'loop (ms)':>10} {'columnar (ms)':>14} {'prebuilt (ms)':>14} "
+          f"{'score only (ms)':>16} {'same':>5}")
+    for count, limit in [(100, 10), (10_000, 10), (100_000, 10), (100_000, None)]:
+        hotels = make_hotels(count)
+        legacy, expected = best_time(lambda: legacy_rank(hotels, *PREFERENCE, limit=limit))
+        columnar, actual = best_time(lambda: rank_hotels(hotels, *PREFERENCE, limit=limit))
+        columns = HotelColumns(hotels)
+        prebuilt, reused = best_time(lambda: rank_hotels(columns, *PREFERENCE, limit=limit))
+        scoring, _ = best_time(lambda: columns.score(*PREFERENCE))
+        same = [id(h) for h in expected] == [id(h) for h in actual] == [id(h) for h in reused]
+        print(f"{count:>8} {str(limit):>6} {legacy * 1000:>10.2f} {columnar * 1000:>14.2f} {prebuilt * 1000:>14.2f} "
+              f"{scoring * 1000:>16.2f} {str(same):>5}")
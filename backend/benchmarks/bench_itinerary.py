@@ -0,0 +1,57 @@
+"""
+Benchmark itinerary generation for long trips over large attraction catalogs.
+
+Run from the backend directory:
+    python benchmarks/bench_itinerary.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommendations.ai_planner_service import TravelPlannerService  # noqa: E402
+
+CATEGORIES = ['museum', 'nature', 'landmark', 'shopping', 'beach', 'adventure', 'cultural', 'food']
+
+
+def make_attractions(count):
+    return [
+        {
+            'name': f'Attraction {i}',
+            'category': CATEGORIES[i % len(CATEGORIES)],
+            'price_per_person': i % 40,
+            'rating': 7 + (i % 30) / 10,
+            'description': f'Attraction number {i}',
+        }
+        for i in range(count)
+    ]
+
+
+def bench(num_days, num_attractions, repeat=5):
+    planner = TravelPlannerService()
+    config = planner._merge_travel_configs(['culture'])
+    attractions = make_attractions(num_attractions)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        planner._generate_itinerary(
+            destination='Lisbon',
+            travel_type='culture',
+            travel_config=config,
+            num_days=num_days,
+            daily_budget=200,
+            hotels=[{'name': 'Hotel', 'price_per_night': 100}],
+            transports=[{'name': 'Flight', 'price_per_person': 200}],
+            attractions=attractions,
+        )
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+if __name__ == '__main__':
+    print(f"{'days':>6} {'attractions':>12} {'best (ms)':>10}")
+    for num_days, num_attractions in [(7, 100), (30, 1_000), (60, 10_000), (60, 100_000)]:
+        elapsed = bench(num_days, num_attractions)
+        print(f"{num_days:>6} {num_attractions:>12} {elapsed * 1000:>10.2f}")
@@ -0,0 +1,108 @@
+"""
+Benchmark JSON rendering and parsing of realistic API payloads: DRF's stdlib
+JSONRenderer / JSONParser against the orjson-based FastJSONRenderer / FastJSONParser.
+
+Payloads are a full search response and a planner response (plan, itinerary
+text and the embedded recommendations), generated from mock data.
+
+Run from the backend directory:
+    python benchmarks/bench_json.py
+"""
+
+import io
+import os
+import sys
+import time
+from decimal import Decimal
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'travel_api.settings')
+
+import django  # noqa: E402
+
+django.setup()
+
+from datetime import datetime, timedelta  # noqa: E402
+
+from rest_framework.parsers import JSONParser  # noqa: E402
+from rest_framework.renderers import JSONRenderer  # noqa: E402
+
+from recommendations.ai_planner_service import TravelPlannerService  # noqa: E402
+from recommendations.parsers import FastJSONParser  # noqa: E402
+from recommendations.renderers import FastJSONRenderer, orjson  # noqa: E402
+from recommendations.services import TravelRecommendationService  # noqa: E402
+
+
+def search_payload(destination='Lisbon'):
+    check_in = datetime.now() + timedelta(days=30)
+    return TravelRecommendationService().get_recommendations(
+        destination=destination,
+        check_in=check_in.strftime('%Y-%m-%d'),
+        check_out=(check_in + timedelta(days=7)).strftime('%Y-%m-%d'),
+        people=2,
+        origin='Hanoi'
+    )
+
+
+def planner_payload(destination='Lisbon'):
+    recommendations = search_payload(destination)
+    plan = TravelPlannerService().generate_travel_plan(
+        origin='Hanoi',
+        destination=destination,
+        travel_type='culture',
+        hotel_preference='mid-range',
+        budget=5000,
+        num_days=7,
+        num_people=2,
+        hotels=recommendations['hotels'],
+        transports=recommendations['transports'],
+        attractions=recommendations['attractions'],
+        user_set_budget=True
+    )
+    plan['recommendations'] = recommendations
+    return plan
+
+
+def with_model_types(payload):
+    """Add the Decimal / datetime values model serializers and timestamps produce"""
+    payload = dict(payload)
+    payload['generated_at'] = datetime.now()
+    payload['hotels'] = [dict(h, price_per_night=Decimal(str(h['price_per_night'])))
+                         for h in payload.get('hotels', [])]
+    return payload
+
+
+def best_time(func, repeat=5, number=50):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best
+
+
+def main():
+    if orjson is None:
+        print('orjson is not installed; FastJSONRenderer falls back to the stdlib encoder')
+        return
+
+    payloads = {
+        'search': with_model_types(search_payload()),
+        'planner': with_model_types(planner_payload()),
+    }
+    stdlib_renderer, fast_renderer = JSONRenderer(), FastJSONRenderer()
+    stdlib_parser, fast_parser = JSONParser(), FastJSONParser()
+
+    print(f"{'payload':<10}{'encoder':<10}{'bytes':>10}{'render ms':>12}{'parse ms':>12}")
+    for name, payload in payloads.items():
+        for label, renderer, parser in (('stdlib', stdlib_renderer, stdlib_parser),
+                                        ('orjson', fast_renderer, fast_parser)):
+            body = renderer.render(payload)
+            render = best_time(lambda: renderer.render(payload))
+            parse = best_time(lambda: parser.parse(io.BytesIO(body)))
+            print(f'{name:<10}{label:<10}{len(body):>10}{render * 1000:>12.3f}{parse * 1000:>12.3f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,41 @@
+"""
+Benchmark day clustering and stop ordering for large attraction sets.
+
+Run from the backend directory:
+    python benchmarks/bench_routing.py
+"""
+
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommendations.routing import plan_day_routes  # noqa: E402
+
+
+def make_stops(count, seed=0):
+    rng = random.Random(seed)
+    return [
+        {'name': f'Stop {i}', 'latitude': 38.72 + rng.uniform(-0.1, 0.1), 'longitude': -9.14 + rng.uniform(-0.1, 0.1)}
+        for i in range(count)
+    ]
+
+
+def bench(num_stops, num_days, repeat=5):
+    hotel = {'name': 'Hotel', 'latitude': 38.72, 'longitude': -9.14}
+    stops = make_stops(num_stops)
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = plan_day_routes(hotel, stops, num_days)
+        best = min(best, time.perf_counter() - start)
+    return best, result['total_distance_km']
+
+
+if __name__ == '__main__':
+    print(f"{'stops':>6} {'days':>5} {'best (ms)':>10} {'distance (km)':>14}")
+    for num_stops, num_days in [(10, 5), (100, 7), (1_000, 30), (1_000, 7)]:
+        elapsed, distance = bench(num_stops, num_days)
+        print(f"{num_stops:>6} {num_days:>5} {elapsed * 1000:>10.2f} {distance:>14.2f}")
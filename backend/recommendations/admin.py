@@ -1,5 +1,7 @@
 from django.contrib import admin
-from .models import Destination, Hotel, Transport, Attraction, TravelPackage, SearchHistory
+from django.http import FileResponse, Http404
+from django.template.response import TemplateResponse
+from .models import Destination, Hotel, Transport, Attraction, TravelPackage, SearchHistory, SearchRollup, SavedPlan
 
 
 @admin.register(Destination)
@@ -49,3 +51,48 @@ class SearchHistoryAdmin(admin.ModelAdmin):
     search_fields = ['destination_query']
     readonly_fields = ['created_at']
     ordering = ['-created_at']
+
+
+@admin.register(SearchRollup)
+class SearchRollupAdmin(admin.ModelAdmin):
+    list_display = ['period_start', 'granularity', 'destination', 'num_people', 'lead_time', 'searches']
+    list_filter = ['granularity', 'lead_time']
+    search_fields = ['destination']
+    ordering = ['-period_start']
+
+
+@admin.register(SavedPlan)
+class SavedPlanAdmin(admin.ModelAdmin):
+    list_display = ['id', 'destination', 'created_at', 'updated_at']
+    search_fields = ['destination']
+    readonly_fields = ['created_at', 'updated_at']
+    ordering = ['-updated_at']
+
+
+def profile_list_view(request):
+    """Admin page listing recent request profiles (see recommendations.profiling)"""
+    from .profiling import list_profiles, make_profile_token
+
+    signed_url = None
+    path = request.GET.get('path', '').strip()
+    if path.startswith('/'):
+        signed_url = f"{path}?_profile={make_profile_token(path)}"
+
+    context = {
+        **admin.site.each_context(request),
+        'title': 'Request profiles',
+        'profiles': list_profiles(),
+        'profile_path': path,
+        'signed_url': signed_url,
+    }
+    return TemplateResponse(request, 'admin/recommendations/profiles.html', context)
+
+
+def profile_download_view(request, profile_id, kind):
+    """Download a stored .pstats or .collapsed profile file"""
+    from .profiling import profile_file_path
+
+    path = profile_file_path(profile_id, kind)
+    if not path:
+        raise Http404('Profile not found')
+    return FileResponse(open(path, 'rb'), as_attachment=True, filename=f'{profile_id}.{kind}')
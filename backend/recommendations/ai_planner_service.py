@@ -4,9 +4,18 @@ No external AI API required. Fast, reliable, and always available.
 """
 
 import random
-from typing import Dict, List, Any
+from typing import Collection, Dict, List, Any, Optional
 from datetime import datetime, timedelta
 
+from django.conf import settings
+
+from .alternatives import pareto_alternatives
+from .hotel_scoring import HotelColumns, rank_hotels
+from .plan_optimizer import BudgetPlanOptimizer
+from .ranking import cheapest
+from .routing import plan_day_routes
+from .scheduling import AttractionQueue
+
 
 class TravelPlannerService:
     """
@@ -17,6 +26,7 @@ class TravelPlannerService:
     TRAVEL_TYPES = {
         'nature': {
             'description': 'outdoor activities, hiking, beaches, national parks, wildlife',
+            'attraction_categories': ['nature', 'beach', 'adventure'],
             'morning_activities': [
                 'Start the day with a scenic nature walk',
                 'Early morning hike to catch the sunrise',
@@ -41,6 +51,7 @@ class TravelPlannerService:
         },
         'culture': {
             'description': 'museums, historical sites, architecture, local traditions',
+            'attraction_categories': ['museum', 'cultural', 'landmark'],
             'morning_activities': [
                 'Visit the city\'s main museum',
                 'Walking tour of historical district',
@@ -65,6 +76,7 @@ class TravelPlannerService:
         },
         'food': {
             'description': 'local cuisine, food tours, cooking classes, markets',
+            'attraction_categories': ['food', 'shopping'],
             'morning_activities': [
                 'Visit a local breakfast market',
                 'Morning cooking class with locals',
@@ -89,6 +101,7 @@ class TravelPlannerService:
         },
         'adventure': {
             'description': 'extreme sports, water activities, mountain climbing',
+            'attraction_categories': ['adventure', 'nature', 'beach'],
             'morning_activities': [
                 'Early morning mountain trek',
                 'Scuba diving or snorkeling',
@@ -113,6 +126,7 @@ class TravelPlannerService:
         },
         'relaxation': {
             'description': 'spa, resorts, quiet beaches, wellness retreats',
+            'attraction_categories': ['beach', 'nature', 'entertainment'],
             'morning_activities': [
                 'Sunrise yoga session',
                 'Morning meditation class',
@@ -190,6 +204,24 @@ class TravelPlannerService:
         }
     }
     
+    # Hotels kept after preference ranking; the plan only recommends the best ones
+    HOTEL_CANDIDATE_LIMIT = 10
+    
+    # Attraction visits per day, in routed order; their count is the day's attraction limit
+    AFTERNOON_SLOTS = ('Afternoon (1:00 PM)', 'Afternoon (3:30 PM)')
+    
+    # Keys of a generated plan, for sparse fieldsets
+    PLAN_FIELDS = (
+        'origin', 'destination', 'travel_type', 'travel_types', 'hotel_preference',
+        'hotel_preference_description', 'travel_type_description', 'budget', 'budget_exceeded',
+        'budget_warning', 'num_days', 'num_people', 'daily_budget', 'per_person_budget', 'itinerary',
+        'itinerary_text', 'recommended_hotel', 'accommodation', 'recommended_transport', 'top_attractions',
+        'cost_breakdown', 'tips', 'travel_distance_km', 'optimization', 'alternatives'
+    )
+    
+    # Plan sections only computed when requested (generate_travel_plan `sections`)
+    OPTIONAL_SECTIONS = ('itinerary_text', 'alternatives')
+    
     def __init__(self):
         pass
     
@@ -205,7 +237,9 @@ class TravelPlannerService:
         hotels: List[Dict] = None,
         transports: List[Dict] = None,
         attractions: List[Dict] = None,
-        user_set_budget: bool = False
+        user_set_budget: bool = False,
+        plan_state: Dict = None,
+        sections: Optional[Collection[str]] = None
     ) -> Dict[str, Any]:
         """
         Generate a personalized travel plan using templates and real data.
@@ -222,6 +256,11 @@ class TravelPlannerService:
             transports: List of available transport options
             attractions: List of available attractions
             user_set_budget: Whether user explicitly set the budget
+            plan_state: Optional dict, filled with what apply_plan_changes()
+                needs to edit the plan later
+            sections: Optional plan sections (OPTIONAL_SECTIONS) to compute;
+                all of them by default. Skipped ones can be added later with
+                add_plan_sections()
         
         Returns:
             Complete travel plan with itinerary
@@ -243,17 +282,54 @@ class TravelPlannerService:
         hotel_pref = self.HOTEL_PREFERENCES.get(hotel_preference, self.HOTEL_PREFERENCES['mid-range'])
         
         # Filter and sort hotels based on preference
-        filtered_hotels = self._filter_hotels_by_preference(hotels or [], hotel_preference, hotel_pref)
+        filtered_hotels = self._filter_hotels_by_preference(
+            hotels or [], hotel_preference, hotel_pref, limit=self.HOTEL_CANDIDATE_LIMIT
+        )
         
         # If filtering returned empty, use original hotels sorted by price
         if not filtered_hotels and hotels:
-            filtered_hotels = sorted(hotels, key=lambda x: x.get('price_per_night', 0))
+            filtered_hotels = cheapest(hotels, 'price_per_night', self.HOTEL_CANDIDATE_LIMIT)
         
         # Calculate budgets
         daily_budget = budget // num_days if num_days > 0 else budget
         per_person_budget = budget // num_people if num_people > 0 else budget
         
+        # With an explicit budget, pick the best-value hotel/transport/attractions that fit it
+        itinerary_attractions = attractions or []
+        optimization = None
+        if user_set_budget and budget > 0 and (filtered_hotels or transports):
+            solution = BudgetPlanOptimizer(
+                budget=budget,
+                num_days=num_days,
+                num_people=num_people,
+                time_limit_ms=getattr(settings, 'PLANNER_SOLVER_TIME_LIMIT_MS', 200),
+                preferred_categories=merged_config['attraction_categories'],
+                attractions_per_day=len(self.AFTERNOON_SLOTS)
+            ).solve(
+                filtered_hotels, transports or [], attractions or [],
+                # The preference decides the hotel; the budget only rules out what doesn't fit
+                hotel_scores=HotelColumns(filtered_hotels).score(hotel_preference, hotel_pref)
+            )
+            
+            # Put the chosen options first so the itinerary and cost breakdown use them
+            if solution['hotel'] is not None:
+                filtered_hotels = [solution['hotel']] + [h for h in filtered_hotels if h is not solution['hotel']]
+            if solution['transport'] is not None:
+                transports = [solution['transport']] + [t for t in transports if t is not solution['transport']]
+            itinerary_attractions = solution['attractions']
+            optimization = {
+                'within_budget': solution['feasible'],
+                'optimal': solution['optimal'],
+                'objective_value': solution['value'],
+                'attractions_selected': len(solution['attractions']),
+                'attractions_considered': solution['attractions_considered'],
+                'elapsed_ms': solution['elapsed_ms']
+            }
+        
         # Generate day-by-day itinerary
+        recommended_hotel = filtered_hotels[0] if filtered_hotels else None
+        recommended_transport = transports[0] if transports else None
+        routes = self._route_attractions(recommended_hotel, itinerary_attractions, merged_config, num_days)
         itinerary = self._generate_itinerary(
             destination=destination,
             travel_type=travel_type,
@@ -262,44 +338,32 @@ class TravelPlannerService:
             daily_budget=daily_budget,
             hotels=filtered_hotels,
             transports=transports or [],
-            attractions=attractions or []
+            attractions=itinerary_attractions,
+            routes=routes
         )
         
         # Calculate costs
-        hotel_cost = 0
-        transport_cost = 0
-        attraction_cost_actual = 0
-        attraction_budget = 0
+        cost_breakdown = self._calculate_costs(
+            itinerary, recommended_hotel, recommended_transport, budget, num_days, num_people, user_set_budget
+        )
         
-        recommended_hotel = None
-        recommended_transport = None
+        skipped = set(self.OPTIONAL_SECTIONS) - set(sections) if sections is not None else set()
         
-        if filtered_hotels and len(filtered_hotels) > 0:
-            recommended_hotel = filtered_hotels[0]
-            hotel_cost = recommended_hotel.get('price_per_night', 0) * num_days
+        # Cheaper / better-rated / faster trade-offs from the same fetched options
+        alternatives = None
+        if 'alternatives' not in skipped:
+            alternatives = pareto_alternatives(
+                hotels or [],
+                transports or [],
+                num_days=num_days,
+                num_people=num_people,
+                activities_cost=cost_breakdown['activities_actual'],
+                budget=budget if user_set_budget else None,
+                current=(recommended_hotel, recommended_transport)
+            )
         
-        if transports and len(transports) > 0:
-            recommended_transport = transports[0]
-            transport_cost = recommended_transport.get('price_per_person', 0) * num_people
-        
-        # Calculate actual attraction costs from the generated itinerary
-        # Sum up all activity costs from each day (these are per-person costs)
-        itinerary_per_person_cost = 0
-        for day in itinerary:
-            for activity in day.get('activities', []):
-                itinerary_per_person_cost += activity.get('estimated_cost', 0)
-        
-        # Multiply by num_people to get total activities cost
-        attraction_cost_actual = itinerary_per_person_cost * num_people
-        
-        # Calculate attraction budget (remaining from user's budget)
-        if user_set_budget:
-            attraction_budget = max(0, budget - hotel_cost - transport_cost)
-        else:
-            attraction_budget = attraction_cost_actual
-        
-        # Use actual costs for total estimation
-        total_estimated = hotel_cost + transport_cost + attraction_cost_actual
+        # Round-trip distance from the hotel over all routed days
+        travel_distance_km = self._travel_distance(itinerary)
         
         # Generate tips
         tips = self._generate_tips(destination, travel_types_list[0] if travel_types_list else 'culture')
@@ -316,38 +380,36 @@ class TravelPlannerService:
         combined_description = '; '.join(type_descriptions) if type_descriptions else 'General travel experience'
         
         # Build hotel accommodation details
-        accommodation = None
-        if recommended_hotel:
-            accommodation = {
-                'hotel_name': recommended_hotel.get('name', 'Recommended Hotel'),
-                'hotel_type': hotel_preference,
-                'price_per_night': recommended_hotel.get('price_per_night', 0),
-                'total_nights': num_days,
-                'total_cost': hotel_cost,
-                'check_in_time': '3:00 PM',
-                'check_out_time': '11:00 AM',
-                'amenities': recommended_hotel.get('amenities', hotel_pref.get('amenities', [])),
-                'rating': recommended_hotel.get('rating', 0),
-                'stars': recommended_hotel.get('stars', recommended_hotel.get('star_rating', 3)),
-                'address': recommended_hotel.get('address', f'{destination} City Center'),
-                'image': recommended_hotel.get('image', recommended_hotel.get('image_url', ''))
-            }
+        accommodation = self._build_accommodation(recommended_hotel, hotel_preference, num_days, destination)
         
         # Check if trip exceeds budget
-        budget_warning = None
-        budget_exceeded = False
-        if user_set_budget and total_estimated > budget:
-            budget_exceeded = True
-            over_budget_amount = total_estimated - budget
-            budget_warning = {
-                'type': 'over_budget',
-                'message': f'This trip exceeds your budget of ${budget:,} by ${over_budget_amount:,.2f}',
-                'suggestion': 'Consider adjusting your travel dates, choosing budget-friendly hotels, or increasing your budget.',
-                'over_amount': over_budget_amount,
-                'required_budget': total_estimated
-            }
+        budget_exceeded, budget_warning = self._check_budget(cost_breakdown['estimated_total'], budget, user_set_budget)
         
-        return {
+        # Text is kept per section so edits only re-render what changed
+        text_sections = None
+        if 'itinerary_text' not in skipped:
+            text_sections = self._itinerary_text_sections(itinerary, destination, travel_type, budget, num_people, num_days)
+        
+        if plan_state is not None:
+            plan_state.update({
+                'inputs': {
+                    'origin': origin,
+                    'destination': destination,
+                    'travel_type': travel_type,
+                    'budget': budget,
+                    'num_days': num_days,
+                    'num_people': num_people,
+                    'user_set_budget': user_set_budget
+                },
+                'travel_config': merged_config,
+                'hotels': hotels or [],
+                'transports': transports or [],
+                'attractions': attractions or [],
+                'day_stops': [route['stops'] for route in routes['days']],
+                'text_sections': text_sections
+            })
+        
+        result = {
             'success': True,
             'budget_exceeded': budget_exceeded,
             'budget_warning': budget_warning,
@@ -367,28 +429,225 @@ class TravelPlannerService:
                 'daily_budget': daily_budget,
                 'per_person_budget': per_person_budget,
                 'itinerary': itinerary,
-                'itinerary_text': self._format_itinerary_text(itinerary, destination, travel_type, budget, num_people, num_days),
+                'itinerary_text': "\n".join(text_sections) if text_sections is not None else None,
                 'recommended_hotel': recommended_hotel,
                 'accommodation': accommodation,
                 'recommended_transport': recommended_transport,
                 'top_attractions': attractions[:5] if attractions else [],
-                'cost_breakdown': {
-                    'hotel': hotel_cost,
-                    'transport': transport_cost,
-                    'activities_budget': attraction_budget,
-                    'activities_actual': attraction_cost_actual,
-                    'activities_per_person': itinerary_per_person_cost,
-                    'estimated_total': total_estimated,
-                    'remaining_budget': budget - total_estimated
-                },
-                'tips': tips
+                'cost_breakdown': cost_breakdown,
+                'tips': tips,
+                'travel_distance_km': travel_distance_km,
+                'optimization': optimization,
+                'alternatives': alternatives
             }
         }
+        for name in skipped:
+            del result['plan'][name]
+        return result
+    
+    def add_plan_sections(self, result: Dict[str, Any], state: Dict, sections: Collection[str]) -> List[str]:
+        """
+        Compute optional sections that generate_travel_plan() skipped.
+        
+        Returns:
+            Names of the sections added to the plan
+        """
+        plan = result['plan']
+        added = []
+        if 'alternatives' in sections and 'alternatives' not in plan:
+            hotel, transport = self._current_options(plan, state)
+            plan['alternatives'] = self._plan_alternatives(plan, state, hotel, transport)
+            added.append('alternatives')
+        if 'itinerary_text' in sections and state.get('text_sections') is None:
+            state['text_sections'] = self._itinerary_text_sections(
+                plan['itinerary'], plan['destination'], plan['travel_type'], plan['budget'],
+                plan['num_people'], plan['num_days']
+            )
+            plan['itinerary_text'] = "\n".join(state['text_sections'])
+            added.append('itinerary_text')
+        return added
+    
+    def _current_options(self, plan: Dict, state: Dict) -> tuple:
+        """The plan's hotel and transport, as the state's own option objects"""
+        # Stored plans are deserialized separately; use the state's own option objects
+        hotel = next((h for h in state['hotels'] if h == plan['recommended_hotel']), plan['recommended_hotel'])
+        transport = next((t for t in state['transports'] if t == plan['recommended_transport']), plan['recommended_transport'])
+        return hotel, transport
+    
+    def _plan_alternatives(self, plan: Dict, state: Dict, hotel, transport) -> List[Dict]:
+        """Pareto alternatives for a stored plan"""
+        return pareto_alternatives(
+            state['hotels'],
+            state['transports'],
+            num_days=plan['num_days'],
+            num_people=plan['num_people'],
+            activities_cost=plan['cost_breakdown']['activities_actual'],
+            budget=plan['budget'] if state['inputs']['user_set_budget'] else None,
+            current=(hotel, transport)
+        )
+    
+    def apply_plan_changes(self, result: Dict[str, Any], state: Dict, changes: Dict) -> List[str]:
+        """
+        Edit a generated plan in place, recomputing only what the changes affect.
+        
+        Args:
+            result: Plan returned by generate_travel_plan()
+            state: The plan_state filled by generate_travel_plan()
+            changes: Any of
+                budget: New total budget
+                hotel: Id or name of one of the fetched hotels
+                hotel_preference: Switch to the best fetched hotel for this preference
+                days: [{'day': N, 'attractions': [names]}] - replace day N's attractions
+                    ('attraction': name for a single one; the next unscheduled ones when
+                    no name is given). The day's other activities are kept.
+        
+        Returns:
+            Names of the recomputed sections
+        
+        Raises:
+            ValueError: If a change is invalid
+        """
+        unknown = set(changes) - {'budget', 'hotel', 'hotel_preference', 'days'}
+        if unknown:
+            raise ValueError(f"Unsupported changes: {', '.join(sorted(unknown))}")
+        
+        plan = result['plan']
+        num_days, num_people = plan['num_days'], plan['num_people']
+        user_set_budget = state['inputs']['user_set_budget']
+        hotel, transport = self._current_options(plan, state)
+        updated = []
+        changed_days = set()
+        
+        if 'budget' in changes:
+            try:
+                budget = int(changes['budget'])
+            except (TypeError, ValueError):
+                raise ValueError('budget must be a number')
+            if budget < 0:
+                raise ValueError('budget must not be negative')
+            plan['budget'] = state['inputs']['budget'] = budget
+            plan['daily_budget'] = budget // num_days if num_days > 0 else budget
+            plan['per_person_budget'] = budget // num_people if num_people > 0 else budget
+            updated.append('budget')
+        
+        new_hotel = hotel
+        if 'hotel_preference' in changes:
+            preference = changes['hotel_preference']
+            if preference not in self.HOTEL_PREFERENCES:
+                raise ValueError(f'Unknown hotel preference: {preference}')
+            best = self._filter_hotels_by_preference(state['hotels'], preference, self.HOTEL_PREFERENCES[preference], limit=1)
+            new_hotel = best[0] if best else hotel
+            plan['hotel_preference'] = preference
+            plan['hotel_preference_description'] = self.HOTEL_PREFERENCES[preference]['description']
+            plan['tips'] = self._generate_tips(plan['destination'], plan['travel_types'][0]) + \
+                self._generate_hotel_tips(preference)
+            updated.extend(['hotel_preference', 'tips'])
+        
+        if 'hotel' in changes:
+            key = str(changes['hotel'])
+            matches = [h for h in state['hotels'] if str(h.get('id')) == key or h.get('name') == key]
+            if not matches:
+                raise ValueError(f'Unknown hotel: {key}')
+            new_hotel = matches[0]
+        
+        if new_hotel is not hotel:
+            hotel = plan['recommended_hotel'] = new_hotel
+            # Only the check-in / check-out activities mention the hotel; routes start from it
+            plan['itinerary'][0]['activities'][0] = self._arrival_activity(
+                plan['destination'], hotel, [transport] if transport else []
+            )
+            plan['itinerary'][-1]['activities'][-1] = self._departure_activity(hotel)
+            changed_days.update({1, num_days})
+            for index, day_plan in enumerate(plan['itinerary']):
+                if not state['day_stops'][index]:
+                    continue
+                route = plan_day_routes(hotel, state['day_stops'][index], 1)['days'][0]
+                if route['stops'] != state['day_stops'][index]:
+                    changed_days.add(index + 1)
+                state['day_stops'][index] = route['stops']
+                self._replace_day_stops(day_plan, route, plan['destination'], plan['travel_type'], state['travel_config'])
+            updated.extend(['recommended_hotel', 'routes'])
+        
+        if new_hotel is not None and ('hotel' in changes or 'hotel_preference' in changes):
+            plan['accommodation'] = self._build_accommodation(hotel, plan['hotel_preference'], num_days, plan['destination'])
+            updated.append('accommodation')
+        
+        for entry in changes.get('days') or []:
+            try:
+                day = int(entry['day'])
+            except (KeyError, TypeError, ValueError):
+                raise ValueError('Each day change needs a day number')
+            if not 1 <= day <= num_days:
+                raise ValueError(f'day must be between 1 and {num_days}')
+            
+            names = entry.get('attractions') or entry.get('attraction') or []
+            if isinstance(names, str):
+                names = [names]
+            if len(names) > len(self.AFTERNOON_SLOTS):
+                raise ValueError(f'At most {len(self.AFTERNOON_SLOTS)} attractions fit in a day')
+            # Days elsewhere in the plan (including earlier changes in this request)
+            planned_on = {
+                stop.get('name'): index + 1
+                for index, planned in enumerate(state['day_stops']) if index != day - 1
+                for stop in planned
+            }
+            if names:
+                stops = []
+                for name in dict.fromkeys(names):
+                    matches = [a for a in state['attractions'] if a.get('name') == name]
+                    if not matches:
+                        raise ValueError(f'Unknown attraction: {name}')
+                    if name in planned_on:
+                        raise ValueError(f'{name} is already planned on day {planned_on[name]}')
+                    stops.append(matches[0])
+            else:
+                scheduled = {stop.get('name') for planned in state['day_stops'] for stop in planned}
+                stops = AttractionQueue(
+                    [a for a in state['attractions'] if a.get('name') not in scheduled],
+                    state['travel_config'].get('attraction_categories', [])
+                ).take(len(self.AFTERNOON_SLOTS))
+            
+            route = plan_day_routes(hotel, stops, 1)['days'][0]
+            state['day_stops'][day - 1] = route['stops']
+            self._replace_day_stops(
+                plan['itinerary'][day - 1], route, plan['destination'], plan['travel_type'], state['travel_config']
+            )
+            changed_days.add(day)
+        updated.extend(f'day:{day}' for day in sorted(changed_days))
+        
+        # Totals, warnings and trade-offs are cheap to recompute from the edited plan
+        cost_breakdown = self._calculate_costs(
+            plan['itinerary'], hotel, transport, plan['budget'], num_days, num_people, user_set_budget
+        )
+        budget_exceeded, budget_warning = self._check_budget(cost_breakdown['estimated_total'], plan['budget'], user_set_budget)
+        plan['cost_breakdown'] = cost_breakdown
+        plan['budget_exceeded'] = result['budget_exceeded'] = budget_exceeded
+        plan['budget_warning'] = result['budget_warning'] = budget_warning
+        plan['travel_distance_km'] = self._travel_distance(plan['itinerary'])
+        updated.append('cost_breakdown')
+        # Optional sections are only kept up to date once they have been computed
+        if 'alternatives' in plan:
+            plan['alternatives'] = self._plan_alternatives(plan, state, hotel, transport)
+            updated.append('alternatives')
+        
+        # Re-render only the changed text sections
+        sections = state.get('text_sections')
+        if sections is not None:
+            if 'budget' in changes:
+                sections[0] = self._format_text_header(
+                    plan['destination'], plan['travel_type'], plan['budget'], num_people, num_days
+                )
+            for day in changed_days:
+                sections[day] = self._format_day_text(plan['itinerary'][day - 1])
+            plan['itinerary_text'] = "\n".join(sections)
+        
+        return updated
     
     def _merge_travel_configs(self, travel_types: List[str]) -> Dict:
         """Merge activities from multiple travel types"""
         merged = {
             'description': '',
+            'attraction_categories': [],
             'morning_activities': [],
             'afternoon_activities': [],
             'evening_activities': []
@@ -399,6 +658,7 @@ class TravelPlannerService:
             config = self.TRAVEL_TYPES.get(travel_type, {})
             if config:
                 descriptions.append(config.get('description', ''))
+                merged['attraction_categories'].extend(config.get('attraction_categories', []))
                 merged['morning_activities'].extend(config.get('morning_activities', []))
                 merged['afternoon_activities'].extend(config.get('afternoon_activities', []))
                 merged['evening_activities'].extend(config.get('evening_activities', []))
@@ -412,6 +672,21 @@ class TravelPlannerService:
         
         return merged
     
+    def _route_attractions(
+        self,
+        hotel: Dict,
+        attractions: List[Dict],
+        travel_config: Dict,
+        num_days: int
+    ) -> Dict:
+        """
+        Up to len(AFTERNOON_SLOTS) attractions per day, grouped by area around
+        the hotel and visited in the shortest order found (see routing.plan_day_routes).
+        """
+        # Each attraction is scheduled at most once, preferring the travel type's categories
+        attraction_queue = AttractionQueue(attractions, travel_config.get('attraction_categories', []))
+        return plan_day_routes(hotel, attraction_queue.take(num_days * len(self.AFTERNOON_SLOTS)), num_days)
+    
     def _generate_itinerary(
         self,
         destination: str,
@@ -421,115 +696,234 @@ class TravelPlannerService:
         daily_budget: int,
         hotels: List[Dict],
         transports: List[Dict],
-        attractions: List[Dict]
+        attractions: List[Dict],
+        routes: Dict = None
     ) -> List[Dict]:
         """Generate day-by-day itinerary"""
         
-        itinerary = []
-        used_attractions = []
-        
-        # Calculate actual activity budget from attractions
-        total_attraction_cost = sum(a.get('price_per_person', 0) for a in attractions[:5]) if attractions else 0
-        avg_attraction_cost = total_attraction_cost / 5 if attractions else 15
-        
         # Get recommended hotel info
         recommended_hotel = hotels[0] if hotels else None
         
-        for day in range(1, num_days + 1):
-            day_plan = {
-                'day': day,
-                'title': f"Day {day} in {destination}",
-                'activities': []
-            }
-            
-            # Morning activity
+        if routes is None:
+            routes = self._route_attractions(recommended_hotel, attractions, travel_config, num_days)
+        
+        return [
+            self._generate_day(
+                day=day,
+                num_days=num_days,
+                destination=destination,
+                travel_type=travel_type,
+                travel_config=travel_config,
+                hotel=recommended_hotel,
+                transports=transports,
+                route=routes['days'][day - 1]
+            )
+            for day in range(1, num_days + 1)
+        ]
+    
+    def _generate_day(
+        self,
+        day: int,
+        num_days: int,
+        destination: str,
+        travel_type: str,
+        travel_config: Dict,
+        hotel: Dict,
+        transports: List[Dict],
+        route: Dict
+    ) -> Dict:
+        """Plan a single day; `route` holds the day's attraction stops in visiting order"""
+        day_plan = {
+            'day': day,
+            'title': f"Day {day} in {destination}",
+            'activities': []
+        }
+        
+        # Morning activity
+        if day == 1:
+            # First day: arrival and hotel check-in
+            morning = self._arrival_activity(destination, hotel, transports)
+        else:
             morning = {
                 'time': 'Morning (9:00 AM)',
-                'activity': '',
-                'description': '',
-                'estimated_cost': 0
-            }
-            
-            if day == 1:
-                # First day: arrival and hotel check-in
-                if transports:
-                    transport = transports[0]
-                    morning['activity'] = f"Arrive via {transport.get('name', 'transport')}"
-                    if recommended_hotel:
-                        morning['description'] = f"Travel to {destination}. Check into {recommended_hotel.get('name', 'your hotel')} (Check-in: 3:00 PM)"
-                    else:
-                        morning['description'] = f"Travel to {destination}. Check into your hotel and freshen up."
-                    # Don't add transport cost here as it's counted separately in cost_breakdown
-                    morning['estimated_cost'] = 0
-                else:
-                    morning['activity'] = f"Arrive in {destination}"
-                    if recommended_hotel:
-                        morning['description'] = f"Check into {recommended_hotel.get('name', 'your hotel')} (Check-in: 3:00 PM) and settle in"
-                    else:
-                        morning['description'] = f"Check into your hotel and settle in"
-                    morning['estimated_cost'] = 0
-            else:
-                morning['activity'] = random.choice(travel_config['morning_activities'])
-                morning['description'] = f"Start your day with this {travel_type} experience"
+                'activity': random.choice(travel_config['morning_activities']),
+                'description': f"Start your day with this {travel_type} experience",
                 # Use free activities for morning walks/explorations
-                morning['estimated_cost'] = 0
-            
-            day_plan['activities'].append(morning)
-            
-            # Afternoon activity - use real attractions with actual costs
-            afternoon = {
-                'time': 'Afternoon (2:00 PM)',
-                'activity': '',
-                'description': '',
                 'estimated_cost': 0
             }
-            
-            # Try to use real attractions
-            available_attractions = [a for a in attractions if a.get('name') not in used_attractions]
-            if available_attractions:
-                attraction = available_attractions[0]
-                used_attractions.append(attraction.get('name'))
-                afternoon['activity'] = f"Visit {attraction.get('name', 'local attraction')}"
-                afternoon['description'] = attraction.get('description', f"Visit the famous {attraction.get('name')} in {destination}")
-                afternoon['estimated_cost'] = attraction.get('price_per_person', 0)
-            else:
-                afternoon['activity'] = random.choice(travel_config['afternoon_activities'])
-                afternoon['description'] = f"Enjoy {travel_type} activities in {destination}"
-                # Free afternoon activity (walking tour, exploring, etc.)
-                afternoon['estimated_cost'] = 0
-            
-            day_plan['activities'].append(afternoon)
-            
-            # Evening activity
+        
+        day_plan['activities'].append(morning)
+        
+        # Evening activity
+        if day == num_days:
+            # Last day: check-out and departure
+            evening = self._departure_activity(hotel)
+        else:
             evening = {
                 'time': 'Evening (7:00 PM)',
-                'activity': '',
-                'description': '',
+                'activity': random.choice(travel_config['evening_activities']),
+                'description': f"End your day with a memorable {travel_type} experience",
+                # Evening activities are typically dining/entertainment, keep as included/free
                 'estimated_cost': 0
             }
-            
-            if day == num_days:
-                # Last day: check-out and departure
-                evening['activity'] = "Prepare for departure"
-                if recommended_hotel:
-                    evening['description'] = f"Check out from {recommended_hotel.get('name', 'hotel')} (Check-out: 11:00 AM), enjoy a final dinner, and prepare for your journey home"
-                else:
-                    evening['description'] = "Check out, enjoy a final dinner, and prepare for your journey home"
-                evening['estimated_cost'] = 0
+        
+        day_plan['activities'].append(evening)
+        
+        # Afternoon activities go in between
+        self._replace_day_stops(day_plan, route, destination, travel_type, travel_config)
+        return day_plan
+    
+    def _replace_day_stops(self, day_plan: Dict, route: Dict, destination: str, travel_type: str, travel_config: Dict):
+        """Put `route`'s attraction visits between the day's morning and evening, keeping those"""
+        # Afternoon activities - the routed attractions in visiting order, with actual costs
+        afternoon = [
+            {
+                'time': self.AFTERNOON_SLOTS[min(index, len(self.AFTERNOON_SLOTS) - 1)],
+                'activity': f"Visit {attraction.get('name', 'local attraction')}",
+                'description': attraction.get('description', f"Visit the famous {attraction.get('name')} in {destination}"),
+                'estimated_cost': attraction.get('price_per_person', 0)
+            }
+            for index, attraction in enumerate(route['stops'])
+        ]
+        if not afternoon:
+            afternoon.append({
+                'time': self.AFTERNOON_SLOTS[0],
+                'activity': random.choice(travel_config['afternoon_activities']),
+                'description': f"Enjoy {travel_type} activities in {destination}",
+                # Free afternoon activity (walking tour, exploring, etc.)
+                'estimated_cost': 0
+            })
+        
+        activities = day_plan['activities']
+        day_plan['activities'] = [activities[0], *afternoon, activities[-1]]
+        
+        # Calculate day total (only paid activities)
+        day_plan['day_total'] = sum(a['estimated_cost'] for a in day_plan['activities'])
+        
+        if route['distance_km'] is not None:
+            day_plan['route'] = {
+                'stops': [stop.get('name') for stop in route['stops']],
+                'distance_km': route['distance_km']
+            }
+        else:
+            day_plan.pop('route', None)
+    
+    def _arrival_activity(self, destination: str, hotel: Dict, transports: List[Dict]) -> Dict:
+        """First morning: travel in and check into the hotel"""
+        morning = {
+            'time': 'Morning (9:00 AM)',
+            'activity': '',
+            'description': '',
+            # Don't add transport cost here as it's counted separately in cost_breakdown
+            'estimated_cost': 0
+        }
+        if transports:
+            morning['activity'] = f"Arrive via {transports[0].get('name', 'transport')}"
+            if hotel:
+                morning['description'] = f"Travel to {destination}. Check into {hotel.get('name', 'your hotel')} (Check-in: 3:00 PM)"
             else:
-                evening['activity'] = random.choice(travel_config['evening_activities'])
-                evening['description'] = f"End your day with a memorable {travel_type} experience"
-                # Evening activities are typically dining/entertainment, keep as included/free
-                evening['estimated_cost'] = 0
-            
-            day_plan['activities'].append(evening)
-            
-            # Calculate day total (only paid activities)
-            day_plan['day_total'] = sum(a['estimated_cost'] for a in day_plan['activities'])
-            
-            itinerary.append(day_plan)
+                morning['description'] = f"Travel to {destination}. Check into your hotel and freshen up."
+        else:
+            morning['activity'] = f"Arrive in {destination}"
+            if hotel:
+                morning['description'] = f"Check into {hotel.get('name', 'your hotel')} (Check-in: 3:00 PM) and settle in"
+            else:
+                morning['description'] = f"Check into your hotel and settle in"
+        return morning
+    
+    def _departure_activity(self, hotel: Dict) -> Dict:
+        """Last evening: check out and prepare to leave"""
+        evening = {
+            'time': 'Evening (7:00 PM)',
+            'activity': "Prepare for departure",
+            'description': '',
+            'estimated_cost': 0
+        }
+        if hotel:
+            evening['description'] = f"Check out from {hotel.get('name', 'hotel')} (Check-out: 11:00 AM), enjoy a final dinner, and prepare for your journey home"
+        else:
+            evening['description'] = "Check out, enjoy a final dinner, and prepare for your journey home"
+        return evening
+    
+    def _calculate_costs(
+        self,
+        itinerary: List[Dict],
+        hotel: Dict,
+        transport: Dict,
+        budget: int,
+        num_days: int,
+        num_people: int,
+        user_set_budget: bool
+    ) -> Dict:
+        """Cost breakdown of a plan"""
+        hotel_cost = hotel.get('price_per_night', 0) * num_days if hotel else 0
+        transport_cost = transport.get('price_per_person', 0) * num_people if transport else 0
+        
+        # Calculate actual attraction costs from the generated itinerary
+        # Sum up all activity costs from each day (these are per-person costs)
+        itinerary_per_person_cost = 0
+        for day in itinerary:
+            for activity in day.get('activities', []):
+                itinerary_per_person_cost += activity.get('estimated_cost', 0)
+        
+        # Multiply by num_people to get total activities cost
+        attraction_cost_actual = itinerary_per_person_cost * num_people
+        
+        # Calculate attraction budget (remaining from user's budget)
+        if user_set_budget:
+            attraction_budget = max(0, budget - hotel_cost - transport_cost)
+        else:
+            attraction_budget = attraction_cost_actual
+        
+        # Use actual costs for total estimation
+        total_estimated = hotel_cost + transport_cost + attraction_cost_actual
         
-        return itinerary
+        return {
+            'hotel': hotel_cost,
+            'transport': transport_cost,
+            'activities_budget': attraction_budget,
+            'activities_actual': attraction_cost_actual,
+            'activities_per_person': itinerary_per_person_cost,
+            'estimated_total': total_estimated,
+            'remaining_budget': budget - total_estimated
+        }
+    
+    def _check_budget(self, total_estimated: float, budget: int, user_set_budget: bool):
+        """(budget_exceeded, budget_warning) for an estimated total"""
+        if not (user_set_budget and total_estimated > budget):
+            return False, None
+        over_budget_amount = total_estimated - budget
+        return True, {
+            'type': 'over_budget',
+            'message': f'This trip exceeds your budget of ${budget:,} by ${over_budget_amount:,.2f}',
+            'suggestion': 'Consider adjusting your travel dates, choosing budget-friendly hotels, or increasing your budget.',
+            'over_amount': over_budget_amount,
+            'required_budget': total_estimated
+        }
+    
+    def _build_accommodation(self, hotel: Dict, hotel_preference: str, num_days: int, destination: str) -> Dict:
+        """Hotel accommodation details"""
+        if not hotel:
+            return None
+        hotel_pref = self.HOTEL_PREFERENCES.get(hotel_preference, self.HOTEL_PREFERENCES['mid-range'])
+        return {
+            'hotel_name': hotel.get('name', 'Recommended Hotel'),
+            'hotel_type': hotel_preference,
+            'price_per_night': hotel.get('price_per_night', 0),
+            'total_nights': num_days,
+            'total_cost': hotel.get('price_per_night', 0) * num_days,
+            'check_in_time': '3:00 PM',
+            'check_out_time': '11:00 AM',
+            'amenities': hotel.get('amenities', hotel_pref.get('amenities', [])),
+            'rating': hotel.get('rating', 0),
+            'stars': hotel.get('stars', hotel.get('star_rating', 3)),
+            'address': hotel.get('address', f'{destination} City Center'),
+            'image': hotel.get('image', hotel.get('image_url', ''))
+        }
+    
+    def _travel_distance(self, itinerary: List[Dict]) -> float:
+        """Round-trip distance from the hotel summed over the routed days"""
+        return round(sum(day.get('route', {}).get('distance_km', 0) for day in itinerary), 2)
     
     def _format_itinerary_text(
         self,
@@ -541,29 +935,44 @@ class TravelPlannerService:
         num_days: int
     ) -> str:
         """Format itinerary as readable text"""
-        
+        return "\n".join(self._itinerary_text_sections(itinerary, destination, travel_type, budget, num_people, num_days))
+    
+    def _itinerary_text_sections(
+        self,
+        itinerary: List[Dict],
+        destination: str,
+        travel_type: str,
+        budget: int,
+        num_people: int,
+        num_days: int
+    ) -> List[str]:
+        """Itinerary text as [header, day 1, day 2, ...] sections, joined by newlines"""
+        return [self._format_text_header(destination, travel_type, budget, num_people, num_days)] + [
+            self._format_day_text(day) for day in itinerary
+        ]
+    
+    def _format_text_header(self, destination: str, travel_type: str, budget: int, num_people: int, num_days: int) -> str:
         lines = [
             f"# {num_days}-Day {travel_type.title()} Trip to {destination}",
             f"**Total Budget:** ${budget} for {num_people} {'person' if num_people == 1 else 'people'}",
             f"**Daily Budget:** ${budget // num_days}",
             ""
         ]
+        return "\n".join(lines)
+    
+    def _format_day_text(self, day: Dict) -> str:
+        lines = [f"## {day['title']}", ""]
         
-        for day in itinerary:
-            lines.append(f"## {day['title']}")
-            lines.append("")
-            
-            for activity in day['activities']:
-                lines.append(f"**{activity['time']}**")
-                lines.append(f"- {activity['activity']}")
-                lines.append(f"  _{activity['description']}_")
-                if activity['estimated_cost'] > 0:
-                    lines.append(f"  Est. cost: ${activity['estimated_cost']:.0f}")
-                lines.append("")
-            
-            lines.append(f"**Day Total:** ${day['day_total']:.0f}")
+        for activity in day['activities']:
+            lines.append(f"**{activity['time']}**")
+            lines.append(f"- {activity['activity']}")
+            lines.append(f"  _{activity['description']}_")
+            if activity['estimated_cost'] > 0:
+                lines.append(f"  Est. cost: ${activity['estimated_cost']:.0f}")
             lines.append("")
         
+        lines.append(f"**Day Total:** ${day['day_total']:.0f}")
+        lines.append("")
         return "\n".join(lines)
     
     def _generate_tips(self, destination: str, travel_type: str) -> List[str]:
@@ -619,7 +1028,8 @@ class TravelPlannerService:
         self,
         hotels: List[Dict],
         hotel_preference: str,
-        hotel_pref_config: Dict
+        hotel_pref_config: Dict,
+        limit: int = None
     ) -> List[Dict]:
         """
         Filter and sort hotels based on user's preference.
@@ -628,6 +1038,7 @@ class TravelPlannerService:
             hotels: List of available hotels
             hotel_preference: User's hotel preference (luxury, budget, etc.)
             hotel_pref_config: Configuration for the preference
+            limit: Only return the `limit` best matching hotels
         
         Returns:
             Filtered and sorted list of hotels
@@ -635,54 +1046,8 @@ class TravelPlannerService:
         if not hotels:
             return []
         
-        price_min, price_max = hotel_pref_config.get('price_range', (0, 1000))
-        
-        # Score hotels based on how well they match the preference
-        scored_hotels = []
-        for hotel in hotels:
-            price = hotel.get('price_per_night', 0) or 0
-            score = 0
-            
-            # Price range matching
-            if price_min <= price <= price_max:
-                score += 50  # Perfect price match
-            elif price < price_min:
-                # Slightly below range - still good for budget-conscious
-                score += 30
-            else:
-                # Above range - penalize but still include
-                score += max(0, 20 - (price - price_max) / 50)
-            
-            # Rating bonus
-            rating = hotel.get('rating', 0) or 0
-            score += rating * 5
-            
-            # Amenity matching
-            hotel_amenities = set(hotel.get('amenities', []) or [])
-            preferred_amenities = set(hotel_pref_config.get('amenities', []) or [])
-            matching_amenities = len(hotel_amenities & preferred_amenities)
-            score += matching_amenities * 5
-            
-            # Star rating alignment with preference
-            stars = hotel.get('stars', 3) or hotel.get('star_rating', 3) or 3
-            if hotel_preference == 'luxury' and stars >= 5:
-                score += 20
-            elif hotel_preference == 'boutique' and 3 <= stars <= 4:
-                score += 15
-            elif hotel_preference == 'mid-range' and 3 <= stars <= 4:
-                score += 15
-            elif hotel_preference == 'budget' and stars <= 3:
-                score += 15
-            elif hotel_preference == 'hostel' and stars <= 2:
-                score += 15
-            
-            scored_hotels.append((score, hotel))
-        
-        # Sort by score (highest first)
-        scored_hotels.sort(key=lambda x: x[0], reverse=True)
-        
-        # Return hotels sorted by preference
-        return [hotel for score, hotel in scored_hotels]
+        # Scored column-wise: price band, rating, amenity overlap and star alignment
+        return rank_hotels(hotels, hotel_preference, hotel_pref_config, limit)
     
     def _generate_hotel_tips(self, hotel_preference: str) -> List[str]:
         """Generate tips based on hotel preference"""
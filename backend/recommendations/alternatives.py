@@ -0,0 +1,135 @@
+"""
+Alternative plans on the cost / rating / travel-time Pareto frontier.
+
+A plan alternative is a (hotel, transport) pair; its cost is the stay plus
+the tickets (plus the shared activities cost), its rating is the hotel's and
+its travel time is the transport's duration. Rating only depends on the hotel
+and travel time only on the transport, so a pair is non-dominated exactly
+when its hotel is on the hotel (cost, rating) frontier and its transport on
+the transport (cost, duration) frontier. Both 2-D frontiers come from one
+sort each, and the planner returns a few representative points of their
+product: the cheapest, best rated, fastest and most balanced plans.
+"""
+
+from typing import Dict, List, Optional
+
+import numpy as np
+
+
+MAX_ALTERNATIVES = 4
+
+
+def _prices(items: List[Dict], field: str) -> np.ndarray:
+    """Prices as floats; missing or invalid prices are NaN"""
+    values = []
+    for item in items:
+        try:
+            values.append(float(item.get(field)))
+        except (TypeError, ValueError):
+            values.append(np.nan)
+    return np.array(values, dtype=float)
+
+
+def _frontier(cost: np.ndarray, benefit: np.ndarray) -> np.ndarray:
+    """
+    Indices of items not dominated on (lower cost, higher benefit), cheapest first.
+    Items without a cost are skipped; ties keep the earliest item.
+    """
+    priced = np.flatnonzero(~np.isnan(cost))
+    if not len(priced):
+        return priced
+    order = priced[np.lexsort((-benefit[priced], cost[priced]))]
+    best_before = np.maximum.accumulate(np.concatenate(([-np.inf], benefit[order][:-1])))
+    keep = benefit[order] > best_before
+    keep[0] = True
+    return order[keep]
+
+
+def pareto_alternatives(
+    hotels: List[Dict],
+    transports: List[Dict],
+    num_days: int,
+    num_people: int,
+    activities_cost: float = 0,
+    budget: Optional[float] = None,
+    current: Optional[tuple] = None,
+    max_alternatives: int = MAX_ALTERNATIVES
+) -> List[Dict]:
+    """
+    Representative non-dominated plans built from already fetched options.
+
+    Args:
+        hotels: Candidate hotels
+        transports: Candidate transports
+        num_days: Nights to stay
+        num_people: Travelers (transport is priced per person)
+        activities_cost: Activities cost shared by every alternative
+        budget: When given, each alternative reports whether it fits
+        current: (hotel, transport) of the main plan, flagged in the result
+
+    Returns:
+        Up to `max_alternatives` plans, cheapest first, each labelled with the
+        trade-offs it wins ('cheapest', 'best_rated', 'fastest', 'balanced').
+    """
+    if not hotels and not transports:
+        return []
+    # Without options of one kind the plan simply has no hotel / transport
+    if hotels:
+        hotel_cost = _prices(hotels, 'price_per_night') * num_days
+        rating = np.nan_to_num(_prices(hotels, 'rating'), nan=0.0)
+    else:
+        hotels, hotel_cost, rating = [None], np.zeros(1), np.zeros(1)
+    if transports:
+        transport_cost = _prices(transports, 'price_per_person') * num_people
+        duration = np.nan_to_num(_prices(transports, 'duration_minutes'), nan=np.inf)
+    else:
+        transports, transport_cost, duration = [None], np.zeros(1), np.full(1, np.inf)
+
+    hotel_front = _frontier(hotel_cost, rating)
+    transport_front = _frontier(transport_cost, -duration)
+    if not len(hotel_front) or not len(transport_front):
+        return []
+
+    # Every frontier pair, as flat arrays over (hotel, transport)
+    h, t = (a.ravel() for a in np.meshgrid(hotel_front, transport_front, indexing='ij'))
+    total = hotel_cost[h] + transport_cost[t] + activities_cost
+    objectives = np.column_stack([total, -rating[h], duration[t]])
+
+    picks = {
+        'cheapest': np.lexsort((objectives[:, 2], objectives[:, 1], objectives[:, 0]))[0],
+        'best_rated': np.lexsort((objectives[:, 2], objectives[:, 0], objectives[:, 1]))[0],
+        'fastest': np.lexsort((objectives[:, 1], objectives[:, 0], objectives[:, 2]))[0],
+    }
+    # Balanced: closest to the ideal point once every objective is scaled to [0, 1]
+    # (unknown durations count as the worst value)
+    known = np.isfinite(objectives)
+    low = np.where(known, objectives, np.inf).min(axis=0)
+    high = np.where(known, objectives, -np.inf).max(axis=0)
+    span = np.where(high > low, high - low, 1.0)
+    scaled = np.where(known, (np.where(known, objectives, 0) - np.where(np.isfinite(low), low, 0)) / span, 1.0)
+    picks['balanced'] = int(np.argmin(np.linalg.norm(scaled, axis=1)))
+
+    labels: Dict[int, List[str]] = {}
+    for label, index in picks.items():
+        labels.setdefault(int(index), []).append(label)
+
+    alternatives = []
+    for index in sorted(labels, key=lambda i: (total[i], i))[:max_alternatives]:
+        hotel, transport = hotels[h[index]], transports[t[index]]
+        estimated_total = round(float(total[index]), 2)
+        alternatives.append({
+            'labels': labels[index],
+            'hotel': hotel,
+            'transport': transport,
+            'cost_breakdown': {
+                'hotel': round(float(hotel_cost[h[index]]), 2),
+                'transport': round(float(transport_cost[t[index]]), 2),
+                'activities': activities_cost,
+                'estimated_total': estimated_total,
+            },
+            'hotel_rating': float(rating[h[index]]),
+            'travel_minutes': int(duration[t[index]]) if np.isfinite(duration[t[index]]) else None,
+            'within_budget': estimated_total <= budget if budget else None,
+            'is_current': current is not None and hotel is current[0] and transport is current[1],
+        })
+    return alternatives
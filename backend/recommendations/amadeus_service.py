@@ -8,6 +8,10 @@ import requests
 from typing import Optional, Dict, List, Any
 from datetime import datetime, timedelta
 import logging
+import time
+
+from . import metrics
+from .ranking import cheapest
 
 logger = logging.getLogger(__name__)
 
@@ -36,22 +40,28 @@ class AmadeusService:
     BASE_URL = "https://test.api.amadeus.com"
     
   
-    def __init__(self):
+    def __init__(self, request_memo=None):
         self.api_key = os.getenv('AMADEUS_API_KEY', '')
         self.api_secret = os.getenv('AMADEUS_API_SECRET', '')
         self._access_token = None
         self._token_expires = None
+        # Optional batching.CallMemo: identical GET requests are then sent once
+        self.request_memo = request_memo
     
     def _get_access_token(self) -> Optional[str]:
         """Get OAuth2 access token from Amadeus"""
         # Return cached token if still valid
         if self._access_token and self._token_expires and datetime.now() < self._token_expires:
+            metrics.record_cache('amadeus_token', hit=True)
             return self._access_token
+        metrics.record_cache('amadeus_token', hit=False)
         
         if not self.api_key or not self.api_secret:
             logger.warning("Amadeus API credentials not configured")
             return None
         
+        start = time.perf_counter()
+        outcome = 'error'
         try:
             response = requests.post(
                 self.AUTH_URL,
@@ -63,6 +73,7 @@ class AmadeusService:
                 headers={'Content-Type': 'application/x-www-form-urlencoded'},
                 timeout=10
             )
+            outcome = response.status_code
             
             if response.status_code == 200:
                 data = response.json()
@@ -77,15 +88,25 @@ class AmadeusService:
                 
         except Exception as e:
             logger.error(f"Error getting Amadeus access token: {e}")
+        finally:
+            self._record_call('/v1/security/oauth2/token', outcome, start)
         
         return None
     
     def _make_request(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
         """Make authenticated request to Amadeus API"""
+        if self.request_memo is not None:
+            key = ('amadeus', endpoint, tuple(sorted((k, str(v)) for k, v in (params or {}).items())))
+            return self.request_memo.call(key, lambda: self._send_request(endpoint, params))
+        return self._send_request(endpoint, params)
+    
+    def _send_request(self, endpoint: str, params: Dict = None) -> Optional[Dict]:
         token = self._get_access_token()
         if not token:
             return None
         
+        start = time.perf_counter()
+        outcome = 'error'
         try:
             url = f"{self.BASE_URL}{endpoint}"
             response = requests.get(
@@ -94,6 +115,7 @@ class AmadeusService:
                 headers={'Authorization': f'Bearer {token}'},
                 timeout=30
             )
+            outcome = response.status_code
             
             if response.status_code == 200:
                 return response.json()
@@ -102,9 +124,17 @@ class AmadeusService:
                 
         except Exception as e:
             logger.error(f"Error calling Amadeus API: {e}")
+        finally:
+            self._record_call(endpoint, outcome, start)
         
         return None
     
+    def _record_call(self, endpoint: str, outcome: Any, start: float):
+        """Record count and latency of one Amadeus API call"""
+        metrics.inc('amadeus_requests_total', {'endpoint': endpoint, 'status': outcome})
+        metrics.observe('amadeus_request_duration_seconds', time.perf_counter() - start,
+                        {'endpoint': endpoint})
+    
     def get_city_code(self, city_name: str) -> Optional[str]:
         """Get IATA city code for a city name"""
         data = self._make_request(
@@ -127,7 +157,8 @@ class AmadeusService:
         departure_date: str,
         return_date: str = None,
         adults: int = 1,
-        max_results: int = 10
+        max_results: int = 10,
+        limit: int = None
     ) -> List[Dict]:
         """
         Search for flight offers.
@@ -139,9 +170,10 @@ class AmadeusService:
             return_date: Optional return date for round trips
             adults: Number of adult passengers
             max_results: Maximum number of results
+            limit: Only return the `limit` cheapest offers
         
         Returns:
-            List of flight offers with prices
+            List of flight offers with prices, cheapest first
         """
         # Get IATA codes if city names provided
         origin_code = origin if len(origin) == 3 else self.get_city_code(origin)
@@ -197,7 +229,7 @@ class AmadeusService:
                 'is_real_data': True
             })
         
-        return sorted(flights, key=lambda x: x['price_per_person'])
+        return cheapest(flights, 'price_per_person', limit)
     
     def search_hotels(
         self,
@@ -206,7 +238,8 @@ class AmadeusService:
         check_out: str,
         adults: int = 1,
         rooms: int = 1,
-        max_results: int = 10
+        max_results: int = 10,
+        limit: int = None
     ) -> List[Dict]:
         """
         Search for hotel offers.
@@ -218,9 +251,10 @@ class AmadeusService:
             adults: Number of adults
             rooms: Number of rooms
             max_results: Maximum results
+            limit: Only return the `limit` cheapest offers
         
         Returns:
-            List of hotel offers with prices
+            List of hotel offers with prices, cheapest first
         """
         # First, get city code
         city_code = city if len(city) == 3 else self.get_city_code(city)
@@ -263,8 +297,11 @@ class AmadeusService:
         )
         
         if not offers_data or not offers_data.get('data'):
-            # Fallback: return hotel list without prices
-            return self._format_hotels_without_prices(hotels_data['data'][:max_results], city)
+            # Fallback: return hotel list without prices, in API order as there is no price to rank by
+            listed = hotels_data['data'][:max_results]
+            if limit is not None:
+                listed = listed[:max(limit, 0)]
+            return self._format_hotels_without_prices(listed, city)
         
         hotels = []
         for i, hotel_offer in enumerate(offers_data['data']):
@@ -293,7 +330,7 @@ class AmadeusService:
                 'is_real_data': True
             })
         
-        return sorted(hotels, key=lambda x: x['price_per_night'])
+        return cheapest(hotels, 'price_per_night', limit)
     
     def _format_hotels_without_prices(self, hotels_data: List[Dict], city: str) -> List[Dict]:
         """Format hotel list when price data is unavailable"""
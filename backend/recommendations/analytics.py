@@ -0,0 +1,194 @@
+"""
+Search analytics from SearchHistory rollups.
+
+rollup_searches() folds new SearchHistory rows, in primary key order from a
+checkpoint, into hourly and daily SearchRollup rows counted per normalized
+destination, party size and lead time bucket. It is incremental: each batch
+adds its counts to the existing rollups and advances the checkpoint in one
+transaction. Ids are handed out before commit, so a search can become visible
+after a higher id was already rolled up; rows only count once they are
+SEARCH_ROLLUP_SETTLE_SECONDS old, and a batch stops at the first younger row,
+so the checkpoint never passes a search that may still be committing.
+prune_search_history() then deletes raw rows past the retention
+period, in bounded batches and only once they are rolled up. The analytics
+API reads rollups only, so its cost depends on the period and the number of
+destinations, not on how many searches were made.
+
+Run `manage.py rollup_searches` and `manage.py prune_search_history` from a
+scheduler (e.g. cron, every few minutes and daily).
+"""
+
+from collections import defaultdict
+from datetime import timedelta
+from typing import Callable, Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Sum
+from django.utils import timezone
+
+from .models import RollupCheckpoint, SearchHistory, SearchRollup
+
+
+CHECKPOINT = 'search_history'
+
+# (lowest lead time in days, label), ascending
+LEAD_TIME_BUCKETS = ((0, '0-3'), (4, '4-7'), (8, '8-14'), (15, '15-30'), (31, '31-90'), (91, '91+'))
+
+GRANULARITIES = ('hour', 'day')
+
+
+def normalize_destination(query: str) -> str:
+    """Group 'Paris', ' paris ' and 'PARIS' together"""
+    return ' '.join(query.split()).lower()
+
+
+def lead_time_bucket(days: int) -> str:
+    label = LEAD_TIME_BUCKETS[0][1]
+    for low, bucket in LEAD_TIME_BUCKETS:
+        if days >= low:
+            label = bucket
+    return label
+
+
+def period_start(moment, granularity: str):
+    moment = moment.replace(minute=0, second=0, microsecond=0)
+    return moment.replace(hour=0) if granularity == 'day' else moment
+
+
+def rollup_searches(batch_size: int = 5000, settle_seconds: Optional[int] = None) -> int:
+    """Fold SearchHistory rows added since the checkpoint into the rollups; returns rows processed"""
+    if settle_seconds is None:
+        settle_seconds = getattr(settings, 'SEARCH_ROLLUP_SETTLE_SECONDS', 300)
+    settled_before = timezone.now() - timedelta(seconds=settle_seconds)
+    processed = 0
+    while True:
+        with transaction.atomic():
+            checkpoint, _ = RollupCheckpoint.objects.select_for_update().get_or_create(name=CHECKPOINT)
+            rows = list(
+                SearchHistory.objects.filter(pk__gt=checkpoint.last_id).order_by('pk').values_list(
+                    'pk', 'destination_query', 'num_people', 'check_in_date', 'check_out_date', 'created_at'
+                )[:batch_size]
+            )
+            fetched = len(rows)
+            # Stop at the first unsettled search: everything after it waits for the next run
+            settled = next((index for index, row in enumerate(rows) if row[5] >= settled_before), fetched)
+            rows = rows[:settled]
+            if not rows:
+                return processed
+
+            counts = defaultdict(lambda: [0, 0])  # rollup key -> [searches, nights]
+            for _, destination, people, check_in, check_out, created_at in rows:
+                lead_time = lead_time_bucket((check_in - created_at.date()).days)
+                for granularity in GRANULARITIES:
+                    key = (granularity, period_start(created_at, granularity),
+                           normalize_destination(destination), people, lead_time)
+                    counts[key][0] += 1
+                    counts[key][1] += max((check_out - check_in).days, 0)
+            _add_counts(counts)
+
+            checkpoint.last_id = rows[-1][0]
+            checkpoint.save(update_fields=['last_id', 'updated_at'])
+        processed += len(rows)
+        if settled < batch_size:
+            return processed
+
+
+def _add_counts(counts: Dict):
+    """Add counts to existing rollups and create the missing ones"""
+    existing = SearchRollup.objects.filter(
+        granularity__in={key[0] for key in counts},
+        period_start__in={key[1] for key in counts},
+        destination__in={key[2] for key in counts},
+    )
+    changed = []
+    for rollup in existing:
+        key = (rollup.granularity, rollup.period_start, rollup.destination, rollup.num_people, rollup.lead_time)
+        if key in counts:
+            searches, nights = counts.pop(key)
+            rollup.searches += searches
+            rollup.nights += nights
+            changed.append(rollup)
+    SearchRollup.objects.bulk_update(changed, ['searches', 'nights'])
+    SearchRollup.objects.bulk_create([
+        SearchRollup(granularity=granularity, period_start=start, destination=destination,
+                     num_people=people, lead_time=lead_time, searches=searches, nights=nights)
+        for (granularity, start, destination, people, lead_time), (searches, nights) in counts.items()
+    ])
+
+
+def delete_in_batches(queryset, batch_size: int = 5000,
+                      on_batch: Optional[Callable[[List[Dict]], None]] = None) -> int:
+    """
+    Delete the queryset's rows in primary key order, `batch_size` per transaction.
+
+    on_batch(rows) receives each batch's rows as dicts before they are
+    deleted (e.g. to archive them); if it raises, that batch is kept.
+    """
+    deleted = 0
+    while True:
+        with transaction.atomic():
+            batch = queryset.order_by('pk')[:batch_size]
+            if on_batch is not None:
+                rows = list(batch.values())
+                ids = [row['id'] for row in rows]
+                if rows:
+                    on_batch(rows)
+            else:
+                ids = list(batch.values_list('pk', flat=True))
+            if not ids:
+                return deleted
+            queryset.model.objects.filter(pk__in=ids).delete()
+        deleted += len(ids)
+
+
+def prune_search_history(days: int, batch_size: int = 5000,
+                         on_batch: Optional[Callable[[List[Dict]], None]] = None) -> int:
+    """Delete raw searches older than `days` that are already rolled up; returns rows deleted"""
+    checkpoint = RollupCheckpoint.objects.filter(name=CHECKPOINT).first()
+    if checkpoint is None:
+        return 0
+    cutoff = timezone.now() - timedelta(days=days)
+    return delete_in_batches(
+        SearchHistory.objects.filter(created_at__lt=cutoff, pk__lte=checkpoint.last_id),
+        batch_size, on_batch
+    )
+
+
+def prune_hourly_rollups(days: int, batch_size: int = 5000) -> int:
+    """Delete hourly rollups older than `days` (daily rollups are kept)"""
+    cutoff = timezone.now() - timedelta(days=days)
+    return delete_in_batches(SearchRollup.objects.filter(granularity='hour', period_start__lt=cutoff), batch_size)
+
+
+def search_analytics(granularity: str = 'day', days: int = 30, destination: str = '', top: int = 10) -> Dict:
+    """Search volume over the last `days` from the rollups: series and breakdowns"""
+    until = timezone.now()
+    since = period_start(until - timedelta(days=days), granularity)
+    rollups = SearchRollup.objects.filter(granularity=granularity, period_start__gte=since).order_by()
+    if destination:
+        rollups = rollups.filter(destination=normalize_destination(destination))
+
+    series = list(rollups.values('period_start').annotate(searches=Sum('searches')).order_by('period_start'))
+    destinations = list(
+        rollups.values('destination').annotate(searches=Sum('searches'), nights=Sum('nights'))
+        .order_by('-searches', 'destination')[:top]
+    )
+    party_sizes = list(rollups.values('num_people').annotate(searches=Sum('searches')).order_by('num_people'))
+    lead_times = {row['lead_time']: row['searches']
+                  for row in rollups.values('lead_time').annotate(searches=Sum('searches'))}
+
+    for row in destinations:
+        row['average_nights'] = round(row.pop('nights') / row['searches'], 1) if row['searches'] else 0
+    return {
+        'granularity': granularity,
+        'from': since,
+        'to': until,
+        'destination': normalize_destination(destination) if destination else None,
+        'total_searches': sum(point['searches'] for point in series),
+        'series': series,
+        'top_destinations': destinations,
+        'party_sizes': party_sizes,
+        'lead_times': [{'lead_time': label, 'searches': lead_times.get(label, 0)}
+                       for _, label in LEAD_TIME_BUCKETS],
+    }
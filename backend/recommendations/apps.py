@@ -4,3 +4,12 @@ from django.apps import AppConfig
 class RecommendationsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'recommendations'
+
+    def ready(self):
+        from django.conf import settings
+
+        from . import signals  # noqa: F401
+
+        if getattr(settings, 'BUNDLE_REFRESH_ENABLED', False):
+            from .bundles import recommendation_bundles
+            recommendation_bundles.start()
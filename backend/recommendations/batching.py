@@ -0,0 +1,44 @@
+"""
+Request-scoped call sharing for batched searches.
+
+CallMemo runs each keyed call once: concurrent callers with the same key
+wait for the first one's result (or exception) instead of repeating the
+work, and later callers get the stored result. A batch search shares one
+memo between all its queries, so overlapping queries reuse the same
+section fetches and upstream API calls.
+"""
+
+import threading
+from concurrent.futures import Future
+from typing import Any, Callable, Dict, Hashable
+
+from . import metrics
+
+
+class CallMemo:
+    """Single-flight memo of keyed calls"""
+
+    def __init__(self, name: str = 'call_memo'):
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._futures: Dict[Hashable, Future] = {}
+
+    def call(self, key: Hashable, func: Callable[[], Any]) -> Any:
+        with self._lock:
+            future = self._futures.get(key)
+            owner = future is None
+            if owner:
+                future = self._futures[key] = Future()
+                self.misses += 1
+            else:
+                self.hits += 1
+        metrics.record_cache(self.name, hit=not owner)
+
+        if owner:
+            try:
+                future.set_result(func())
+            except BaseException as e:
+                future.set_exception(e)
+        return future.result()
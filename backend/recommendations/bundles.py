@@ -0,0 +1,217 @@
+"""
+Precomputed recommendation bundles for popular destinations.
+
+A bundle holds the unfiltered result sections of one search - hotels, local
+transports, attractions and the transports from each BUNDLE_ORIGINS origin -
+as compact tuple tables, keyed by (normalized destination, check-in,
+check-out, people, rooms). When BUNDLE_REFRESH_ENABLED is set, a background
+thread started by RecommendationsConfig.ready() rebuilds the bundles of every popular destination,
+and of the TRENDING_BUNDLE_DESTINATIONS destinations searched most right now
+(see trending.py), for the common stay lengths (BUNDLE_STAY_NIGHTS), party
+sizes and check-in dates over the next BUNDLE_CHECKIN_DAYS days every
+BUNDLE_REFRESH_INTERVAL seconds. The new set is built off to the side and
+swapped in with a single reference assignment, so readers never see a
+half-refreshed store.
+
+With a live API (API_MODE amadeus or hybrid) every bundle costs upstream
+calls, so at most BUNDLE_LIVE_MAX_BUNDLES are built per refresh, nearest
+check-in dates first (0, the default, turns bundles off).
+
+TravelRecommendationService.get_recommendations() serves the sections a
+bundle has (budget and limit are applied on top, as for live data) and
+reports which ones and the bundle's age in summary.precomputed. Bundles
+older than BUNDLE_MAX_AGE are ignored.
+
+Like the plan jobs, bundles live in the memory of each worker process, and
+each process refreshes its own. Without the refresher nothing is built and
+every search is served live.
+"""
+
+import copy
+import threading
+import time
+from datetime import datetime, timedelta, timezone as dt_timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connections
+from django.utils import timezone
+
+from . import metrics
+from .analytics import normalize_destination
+
+
+_MISSING = object()  # marks keys a row doesn't have, so they stay absent when served
+
+
+def compact_table(rows: List[Dict]) -> Tuple[Tuple[str, ...], Tuple[Tuple, ...]]:
+    """(fields, rows) tuple table for a list of dicts"""
+    fields = tuple(dict.fromkeys(key for row in rows for key in row))
+    return fields, tuple(tuple(row.get(field, _MISSING) for field in fields) for row in rows)
+
+
+def _fresh(value):
+    return copy.deepcopy(value) if isinstance(value, (list, dict)) else value
+
+
+class RecommendationBundle:
+    """Immutable snapshot of one search's unfiltered sections"""
+    __slots__ = ('key', 'tables', 'built_at')
+
+    def __init__(self, key: Tuple, sections: Dict[str, List[Dict]], transports: Dict[str, List[Dict]]):
+        self.key = key
+        self.tables = {(name, ''): compact_table(rows) for name, rows in sections.items()}
+        self.tables.update({('transports', origin): compact_table(rows) for origin, rows in transports.items()})
+        self.built_at = time.time()
+
+    def has_section(self, name: str, origin: str) -> bool:
+        return (name, origin if name == 'transports' else '') in self.tables
+
+    def section(self, name: str, origin: str, limit: Optional[int] = None) -> Optional[List[Dict]]:
+        """Fresh dicts for the first `limit` rows of a section, or None if the bundle lacks it"""
+        table = self.tables.get((name, origin if name == 'transports' else ''))
+        if table is None:
+            return None
+        fields, rows = table
+        if limit is not None:
+            rows = rows[:max(limit, 0)]
+        return [{field: _fresh(value) for field, value in zip(fields, row) if value is not _MISSING}
+                for row in rows]
+
+    def freshness(self, sections: Iterable[str]) -> Dict:
+        """summary.precomputed for a response served (partly) from this bundle"""
+        return {
+            'sections': list(sections),
+            'built_at': datetime.fromtimestamp(self.built_at, dt_timezone.utc).isoformat(),
+            'age_seconds': int(time.time() - self.built_at),
+        }
+
+
+def bundle_key(destination: str, check_in: str, check_out: str, people: int, rooms: int) -> Tuple:
+    """'Paris', ' paris ' and 'PARIS' share one bundle"""
+    return (normalize_destination(destination), check_in, check_out, people, rooms)
+
+
+def bundle_destinations() -> List[str]:
+    """Popular destinations plus the trending ones, spelled as they are searched"""
+    from .models import Destination
+    from .trending import trending_destinations
+    popular = Destination.objects.filter(is_popular=True).values_list('city', flat=True)
+    top = trending_destinations.top(getattr(settings, 'TRENDING_BUNDLE_DESTINATIONS', 5))
+    # Skip destinations with less than about one recent search
+    trending = [name for _, name, score in top if score >= 1]
+    by_key = {}
+    for name in [*popular, *trending]:
+        by_key.setdefault(normalize_destination(name), name)
+    return list(by_key.values())
+
+
+class BundleStore:
+    """Bundles by search key, refreshed by one background thread per process"""
+
+    def __init__(self, refresh_interval: float = 900, max_age: float = 1800, stay_nights=(6,),
+                 checkin_days: int = 7, party_sizes=(2,), origins=('',), live_max_bundles: int = 0):
+        self.refresh_interval = refresh_interval
+        self.max_age = max_age
+        self.stay_nights = tuple(stay_nights)
+        self.checkin_days = checkin_days
+        self.party_sizes = tuple(party_sizes)
+        self.origins = tuple(origins)
+        self.live_max_bundles = live_max_bundles
+        self._bundles: Dict[Tuple, RecommendationBundle] = {}
+        self._lock = threading.Lock()  # serializes writers; readers use the current dict as is
+        self._refresher = None
+
+    def lookup(self, query: Dict) -> Optional[RecommendationBundle]:
+        """Fresh bundle for a search query (see TravelRecommendationService._search_query)"""
+        bundle = self._bundles.get(bundle_key(query['destination'], query['check_in'], query['check_out'],
+                                              query['people'], query['rooms']))
+        if bundle is not None and time.time() - bundle.built_at > self.max_age:
+            bundle = None
+        metrics.record_cache('recommendation_bundle', hit=bundle is not None)
+        return bundle
+
+    def planned_searches(self, destinations: Iterable[str]) -> List[Tuple]:
+        """
+        Searches to bundle for the destinations, as (destination, check-in,
+        check-out, people, rooms): each check-in day ahead, stay length and
+        party size, nearest check-in first
+        """
+        destinations = list(destinations)
+        today = timezone.localdate()
+        searches = []
+        for offset in range(1, self.checkin_days + 1):
+            check_in = today + timedelta(days=offset)
+            for nights in self.stay_nights:
+                check_out = check_in + timedelta(days=nights)
+                for people in self.party_sizes:
+                    for destination in destinations:
+                        searches.append((destination, check_in.isoformat(), check_out.isoformat(), people, 1))
+        return searches
+
+    def refresh(self, destinations: Optional[Iterable[str]] = None) -> int:
+        """
+        Rebuild bundles and swap them in; returns the number built.
+
+        Without `destinations` the whole store is rebuilt for the popular and
+        trending destinations, dropping past dates; otherwise the given
+        destinations' bundles are added to the current ones.
+        """
+        from .services import TravelRecommendationService
+        service = TravelRecommendationService()
+        current = self._bundles
+        built = {}
+        searches = self.planned_searches(bundle_destinations() if destinations is None else destinations)
+        if service.api_mode != 'mock':
+            searches = searches[:max(self.live_max_bundles, 0)]
+        for search in searches:
+            key = bundle_key(*search)
+            try:
+                sections, transports = service.precompute_sections(*search, origins=self.origins)
+                built[key] = RecommendationBundle(key, sections, transports)
+            except Exception as e:
+                print(f"Recommendation bundle {search} failed: {e}")
+                if key in current:
+                    built[key] = current[key]
+
+        with self._lock:
+            self._bundles = built if destinations is None else {**self._bundles, **built}
+        return len(built)
+
+    def start(self):
+        """
+        Start the refresher thread once (no-op when BUNDLE_REFRESH_INTERVAL is 0
+        or nothing is built); called from RecommendationsConfig.ready()
+        """
+        if self._refresher is not None or self.refresh_interval <= 0:
+            return
+        if getattr(settings, 'API_MODE', 'mock') != 'mock' and self.live_max_bundles <= 0:
+            return
+        with self._lock:
+            if self._refresher is None:
+                self._refresher = threading.Thread(target=self._run, name='bundle-refresh', daemon=True)
+                self._refresher.start()
+
+    def _run(self):
+        while True:
+            start = time.perf_counter()
+            try:
+                self.refresh()
+            except Exception as e:
+                print(f"Recommendation bundle refresh failed: {e}")
+            finally:
+                # The refresher thread opens its own database connection
+                connections.close_all()
+            metrics.observe('bundle_refresh_duration_seconds', time.perf_counter() - start)
+            time.sleep(self.refresh_interval)
+
+
+recommendation_bundles = BundleStore(
+    refresh_interval=getattr(settings, 'BUNDLE_REFRESH_INTERVAL', 900),
+    max_age=getattr(settings, 'BUNDLE_MAX_AGE', 1800),
+    stay_nights=getattr(settings, 'BUNDLE_STAY_NIGHTS', (6,)),
+    checkin_days=getattr(settings, 'BUNDLE_CHECKIN_DAYS', 7),
+    party_sizes=getattr(settings, 'BUNDLE_PARTY_SIZES', (2,)),
+    origins=getattr(settings, 'BUNDLE_ORIGINS', ('',)),
+    live_max_bundles=getattr(settings, 'BUNDLE_LIVE_MAX_BUNDLES', 0),
+)
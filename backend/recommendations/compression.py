@@ -0,0 +1,94 @@
+"""
+Response compression.
+
+CompressionMiddleware compresses response bodies of at least
+COMPRESSION_MIN_BYTES with Brotli (when the `brotli` package is installed
+and the client accepts it) or gzip. Streaming responses such as the
+Server-Sent Events search are left alone so every event is flushed as soon
+as it is produced; small bodies aren't worth the CPU.
+
+Only API payloads (COMPRESSIBLE_TYPES) are compressed. HTML pages such as the
+admin echo request input next to CSRF tokens, which compression would expose
+to BREACH-style length attacks; gzip output also gets the same random
+padding as Django's GZipMiddleware.
+"""
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+
+from . import metrics
+
+try:
+    import brotli
+except ImportError:  # Optional: gzip only
+    brotli = None
+
+
+BROTLI_QUALITY = 5  # good ratio for JSON at a fraction of the max-quality cost
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/plain')
+
+# As django.middleware.gzip.GZipMiddleware: vary the length of equal payloads
+MAX_RANDOM_BYTES = 100
+
+
+def accepted_encoding(accept_encoding: str):
+    """'br' or 'gzip' (in that preference) if the Accept-Encoding header allows it, else None"""
+    weights = {}
+    for part in accept_encoding.split(','):
+        name, _, params = part.partition(';')
+        params = params.strip().lower()
+        try:
+            weights[name.strip().lower()] = float(params[2:]) if params.startswith('q=') else 1.0
+        except ValueError:
+            weights[name.strip().lower()] = 0.0
+    default = weights.get('*', 0.0)
+    if brotli is not None and weights.get('br', default) > 0:
+        return 'br'
+    if weights.get('gzip', default) > 0:
+        return 'gzip'
+    return None
+
+
+class CompressionMiddleware:
+    """Brotli / gzip for non-streaming API responses above a size threshold"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.min_bytes = getattr(settings, 'COMPRESSION_MIN_BYTES', 1024)
+
+    def __call__(self, request):
+        response = self.get_response(request)
+
+        if response.streaming or response.has_header('Content-Encoding'):
+            return response
+        if len(response.content) < self.min_bytes:
+            return response
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if content_type not in COMPRESSIBLE_TYPES:
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = accepted_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+
+        if encoding == 'br':
+            compressed = brotli.compress(response.content, quality=BROTLI_QUALITY)
+        else:
+            compressed = compress_string(response.content, max_random_bytes=MAX_RANDOM_BYTES)
+        if len(compressed) >= len(response.content):
+            return response
+
+        metrics.inc('compressed_responses_total', {'encoding': encoding})
+        metrics.inc('compression_saved_bytes_total', {'encoding': encoding},
+                    len(response.content) - len(compressed))
+        response.content = compressed
+        response.headers['Content-Length'] = str(len(compressed))
+        response.headers['Content-Encoding'] = encoding
+        # The body now differs byte-for-byte from the uncompressed one
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response.headers['ETag'] = 'W/' + etag
+        return response
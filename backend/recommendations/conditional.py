@@ -0,0 +1,143 @@
+"""
+Conditional GET for catalog endpoints.
+
+@conditional_get validates a viewset action against one aggregate query over
+the queryset it serves - row count and the latest `updated_at` of the rows
+and of the related rows the serializer nests - instead of rendering the
+response and hashing it. When the client's If-None-Match / If-Modified-Since
+still match, the action is skipped and a 304 is returned before any
+serialization; otherwise the response carries ETag and Last-Modified.
+
+Changes made with QuerySet.update() don't touch auto_now fields and are only
+seen once another save() bumps `updated_at`. Actions with a cheaper source of
+truth (e.g. a prebuilt payload's fingerprint) can supply their own validators.
+
+Keyset-paged lists use ConditionalPageMixin instead: an aggregate over the
+whole filtered catalog would scan every row on every page, so they validate
+the fetched page's rows (ids and timestamps, no extra query) and only skip
+serialization.
+"""
+
+import hashlib
+from functools import wraps
+from typing import Callable, Optional
+
+from django.db.models import Count, Max
+from django.utils.cache import get_conditional_response, patch_cache_control, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+
+from . import metrics
+
+
+def request_etag(request, *parts: str) -> str:
+    """Strong ETag for `parts`, specific to the request's full path and Accept header"""
+    fingerprint = '|'.join([request.get_full_path(), request.META.get('HTTP_ACCEPT', ''), *parts])
+    return quote_etag(hashlib.sha1(fingerprint.encode()).hexdigest())
+
+
+def catalog_validators(request, queryset, timestamp_fields=('updated_at',)):
+    """
+    (etag, last_modified) for a GET of `queryset`, from one aggregate query.
+
+    The ETag also covers the full path (filters, page) and the Accept header,
+    since they select different representations of the same rows.
+    """
+    aggregates = {f'max_{i}': Max(field) for i, field in enumerate(timestamp_fields)}
+    stats = queryset.order_by().aggregate(rows=Count('pk', distinct=True), **aggregates)
+    stamps = [stats[key] for key in aggregates if stats[key] is not None]
+    last_modified = max(stamps) if stamps else None
+
+    etag = request_etag(request, str(stats['rows']), *(stamp.isoformat() for stamp in stamps))
+    return etag, last_modified
+
+
+def conditional_get(
+    queryset: Optional[Callable] = None,
+    timestamp_fields=('updated_at',),
+    validators: Optional[Callable] = None
+):
+    """
+    Decorator for viewset GET actions: 304 when the served rows haven't changed.
+
+    Args:
+        queryset: view -> queryset the action serves
+            (default: the view's filtered get_queryset())
+        timestamp_fields: updated_at fields of the rows and of nested related rows
+        validators: (view, request) -> (etag, last_modified or None), used
+            instead of the aggregate query over `queryset`
+    """
+    def decorator(action):
+        @wraps(action)
+        def wrapper(self, request, *args, **kwargs):
+            if validators is not None:
+                etag, last_modified = validators(self, request)
+            else:
+                rows = queryset(self) if queryset else self.filter_queryset(self.get_queryset())
+                etag, last_modified = catalog_validators(request, rows, timestamp_fields)
+            return conditional_response(request, etag, last_modified,
+                                        lambda: action(self, request, *args, **kwargs))
+        return wrapper
+    return decorator
+
+
+def conditional_response(request, etag: str, last_modified, render: Callable):
+    """304 if the client's validators match, else render() with ETag / Last-Modified set"""
+    timestamp = int(last_modified.timestamp()) if last_modified else None
+
+    response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+    if response is not None:
+        metrics.inc('conditional_get_total', {'outcome': 'not_modified'})
+    else:
+        metrics.inc('conditional_get_total', {'outcome': 'rendered'})
+        response = render()
+        if response.status_code != 200:
+            return response
+
+    response.headers.setdefault('ETag', etag)
+    if timestamp is not None:
+        response.headers.setdefault('Last-Modified', http_date(timestamp))
+    # Let clients keep the payload but revalidate it on every use
+    patch_cache_control(response, no_cache=True)
+    patch_vary_headers(response, ('Accept',))
+    return response
+
+
+def page_validators(request, rows, timestamp_fields=('updated_at',), count=None):
+    """(etag, last_modified) for one fetched page, from the rows already in memory"""
+    parts, stamps = [], []
+    for row in rows:
+        parts.append(str(row.pk))
+        for field in timestamp_fields:
+            value = row
+            for attr in field.split('__'):
+                value = getattr(value, attr, None) if value is not None else None
+            if value is not None:
+                parts.append(value.isoformat())
+                stamps.append(value)
+    if count is not None:
+        parts.append(f'count={count}')
+    return request_etag(request, *parts), max(stamps) if stamps else None
+
+
+class ConditionalPageMixin:
+    """
+    Conditional GET for paginated list() validated against the requested page.
+
+    The page query runs either way (it's one keyset seek); a match only skips
+    serialization and rendering. Nested rows in `page_timestamp_fields` must
+    be select_related by get_queryset().
+    """
+    page_timestamp_fields = ('updated_at',)
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is None:
+            return super().list(request, *args, **kwargs)
+        etag, last_modified = page_validators(
+            request, page, self.page_timestamp_fields, getattr(self.paginator, 'count', None)
+        )
+        return conditional_response(
+            request, etag, last_modified,
+            lambda: self.get_paginated_response(self.get_serializer(page, many=True).data)
+        )
@@ -0,0 +1,59 @@
+"""
+Prebuilt /api/packages/featured/ payloads.
+
+The featured listing nests every package's hotels, transports and attractions,
+which costs a query per M2M table. It is serialized once per pricing variant
+(the people / nights / rooms parameters the nested serializers price with)
+and kept in the Django cache until the receivers in signals.py see a package,
+a related row or an M2M link change. Invalidation replaces a version key
+instead of deleting every variant. FEATURED_CACHE_TTL bounds how long changes
+that send no signals (queryset.update(), bulk_create()) stay unseen.
+
+With the default local-memory cache each worker process keeps its own copy and
+only sees its own invalidations; configure a shared CACHES backend when
+running several processes.
+"""
+
+import hashlib
+import json
+import uuid
+from typing import Callable, Dict, List, Tuple
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import metrics
+
+
+VERSION_KEY = 'featured_packages:version'
+
+
+def _version() -> str:
+    version = cache.get(VERSION_KEY)
+    if version is None:
+        cache.add(VERSION_KEY, uuid.uuid4().hex, None)
+        version = cache.get(VERSION_KEY)
+    return version
+
+
+def invalidate_featured(**kwargs):
+    """Drop every cached featured payload (usable as a signal receiver)"""
+    cache.set(VERSION_KEY, uuid.uuid4().hex, None)
+
+
+def get_featured(variant: Tuple, build: Callable[[], List]) -> Dict:
+    """
+    The cached {'data', 'fingerprint'} for a pricing variant, built on a miss.
+
+    The fingerprint is a hash of the data, so it's stable across rebuilds and
+    processes and can back an ETag.
+    """
+    key = ':'.join(['featured_packages', _version(), *map(str, variant)])
+    entry = cache.get(key)
+    metrics.record_cache('featured_packages', hit=entry is not None)
+    if entry is None:
+        data = json.loads(json.dumps(build(), default=str))
+        fingerprint = hashlib.sha1(json.dumps(data, sort_keys=True).encode()).hexdigest()
+        entry = {'data': data, 'fingerprint': fingerprint}
+        cache.set(key, entry, getattr(settings, 'FEATURED_CACHE_TTL', 300))
+    return entry
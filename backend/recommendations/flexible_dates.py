@@ -0,0 +1,86 @@
+"""
+Cheapest stay windows over a date range.
+
+A flexible-date search prices every window of `nights` consecutive nights
+inside a range. Overlapping windows share most of their nights, so each
+hotel's price is fetched once per night into a (hotels x nights) matrix and
+every window total comes from the difference of two prefix sums: all
+windows cost one cumulative sum instead of one search per window.
+"""
+
+from datetime import date, timedelta
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+
+def night_dates(date_from: date, date_to: date) -> List[date]:
+    """Every night in [date_from, date_to) (the last check-out is date_to)"""
+    return [date_from + timedelta(days=i) for i in range((date_to - date_from).days)]
+
+
+def nightly_price_matrix(hotels_by_night: List[List[Dict]]) -> Tuple[List[Dict], np.ndarray]:
+    """
+    Line up per-night hotel lists into one price matrix.
+
+    Hotels are matched across nights by name (offer ids are positional and
+    change from one night to the next).
+
+    Returns:
+        (hotels, prices): the first listing seen of each hotel, and a
+        (len(hotels), nights) array of nightly prices with NaN where a hotel
+        has no price for that night.
+    """
+    index: Dict[str, int] = {}
+    hotels: List[Dict] = []
+    cells = []
+    for night, listing in enumerate(hotels_by_night):
+        for hotel in listing:
+            price = hotel.get('price_per_night')
+            if price is None:
+                continue
+            row = index.get(hotel['name'])
+            if row is None:
+                row = index[hotel['name']] = len(hotels)
+                hotels.append(hotel)
+            cells.append((row, night, price))
+
+    prices = np.full((len(hotels), len(hotels_by_night)), np.nan)
+    if cells:
+        rows, nights, values = zip(*cells)
+        prices[list(rows), list(nights)] = values
+    return hotels, prices
+
+
+def window_sums(prices: np.ndarray, nights: int) -> np.ndarray:
+    """
+    Total price of every `nights`-night window for every row.
+
+    Column s of the result is the stay checking in on night s; a window with
+    any unpriced night is NaN.
+    """
+    count = prices.shape[1] - nights + 1
+    if count <= 0:
+        return np.empty((prices.shape[0], 0))
+    zero = np.zeros((prices.shape[0], 1))
+    totals = np.cumsum(np.hstack([zero, np.nan_to_num(prices, nan=0.0)]), axis=1)
+    missing = np.cumsum(np.hstack([zero, np.isnan(prices)]), axis=1)
+    sums = totals[:, nights:] - totals[:, :count]
+    sums[(missing[:, nights:] - missing[:, :count]) > 0] = np.nan
+    return sums
+
+
+def cheapest_per_window(sums: np.ndarray) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Cheapest row for every window column.
+
+    Returns:
+        (totals, rows): the lowest window total (NaN when no row covers the
+        window) and the row that has it (-1 when none does)
+    """
+    if not sums.size:
+        return np.full(sums.shape[1], np.nan), np.full(sums.shape[1], -1)
+    available = ~np.isnan(sums).all(axis=0)
+    rows = np.where(available, np.argmin(np.where(np.isnan(sums), np.inf, sums), axis=0), -1)
+    totals = np.where(available, sums[np.maximum(rows, 0), np.arange(sums.shape[1])], np.nan)
+    return totals, rows
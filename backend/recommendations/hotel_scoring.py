@@ -0,0 +1,122 @@
+"""
+Columnar hotel preference scoring.
+
+HotelColumns converts a hotel list once into NumPy arrays (price, rating,
+stars and a packed amenity bitmask over the amenities seen in the list). The
+preference rules - price band, rating bonus, amenity overlap and star
+alignment - are then evaluated as array operations, so ranking a large
+candidate list costs one pass over the dicts plus a few vectorized steps.
+The conversion is most of that cost, so callers that rank the same hotels
+more than once (several preferences, repeated limits) build the HotelColumns
+once and pass it to rank_hotels() instead of the list.
+
+Scores are computed with the same operations in the same order as the
+per-hotel rules they replace, so rankings (including tie order) are identical.
+"""
+
+from itertools import chain
+from typing import Dict, Iterable, List, Optional, Union
+
+import numpy as np
+
+
+PRICE_MATCH_SCORE = 50
+BELOW_RANGE_SCORE = 30
+ABOVE_RANGE_SCORE = 20
+ABOVE_RANGE_STEP = 50  # one point lost per this much above the range
+RATING_WEIGHT = 5
+AMENITY_WEIGHT = 5
+
+# hotel preference -> (min stars, max stars, bonus)
+STAR_BONUSES = {
+    'luxury': (5, np.inf, 20),
+    'boutique': (3, 4, 15),
+    'mid-range': (3, 4, 15),
+    'budget': (-np.inf, 3, 15),
+    'hostel': (-np.inf, 2, 15),
+}
+
+BIT_COUNTS = np.array([bin(byte).count('1') for byte in range(256)], dtype=np.uint8)
+
+
+class HotelColumns:
+    """Column arrays for a list of hotel dicts"""
+
+    def __init__(self, hotels: List[Dict]):
+        self.hotels = hotels
+        count = len(hotels)
+        self.price = np.fromiter(((h.get('price_per_night', 0) or 0) for h in hotels), dtype=float, count=count)
+        self.rating = np.fromiter(((h.get('rating', 0) or 0) for h in hotels), dtype=float, count=count)
+        self.stars = np.fromiter(
+            ((h.get('stars', 3) or h.get('star_rating', 3) or 3) for h in hotels), dtype=float, count=count
+        )
+
+        # One bit per distinct amenity, packed 8 per byte
+        amenity_lists = [h.get('amenities', []) or () for h in hotels]
+        flat = list(chain.from_iterable(amenity_lists))
+        self.amenity_index: Dict[str, int] = {a: bit for bit, a in enumerate(dict.fromkeys(flat))}
+        rows = np.repeat(np.arange(count), np.fromiter(map(len, amenity_lists), dtype=np.intp, count=count))
+        bits = np.fromiter(map(self.amenity_index.__getitem__, flat), dtype=np.intp, count=len(flat))
+        membership = np.zeros((count, len(self.amenity_index)), dtype=bool)
+        membership[rows, bits] = True
+        self.amenity_bits = np.packbits(membership, axis=1)
+
+    def __len__(self) -> int:
+        return len(self.hotels)
+
+    def amenity_matches(self, amenities: Iterable[str]) -> np.ndarray:
+        """Number of the given amenities each hotel offers"""
+        mask = np.zeros(len(self.amenity_index), dtype=bool)
+        mask[[self.amenity_index[a] for a in set(amenities) if a in self.amenity_index]] = True
+        if not mask.any():
+            return np.zeros(len(self), dtype=int)
+        packed = np.packbits(mask)
+        used = np.flatnonzero(packed)
+        overlap = self.amenity_bits[:, used] & packed[used]
+        return BIT_COUNTS[overlap].sum(axis=1, dtype=int)
+
+    def score(self, hotel_preference: str, hotel_pref_config: Dict) -> np.ndarray:
+        """Preference match score of every hotel (higher is better)"""
+        price_min, price_max = hotel_pref_config.get('price_range', (0, 1000))
+        price = self.price
+
+        above = ABOVE_RANGE_SCORE - (price - price_max) / ABOVE_RANGE_STEP
+        score = np.where(
+            (price_min <= price) & (price <= price_max), PRICE_MATCH_SCORE,
+            np.where(price < price_min, BELOW_RANGE_SCORE, np.where(above > 0, above, 0))
+        ).astype(float)
+
+        score += self.rating * RATING_WEIGHT
+        score += self.amenity_matches(hotel_pref_config.get('amenities', []) or []) * AMENITY_WEIGHT
+
+        if hotel_preference in STAR_BONUSES:
+            low, high, bonus = STAR_BONUSES[hotel_preference]
+            score += np.where((low <= self.stars) & (self.stars <= high), bonus, 0)
+        return score
+
+
+def rank_hotels(
+    hotels: Union[List[Dict], HotelColumns],
+    hotel_preference: str,
+    hotel_pref_config: Dict,
+    limit: Optional[int] = None
+) -> List[Dict]:
+    """
+    Hotels ordered by preference score, best first; ties keep their input order.
+    Only the `limit` best are returned when a limit is given.
+
+    `hotels` may be a prebuilt HotelColumns, which is reused as is.
+    """
+    if not len(hotels) or (limit is not None and limit <= 0):
+        return []
+    columns = hotels if isinstance(hotels, HotelColumns) else HotelColumns(hotels)
+    hotels = columns.hotels
+    scores = columns.score(hotel_preference, hotel_pref_config)
+
+    candidates = np.arange(len(scores))
+    if limit is not None and limit < len(scores):
+        # Everything scoring at least the limit-th best score, still in input order
+        threshold = np.partition(scores, len(scores) - limit)[len(scores) - limit]
+        candidates = np.flatnonzero(scores >= threshold)
+    order = candidates[np.argsort(-scores[candidates], kind='stable')][:limit]
+    return [hotels[i] for i in order]
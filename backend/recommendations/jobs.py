@@ -0,0 +1,170 @@
+"""
+Background plan-generation jobs.
+
+PlanJobQueue runs slow planner work on a small local thread pool so the HTTP
+request can return a job id right away. Identical inputs share one job while
+it is queued or running; once it has finished, the same inputs start a new
+job, so a retained result (and the saved plan it points to) is only handed to
+the client that submitted it. The number of unfinished jobs is bounded, and
+finished jobs are evicted PLANNER_JOB_TTL seconds after completion.
+
+Jobs live in the memory of the process that accepted them, so with several
+worker processes polls must reach the same process (or run a single one).
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Optional
+
+from django.conf import settings
+from django.db import connections
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+QUEUED = 'queued'
+RUNNING = 'running'
+SUCCEEDED = 'succeeded'
+FAILED = 'failed'
+
+# Reported to clients instead of the exception text, which is only logged
+JOB_FAILED_MESSAGE = 'Plan generation failed'
+
+
+class QueueFull(Exception):
+    """Too many unfinished jobs to accept another one"""
+
+
+class PlanJob:
+    """State of one background job, as reported to pollers"""
+
+    def __init__(self, key: str):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = QUEUED
+        self.stage = 'queued'
+        self.progress = 0
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.finished_at = None
+
+    @property
+    def finished(self) -> bool:
+        return self.status in (SUCCEEDED, FAILED)
+
+    def report(self, stage: str, progress: int):
+        """Progress callback handed to the job function"""
+        self.stage = stage
+        self.progress = progress
+
+    def to_dict(self) -> Dict:
+        data = {
+            'job_id': self.id,
+            'status': self.status,
+            'stage': self.stage,
+            'progress': self.progress,
+            'created_at': self.created_at,
+            'finished_at': self.finished_at,
+        }
+        if self.status == SUCCEEDED:
+            data['result'] = self.result
+        elif self.status == FAILED:
+            data['error'] = self.error
+        return data
+
+
+def job_key(kind: str, params: Dict) -> str:
+    """Deduplication key: identical parameters give the same key"""
+    payload = json.dumps([kind, params], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class PlanJobQueue:
+    """Bounded local worker pool with job deduplication and TTL retention"""
+
+    def __init__(self, max_workers: int = 4, max_pending: int = 32, ttl: float = 600):
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._jobs: Dict[str, PlanJob] = {}
+        self._by_key: Dict[str, PlanJob] = {}
+        self._executor = None
+
+    def submit(self, key: str, func: Callable[[Callable[[str, int], None]], Dict]) -> PlanJob:
+        """
+        Run func(report) in the background, or return the unfinished job for the same key.
+
+        Raises:
+            QueueFull: If max_pending jobs are already queued or running
+        """
+        with self._lock:
+            self._evict_expired()
+            existing = self._by_key.get(key)
+            if existing is not None and not existing.finished:
+                metrics.inc('planner_jobs_total', {'outcome': 'deduplicated'})
+                return existing
+            if sum(1 for job in self._jobs.values() if not job.finished) >= self.max_pending:
+                metrics.inc('planner_jobs_total', {'outcome': 'rejected'})
+                raise QueueFull()
+
+            job = PlanJob(key)
+            self._jobs[job.id] = job
+            self._by_key[key] = job
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='plan-job')
+            self._executor.submit(self._run, job, func)
+            metrics.inc('planner_jobs_total', {'outcome': 'submitted'})
+            return job
+
+    def get(self, job_id: str) -> Optional[PlanJob]:
+        with self._lock:
+            self._evict_expired()
+            return self._jobs.get(job_id)
+
+    def _run(self, job: PlanJob, func):
+        job.status, job.stage = RUNNING, 'started'
+        start = time.perf_counter()
+        result, succeeded = None, False
+        try:
+            result = func(job.report)
+            succeeded = True
+        except Exception:
+            logger.exception("Plan job %s failed", job.id)
+        finally:
+            # finished_at is set with the status, so eviction never sees a finished job without it
+            with self._lock:
+                job.finished_at = time.time()
+                if succeeded:
+                    job.result = result
+                    job.status, job.stage, job.progress = SUCCEEDED, 'done', 100
+                else:
+                    job.error = JOB_FAILED_MESSAGE
+                    job.status, job.stage = FAILED, 'failed'
+            metrics.inc('planner_jobs_total', {'outcome': job.status})
+            metrics.observe('planner_job_duration_seconds', time.perf_counter() - start)
+            # Worker threads open their own database connections
+            connections.close_all()
+
+    def _evict_expired(self):
+        cutoff = time.time() - self.ttl
+        expired = [job for job in self._jobs.values() if job.finished and job.finished_at < cutoff]
+        for job in expired:
+            del self._jobs[job.id]
+            if self._by_key.get(job.key) is job:
+                del self._by_key[job.key]
+
+
+plan_jobs = PlanJobQueue(
+    max_workers=getattr(settings, 'PLANNER_JOB_WORKERS', 4),
+    max_pending=getattr(settings, 'PLANNER_JOB_MAX_PENDING', 32),
+    ttl=getattr(settings, 'PLANNER_JOB_TTL', 600),
+)
@@ -0,0 +1,42 @@
+"""
+Management command to recompute the stored TravelPackage.discounted_price.
+save() keeps it current; run this after changing prices with queryset.update(),
+bulk_create() or raw SQL.
+Run with: python manage.py backfill_discounted_prices
+"""
+
+from django.core.management.base import BaseCommand
+from django.db.models import Max, Min
+from django.db.models.functions import Now
+
+from recommendations.featured import invalidate_featured
+from recommendations.models import TravelPackage, discounted_price_expression
+
+
+class Command(BaseCommand):
+    help = 'Recompute stored discounted prices of travel packages in id-range batches'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=10000,
+            help='Packages updated per UPDATE statement'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        bounds = TravelPackage.objects.aggregate(low=Min('pk'), high=Max('pk'))
+        if bounds['low'] is None:
+            self.stdout.write(self.style.SUCCESS('No travel packages'))
+            return
+
+        expression = discounted_price_expression()
+        updated = 0
+        for start in range(bounds['low'], bounds['high'] + 1, batch_size):
+            # Only stale rows, and bump updated_at so conditional GETs see the change
+            updated += TravelPackage.objects.filter(
+                pk__gte=start, pk__lt=start + batch_size
+            ).exclude(discounted_price=expression).update(discounted_price=expression, updated_at=Now())
+
+        if updated:
+            invalidate_featured()
+        self.stdout.write(self.style.SUCCESS(f'Updated {updated} discounted prices'))
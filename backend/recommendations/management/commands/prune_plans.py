@@ -0,0 +1,27 @@
+"""
+Management command to delete saved plans past their retention period.
+Run with: python manage.py prune_plans
+"""
+
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recommendations.models import SavedPlan
+
+
+class Command(BaseCommand):
+    help = 'Delete saved travel plans that are no longer editable'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=getattr(settings, 'PLAN_RETENTION_DAYS', 7),
+            help='Delete plans not updated for this many days'
+        )
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(days=options['days'])
+        deleted, _ = SavedPlan.objects.filter(updated_at__lt=cutoff).delete()
+        self.stdout.write(self.style.SUCCESS(f'Deleted {deleted} saved plans'))
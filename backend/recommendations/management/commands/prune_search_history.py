@@ -0,0 +1,54 @@
+"""
+Management command to apply the search history retention policy.
+Run with: python manage.py prune_search_history [--archive searches.jsonl.gz]
+"""
+
+import gzip
+import json
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.core.serializers.json import DjangoJSONEncoder
+
+from recommendations.analytics import prune_hourly_rollups, prune_search_history
+
+
+class Command(BaseCommand):
+    help = 'Delete rolled-up raw searches and hourly rollups past their retention period'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--days', type=int, default=getattr(settings, 'SEARCH_HISTORY_RETENTION_DAYS', 30),
+            help='Delete raw searches older than this many days'
+        )
+        parser.add_argument(
+            '--hourly-days', type=int, default=getattr(settings, 'SEARCH_ROLLUP_HOURLY_RETENTION_DAYS', 90),
+            help='Delete hourly rollups older than this many days'
+        )
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Rows deleted per transaction'
+        )
+        parser.add_argument(
+            '--archive',
+            help='Append deleted searches to this JSON-lines file (gzipped if it ends in .gz)'
+        )
+
+    def handle(self, *args, **options):
+        batch_size = max(1, options['batch_size'])
+        archive = None
+        if options['archive']:
+            path = options['archive']
+            archive = gzip.open(path, 'at') if path.endswith('.gz') else open(path, 'a')
+
+        def write(rows):
+            archive.writelines(json.dumps(row, cls=DjangoJSONEncoder) + '\n' for row in rows)
+            archive.flush()
+
+        try:
+            searches = prune_search_history(options['days'], batch_size, write if archive else None)
+        finally:
+            if archive:
+                archive.close()
+        rollups = prune_hourly_rollups(options['hourly_days'], batch_size)
+        self.stdout.write(self.style.SUCCESS(f'Deleted {searches} searches and {rollups} hourly rollups'))
@@ -0,0 +1,26 @@
+"""
+Management command to fold new search history into the hourly and daily rollups.
+Run with: python manage.py rollup_searches (e.g. from cron every few minutes)
+"""
+
+from django.core.management.base import BaseCommand
+
+from recommendations.analytics import rollup_searches
+
+
+class Command(BaseCommand):
+    help = 'Add searches logged since the last run to the search rollups'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=5000,
+            help='Search history rows folded in per transaction'
+        )
+        parser.add_argument(
+            '--settle-seconds', type=int, default=None,
+            help='Only roll up searches at least this old (default: SEARCH_ROLLUP_SETTLE_SECONDS)'
+        )
+
+    def handle(self, *args, **options):
+        processed = rollup_searches(batch_size=max(1, options['batch_size']), settle_seconds=options['settle_seconds'])
+        self.stdout.write(self.style.SUCCESS(f'Rolled up {processed} searches'))
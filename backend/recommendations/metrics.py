@@ -0,0 +1,319 @@
+"""
+Prometheus-compatible metrics for the travel API.
+
+Metrics are collected in-process with a single lock and plain dicts, so
+recording a sample costs a dict lookup and an addition. When several worker
+processes serve the API (e.g. gunicorn), set METRICS_MULTIPROC_DIR to a
+directory shared by the workers: each process periodically writes a snapshot
+of its own metrics there and /api/metrics/ merges all snapshots on scrape.
+A process removes its snapshot when it exits; snapshots left behind by
+processes that died without cleaning up (crashes, old deploys) are skipped
+and deleted on scrape.
+
+/api/metrics/ is only served to staff users and to METRICS_ALLOWED_IPS.
+"""
+
+import atexit
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from typing import Dict, List, Optional, Tuple
+
+from django.conf import settings
+from django.db import connection
+from rest_framework.permissions import BasePermission
+
+
+PREFIX = 'travel_api_'
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# name -> (type, help text, histogram buckets)
+METRIC_DEFINITIONS = {
+    'http_requests_total': (
+        'counter', 'HTTP requests by endpoint, method and status code', None),
+    'http_request_duration_seconds': (
+        'histogram', 'HTTP request latency by endpoint', LATENCY_BUCKETS),
+    'db_queries_per_request': (
+        'histogram', 'Database queries executed per HTTP request', QUERY_COUNT_BUCKETS),
+    'db_time_per_request_seconds': (
+        'histogram', 'Total database time spent per HTTP request', LATENCY_BUCKETS),
+    'query_budget_exceeded_total': (
+        'counter', 'Requests over their query budget by endpoint and reason', None),
+    'amadeus_requests_total': (
+        'counter', 'Calls made to the Amadeus API by endpoint and outcome', None),
+    'amadeus_request_duration_seconds': (
+        'histogram', 'Amadeus API call latency by endpoint', LATENCY_BUCKETS),
+    'mock_fallback_total': (
+        'counter', 'Times a real data source fell back to mock data', None),
+    'cache_requests_total': (
+        'counter', 'Cache lookups by cache name and result (hit/miss)', None),
+    'planner_jobs_total': (
+        'counter', 'Background plan jobs by outcome', None),
+    'planner_job_duration_seconds': (
+        'histogram', 'Run time of background plan jobs', LATENCY_BUCKETS),
+    'conditional_get_total': (
+        'counter', 'Conditional catalog GETs by outcome (not_modified/rendered)', None),
+    'compressed_responses_total': (
+        'counter', 'Responses compressed by encoding', None),
+    'compression_saved_bytes_total': (
+        'counter', 'Response bytes saved by compression, by encoding', None),
+    'bundle_refresh_duration_seconds': (
+        'histogram', 'Run time of a full recommendation bundle refresh', LATENCY_BUCKETS),
+}
+
+LabelSet = Tuple[Tuple[str, str], ...]
+
+
+def _label_key(labels: Optional[Dict[str, str]]) -> LabelSet:
+    if not labels:
+        return ()
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class MetricsRegistry:
+    """Thread-safe in-process store of counters and histograms"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[Tuple[str, LabelSet], float] = {}
+        # Histogram values are [bucket_1, ..., bucket_n, +Inf, sum]
+        self._histograms: Dict[Tuple[str, LabelSet], List[float]] = {}
+        self._last_flush = 0.0
+        self._snapshot_path = None
+
+    def inc(self, name: str, labels: Optional[Dict[str, str]] = None, value: float = 1):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, labels: Optional[Dict[str, str]] = None):
+        buckets = METRIC_DEFINITIONS[name][2]
+        key = (name, _label_key(labels))
+        index = bisect_left(buckets, value)
+        with self._lock:
+            values = self._histograms.get(key)
+            if values is None:
+                values = self._histograms[key] = [0] * (len(buckets) + 2)
+            values[index] += 1
+            values[-1] += value
+
+    def snapshot(self) -> Dict[str, list]:
+        """Return a JSON-serializable copy of the current values"""
+        with self._lock:
+            return {
+                'counters': [[name, list(labels), value]
+                             for (name, labels), value in self._counters.items()],
+                'histograms': [[name, list(labels), list(values)]
+                               for (name, labels), values in self._histograms.items()],
+            }
+
+    def maybe_flush(self, force: bool = False):
+        """Write this process's snapshot to the shared directory, if configured"""
+        directory = getattr(settings, 'METRICS_MULTIPROC_DIR', '')
+        if not directory:
+            return
+        now = time.monotonic()
+        interval = getattr(settings, 'METRICS_FLUSH_INTERVAL', 5)
+        if not force and now - self._last_flush < interval:
+            return
+        self._last_flush = now
+
+        os.makedirs(directory, exist_ok=True)
+        path = os.path.join(directory, f'metrics_{os.getpid()}.json')
+        tmp_path = f'{path}.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(self.snapshot(), f)
+        os.replace(tmp_path, path)
+        if self._snapshot_path != path:
+            # First flush in this process (a forked worker inherits its parent's registry)
+            self._snapshot_path = path
+            atexit.register(_remove_file, path)
+
+    def collect(self) -> List[Dict[str, list]]:
+        """Gather snapshots from every worker process (or just this one)"""
+        directory = getattr(settings, 'METRICS_MULTIPROC_DIR', '')
+        if not directory:
+            return [self.snapshot()]
+
+        self.maybe_flush(force=True)
+        snapshots = []
+        for filename in os.listdir(directory):
+            if not (filename.startswith('metrics_') and filename.endswith('.json')):
+                continue
+            path = os.path.join(directory, filename)
+            if not _process_alive(filename[len('metrics_'):-len('.json')]):
+                _remove_file(path)
+                continue
+            try:
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue  # File is being replaced by its worker
+        return snapshots
+
+
+def _process_alive(pid: str) -> bool:
+    try:
+        os.kill(int(pid), 0)
+    except (ValueError, ProcessLookupError):
+        return False
+    except PermissionError:
+        return True  # Exists, owned by another user
+    return True
+
+
+def _remove_file(path: str):
+    try:
+        os.remove(path)
+    except OSError:
+        pass
+
+
+def _format_labels(labels, extra: Optional[Tuple[str, str]] = None) -> str:
+    pairs = [tuple(pair) for pair in labels]
+    if extra:
+        pairs.append(extra)
+    if not pairs:
+        return ''
+    body = ','.join('{}="{}"'.format(k, v.replace('\\', '\\\\').replace('"', '\\"'))
+                    for k, v in pairs)
+    return '{' + body + '}'
+
+
+def _format_value(value: float) -> str:
+    return str(int(value)) if float(value).is_integer() else repr(float(value))
+
+
+def render(snapshots: List[Dict[str, list]]) -> str:
+    """Merge snapshots and render them in the Prometheus text format (0.0.4)"""
+    counters: Dict[Tuple[str, LabelSet], float] = {}
+    histograms: Dict[Tuple[str, LabelSet], List[float]] = {}
+
+    for snapshot in snapshots:
+        for name, labels, value in snapshot.get('counters', []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            counters[key] = counters.get(key, 0) + value
+        for name, labels, values in snapshot.get('histograms', []):
+            key = (name, tuple(tuple(pair) for pair in labels))
+            merged = histograms.get(key)
+            if merged is None or len(merged) != len(values):
+                histograms[key] = list(values)
+            else:
+                histograms[key] = [a + b for a, b in zip(merged, values)]
+
+    lines = []
+    for name, (metric_type, help_text, buckets) in METRIC_DEFINITIONS.items():
+        full_name = PREFIX + name
+        lines.append(f'# HELP {full_name} {help_text}')
+        lines.append(f'# TYPE {full_name} {metric_type}')
+
+        if metric_type == 'counter':
+            for (metric, labels), value in sorted(counters.items()):
+                if metric == name:
+                    lines.append(f'{full_name}{_format_labels(labels)} {_format_value(value)}')
+            continue
+
+        for (metric, labels), values in sorted(histograms.items()):
+            if metric != name:
+                continue
+            cumulative = 0
+            for bound, count in zip(buckets, values):
+                cumulative += count
+                lines.append(f'{full_name}_bucket{_format_labels(labels, ("le", _format_value(bound)))} '
+                             f'{_format_value(cumulative)}')
+            cumulative += values[len(buckets)]
+            lines.append(f'{full_name}_bucket{_format_labels(labels, ("le", "+Inf"))} '
+                         f'{_format_value(cumulative)}')
+            lines.append(f'{full_name}_sum{_format_labels(labels)} {_format_value(values[-1])}')
+            lines.append(f'{full_name}_count{_format_labels(labels)} {_format_value(cumulative)}')
+
+    # Hit ratios are derived from cache_requests_total so they stay consistent
+    cache_totals: Dict[str, List[float]] = {}
+    for (metric, labels), value in counters.items():
+        if metric != 'cache_requests_total':
+            continue
+        label_map = dict(labels)
+        totals = cache_totals.setdefault(label_map.get('cache', ''), [0, 0])
+        totals[1] += value
+        if label_map.get('result') == 'hit':
+            totals[0] += value
+
+    full_name = PREFIX + 'cache_hit_ratio'
+    lines.append(f'# HELP {full_name} Fraction of cache lookups served from cache')
+    lines.append(f'# TYPE {full_name} gauge')
+    for cache_name, (hits, total) in sorted(cache_totals.items()):
+        ratio = hits / total if total else 0
+        lines.append(f'{full_name}{_format_labels([("cache", cache_name)])} {_format_value(round(ratio, 6))}')
+
+    return '\n'.join(lines) + '\n'
+
+
+registry = MetricsRegistry()
+
+
+def inc(name: str, labels: Optional[Dict[str, str]] = None, value: float = 1):
+    registry.inc(name, labels, value)
+
+
+def observe(name: str, value: float, labels: Optional[Dict[str, str]] = None):
+    registry.observe(name, value, labels)
+
+
+def record_cache(cache: str, hit: bool):
+    """Record a lookup against one of the application caches"""
+    registry.inc('cache_requests_total', {'cache': cache, 'result': 'hit' if hit else 'miss'})
+
+
+class MetricsScrapePermission(BasePermission):
+    """Staff users, or clients whose address is in METRICS_ALLOWED_IPS (e.g. the Prometheus server)"""
+
+    def has_permission(self, request, view):
+        if request.user and request.user.is_staff:
+            return True
+        return request.META.get('REMOTE_ADDR') in getattr(settings, 'METRICS_ALLOWED_IPS', ())
+
+
+class _QueryCounter:
+    """connection.execute_wrapper hook that only counts statements"""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class MetricsMiddleware:
+    """
+    Record latency, status and query count for every request.
+    Should be the first entry in MIDDLEWARE so it measures the full stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        start = time.perf_counter()
+        queries = _QueryCounter()
+        with connection.execute_wrapper(queries):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+
+        match = getattr(request, 'resolver_match', None)
+        endpoint = (match.url_name or match.route) if match else '<unmatched>'
+
+        registry.inc('http_requests_total', {
+            'endpoint': endpoint,
+            'method': request.method,
+            'status': response.status_code,
+        })
+        registry.observe('http_request_duration_seconds', duration, {'endpoint': endpoint})
+        registry.observe('db_queries_per_request', queries.count, {'endpoint': endpoint})
+        registry.maybe_flush()
+
+        return response
@@ -0,0 +1,41 @@
+# Generated by Django 4.2.27 on 2026-10-19 16:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0002_savedplan'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='attraction',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['-rating', 'name', 'id'], name='attraction_rating_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='destination',
+            index=models.Index(fields=['name', 'id'], name='destination_name_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['price_per_night', 'id'], name='hotel_price_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['rating', 'id'], name='hotel_rating_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='hotel',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['star_rating', 'id'], name='hotel_stars_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='transport',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['price_per_person', 'id'], name='transport_price_keyset'),
+        ),
+        migrations.AddIndex(
+            model_name='travelpackage',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['-is_featured', 'base_price', 'id'], name='package_featured_keyset'),
+        ),
+    ]
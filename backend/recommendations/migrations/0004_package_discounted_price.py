@@ -0,0 +1,32 @@
+# Generated by Django 4.2.27 on 2026-10-19 16:45
+
+from django.db import migrations, models
+from django.db.models import F
+from django.db.models.functions import Round
+
+
+def backfill_discounted_price(apps, schema_editor):
+    TravelPackage = apps.get_model('recommendations', 'TravelPackage')
+    TravelPackage.objects.update(
+        discounted_price=Round(F('base_price') * (100 - F('discount_percentage')) / 100, 2)
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0003_catalog_keyset_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='travelpackage',
+            name='discounted_price',
+            field=models.DecimalField(decimal_places=2, default=0, editable=False, max_digits=10),
+        ),
+        migrations.RunPython(backfill_discounted_price, migrations.RunPython.noop),
+        migrations.AddIndex(
+            model_name='travelpackage',
+            index=models.Index(condition=models.Q(('is_available', True)), fields=['discounted_price', 'id'], name='package_price_keyset'),
+        ),
+    ]
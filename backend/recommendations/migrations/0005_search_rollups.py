@@ -0,0 +1,45 @@
+# Generated by Django 4.2.27 on 2026-10-19 17:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recommendations', '0004_package_discounted_price'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='RollupCheckpoint',
+            fields=[
+                ('name', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('last_id', models.BigIntegerField(default=0)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='SearchRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('hour', 'Hourly'), ('day', 'Daily')], max_length=4)),
+                ('period_start', models.DateTimeField()),
+                ('destination', models.CharField(max_length=200)),
+                ('num_people', models.IntegerField()),
+                ('lead_time', models.CharField(max_length=10)),
+                ('searches', models.IntegerField(default=0)),
+                ('nights', models.IntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['-period_start'],
+            },
+        ),
+        migrations.AddIndex(
+            model_name='searchhistory',
+            index=models.Index(fields=['created_at'], name='search_history_created'),
+        ),
+        migrations.AddConstraint(
+            model_name='searchrollup',
+            constraint=models.UniqueConstraint(fields=('granularity', 'period_start', 'destination', 'num_people', 'lead_time'), name='search_rollup_unique'),
+        ),
+    ]
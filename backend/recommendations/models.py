@@ -1,4 +1,9 @@
+import uuid
+from decimal import Decimal, ROUND_HALF_UP
+
 from django.db import models
+from django.db.models import F
+from django.db.models.functions import Round
 from django.core.validators import MinValueValidator, MaxValueValidator
 
 
@@ -18,6 +23,9 @@ class Destination(models.Model):
     class Meta:
         ordering = ['name']
         unique_together = ['city', 'country']
+        indexes = [
+            models.Index(fields=['name', 'id'], name='destination_name_keyset'),
+        ]
 
     def __str__(self):
         return f"{self.city}, {self.country}"
@@ -47,6 +55,15 @@ class Hotel(models.Model):
 
     class Meta:
         ordering = ['-rating', 'price_per_night']
+        # Keyset pagination orders (sort column, id) over available rows
+        indexes = [
+            models.Index(fields=['price_per_night', 'id'], name='hotel_price_keyset',
+                         condition=models.Q(is_available=True)),
+            models.Index(fields=['rating', 'id'], name='hotel_rating_keyset',
+                         condition=models.Q(is_available=True)),
+            models.Index(fields=['star_rating', 'id'], name='hotel_stars_keyset',
+                         condition=models.Q(is_available=True)),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.destination.city}"
@@ -81,6 +98,10 @@ class Transport(models.Model):
 
     class Meta:
         ordering = ['price_per_person']
+        indexes = [
+            models.Index(fields=['price_per_person', 'id'], name='transport_price_keyset',
+                         condition=models.Q(is_available=True)),
+        ]
 
     def __str__(self):
         return f"{self.transport_type} - {self.name}"
@@ -125,6 +146,10 @@ class Attraction(models.Model):
 
     class Meta:
         ordering = ['-rating', 'name']
+        indexes = [
+            models.Index(fields=['-rating', 'name', 'id'], name='attraction_rating_keyset',
+                         condition=models.Q(is_available=True)),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.destination.city}"
@@ -145,6 +170,8 @@ class TravelPackage(models.Model):
     base_price = models.DecimalField(max_digits=10, decimal_places=2)
     currency = models.CharField(max_length=3, default='USD')
     discount_percentage = models.DecimalField(max_digits=5, decimal_places=2, default=0)
+    # base_price less the discount, kept up to date by save() (see `manage.py backfill_discounted_prices`)
+    discounted_price = models.DecimalField(max_digits=10, decimal_places=2, default=0, editable=False)
     image_url = models.URLField(blank=True)
     is_featured = models.BooleanField(default=False)
     is_available = models.BooleanField(default=True)
@@ -153,13 +180,35 @@ class TravelPackage(models.Model):
 
     class Meta:
         ordering = ['-is_featured', 'base_price']
+        indexes = [
+            models.Index(fields=['-is_featured', 'base_price', 'id'], name='package_featured_keyset',
+                         condition=models.Q(is_available=True)),
+            models.Index(fields=['discounted_price', 'id'], name='package_price_keyset',
+                         condition=models.Q(is_available=True)),
+        ]
 
     def __str__(self):
         return f"{self.name} - {self.destination.city}"
 
+    def save(self, *args, **kwargs):
+        self.discounted_price = self.compute_discounted_price()
+        update_fields = kwargs.get('update_fields')
+        if update_fields is not None and {'base_price', 'discount_percentage'} & set(update_fields):
+            kwargs['update_fields'] = {*update_fields, 'discounted_price'}
+        super().save(*args, **kwargs)
+
+    def compute_discounted_price(self) -> Decimal:
+        base_price = Decimal(str(self.base_price))
+        discount = Decimal(str(self.discount_percentage))
+        return (base_price * (100 - discount) / 100).quantize(Decimal('0.01'), rounding=ROUND_HALF_UP)
+
     def get_discounted_price(self):
-        discount = float(self.base_price) * float(self.discount_percentage) / 100
-        return float(self.base_price) - discount
+        return float(self.compute_discounted_price())
+
+
+def discounted_price_expression():
+    """TravelPackage.compute_discounted_price() as a database expression, for bulk updates"""
+    return Round(F('base_price') * (100 - F('discount_percentage')) / 100, 2)
 
 
 class SearchHistory(models.Model):
@@ -176,6 +225,63 @@ class SearchHistory(models.Model):
     class Meta:
         ordering = ['-created_at']
         verbose_name_plural = 'Search histories'
+        indexes = [
+            models.Index(fields=['created_at'], name='search_history_created'),
+        ]
 
     def __str__(self):
         return f"{self.destination_query} - {self.created_at.strftime('%Y-%m-%d')}"
+
+
+class SearchRollup(models.Model):
+    """Search counts per hour or day, destination, party size and lead time (see analytics.py)"""
+    GRANULARITY_CHOICES = [
+        ('hour', 'Hourly'),
+        ('day', 'Daily'),
+    ]
+
+    granularity = models.CharField(max_length=4, choices=GRANULARITY_CHOICES)
+    period_start = models.DateTimeField()
+    destination = models.CharField(max_length=200)  # normalized destination query
+    num_people = models.IntegerField()
+    lead_time = models.CharField(max_length=10)  # days from search to check-in, bucketed
+    searches = models.IntegerField(default=0)
+    nights = models.IntegerField(default=0)  # total nights searched, for average stay length
+
+    class Meta:
+        ordering = ['-period_start']
+        constraints = [
+            models.UniqueConstraint(
+                fields=['granularity', 'period_start', 'destination', 'num_people', 'lead_time'],
+                name='search_rollup_unique'
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.granularity} {self.period_start:%Y-%m-%d %H:00} {self.destination}: {self.searches}"
+
+
+class RollupCheckpoint(models.Model):
+    """Last raw row folded into the rollups, per source table"""
+    name = models.CharField(max_length=50, primary_key=True)
+    last_id = models.BigIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    def __str__(self):
+        return f"{self.name} @ {self.last_id}"
+
+
+class SavedPlan(models.Model):
+    """Generated travel plan kept server-side so it can be edited incrementally"""
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    destination = models.CharField(max_length=200)
+    result = models.JSONField()
+    state = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        ordering = ['-updated_at']
+
+    def __str__(self):
+        return f"{self.destination} plan {self.id}"
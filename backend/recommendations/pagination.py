@@ -0,0 +1,160 @@
+"""
+Keyset (seek) pagination for the catalog endpoints.
+
+Page-number pagination runs COUNT(*) on every page and makes the database
+walk and discard OFFSET rows, so deep pages get slower as the catalog grows.
+KeysetPagination instead orders by the view's sort columns plus the primary
+key and continues after the last row seen:
+
+    WHERE (price_per_night, id) > (<last price>, <last id>)
+    ORDER BY price_per_night, id LIMIT <page size + 1>
+
+With a matching index every page is one index range scan, however deep.
+Sort columns must be non-null model columns (the default orderings and the
+`sort=` options of the viewsets are). The opaque `cursor` in the next /
+previous links encodes the boundary row's sort values.
+
+Counts are opt-in: `?count=exact` runs COUNT(*), `?count=approx` uses the
+PostgreSQL planner's row estimate (exact on other databases).
+"""
+
+import base64
+import json
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def approximate_count(queryset) -> int:
+    """Planner row estimate for the queryset on PostgreSQL, exact count elsewhere"""
+    connection = connections[queryset.db]
+    if connection.vendor != 'postgresql':
+        return queryset.count()
+    sql, params = queryset.order_by().values('pk').query.sql_with_params()
+    with connection.cursor() as cursor:
+        cursor.execute('EXPLAIN (FORMAT JSON) ' + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]['Plan']['Plan Rows'])
+
+
+class KeysetPagination(BasePagination):
+    """Cursor pagination on (sort columns..., pk) with optional counts"""
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+    cursor_query_param = 'cursor'
+    count_query_param = 'count'
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.base_url = request.build_absolute_uri()
+        self.page_size = self.get_page_size(request)
+        self.ordering = self.get_ordering(queryset)
+        self.count = self.get_count(queryset, request)
+
+        cursor = self.decode_cursor(request)
+        reverse = bool(cursor and cursor['r'])
+        ordering = [self._flip(field) for field in self.ordering] if reverse else self.ordering
+        queryset = queryset.order_by(*ordering)
+        if cursor:
+            queryset = queryset.filter(self._after(ordering, cursor['v']))
+
+        rows = list(queryset[:self.page_size + 1])
+        has_more = len(rows) > self.page_size
+        rows = rows[:self.page_size]
+        if reverse:
+            rows.reverse()
+
+        # Going back from a page there is always a next page, and vice versa
+        self.has_next = True if reverse else has_more
+        self.has_previous = has_more if reverse else cursor is not None
+        self.first, self.last = (rows[0], rows[-1]) if rows else (None, None)
+        return rows
+
+    def get_paginated_response(self, data):
+        body = OrderedDict()
+        if self.count is not None:
+            body['count'] = self.count
+        body['next'] = self.get_next_link()
+        body['previous'] = self.get_previous_link()
+        body['results'] = data
+        return Response(body)
+
+    def get_page_size(self, request) -> int:
+        page_size = getattr(settings, 'REST_FRAMEWORK', {}).get('PAGE_SIZE') or 20
+        try:
+            requested = int(request.query_params.get(self.page_size_query_param, page_size))
+        except (TypeError, ValueError):
+            return page_size
+        return max(1, min(requested, self.max_page_size))
+
+    def get_ordering(self, queryset) -> list:
+        """The queryset's ordering (or the model default) ending with the primary key"""
+        ordering = list(queryset.query.order_by or queryset.model._meta.ordering)
+        if not ordering or ordering[-1].lstrip('-') not in ('pk', 'id', queryset.model._meta.pk.name):
+            # Same direction as the last column, so one index serves the whole order
+            ordering.append('-pk' if ordering and ordering[-1].startswith('-') else 'pk')
+        return ordering
+
+    def get_count(self, queryset, request):
+        mode = request.query_params.get(self.count_query_param)
+        if mode == 'exact':
+            return queryset.count()
+        if mode == 'approx':
+            return approximate_count(queryset)
+        return None
+
+    def get_next_link(self):
+        if not self.has_next or self.last is None:
+            return None
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.last, False))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if self.first is None:
+            return remove_query_param(self.base_url, self.cursor_query_param)
+        return replace_query_param(self.base_url, self.cursor_query_param, self.encode_cursor(self.first, True))
+
+    def encode_cursor(self, row, reverse: bool) -> str:
+        values = [getattr(row, field.lstrip('-')) for field in self.ordering]
+        payload = json.dumps({'o': self.ordering, 'v': values, 'r': reverse}, cls=DjangoJSONEncoder)
+        return base64.urlsafe_b64encode(payload.encode()).decode()
+
+    def decode_cursor(self, request):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            cursor = json.loads(base64.urlsafe_b64decode(encoded.encode()))
+            valid = cursor['o'] == self.ordering and len(cursor['v']) == len(self.ordering)
+        except (TypeError, ValueError, KeyError):
+            valid = False
+        if not valid:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    @staticmethod
+    def _flip(field: str) -> str:
+        return field[1:] if field.startswith('-') else '-' + field
+
+    @staticmethod
+    def _after(ordering: list, values: list) -> Q:
+        """Rows strictly after `values` in `ordering`: the row-value comparison, spelled out"""
+        condition = Q()
+        for i, field in enumerate(ordering):
+            name = field.lstrip('-')
+            step = Q(**{f'{name}__lt' if field.startswith('-') else f'{name}__gt': values[i]})
+            for prior, value in zip(ordering[:i], values):
+                step &= Q(**{prior.lstrip('-'): value})
+            condition |= step
+        return condition
@@ -0,0 +1,32 @@
+"""
+Request parsers.
+
+FastJSONParser decodes JSON request bodies with orjson for the views selected
+by FAST_JSON_VIEWS (see renderers.FastJSONRenderer) and falls back to DRF's
+JSONParser otherwise.
+"""
+
+import codecs
+
+from django.conf import settings
+from rest_framework.exceptions import ParseError
+from rest_framework.parsers import JSONParser
+
+from .renderers import FastJSONRenderer, fast_json_enabled, orjson
+
+
+class FastJSONParser(JSONParser):
+    """JSONParser using orjson for UTF-8 bodies of the views selected by FAST_JSON_VIEWS"""
+    renderer_class = FastJSONRenderer
+
+    def parse(self, stream, media_type=None, parser_context=None):
+        parser_context = parser_context or {}
+        encoding = parser_context.get('encoding', settings.DEFAULT_CHARSET)
+        if not fast_json_enabled(parser_context) or codecs.lookup(encoding).name != 'utf-8':
+            return super().parse(stream, media_type, parser_context)
+
+        try:
+            # Like the strict JSONParser, orjson rejects NaN and Infinity
+            return orjson.loads(stream.read())
+        except orjson.JSONDecodeError as exc:
+            raise ParseError('JSON parse error - %s' % str(exc))
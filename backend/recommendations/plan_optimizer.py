@@ -0,0 +1,224 @@
+"""
+Budget-constrained selection of hotel, transport and attractions for a plan.
+
+The solver maximizes a rating-weighted value:
+    hotel rating x nights + sum of attraction ratings (+ bonus for preferred categories)
+subject to
+    hotel + transport + attractions <= budget,
+    at most attractions_per_day attractions per day.
+
+The user's hotel preference comes first: hotels are tried in tiers of equal
+preference score (see hotel_scoring), best tier first, and a lower tier is
+only considered when no hotel of the better tiers fits the budget.
+
+Attractions are chosen with a 0/1 knapsack DP (with a cardinality limit) over
+the remaining budget, discretized into at most CAPACITY_UNITS buckets. Costs
+are rounded up, so every returned plan is within budget. The DP table is
+computed once and then shared by every (hotel, transport) pair, which only
+needs an O(1) lookup of the best attraction value for its leftover budget.
+
+Large catalogs are pruned to the attractions with the highest value and the
+highest value per cost before the DP; the result is only reported optimal
+when nothing was pruned. Items are processed in descending value order and
+the DP over any prefix of items is a valid answer, so when the time limit is
+hit the best-so-far solution is returned (with optimal=False).
+"""
+
+import math
+import time
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from .ranking import cheapest, top_k
+
+
+CAPACITY_UNITS = 500
+PREFERRED_CATEGORY_BONUS = 1.0
+DEFAULT_ATTRACTION_RATING = 5.0
+MAX_TRANSPORT_CANDIDATES = 5
+
+
+def _number(value, default: float = 0.0) -> float:
+    try:
+        return float(value) if value is not None else default
+    except (TypeError, ValueError):
+        return default
+
+
+class BudgetPlanOptimizer:
+    """Pick the best-value hotel/transport/attractions combination within a budget"""
+
+    def __init__(self, budget: float, num_days: int, num_people: int, time_limit_ms: float = 200,
+                 preferred_categories: Iterable[str] = (), attractions_per_day: int = 1):
+        self.budget = max(0.0, float(budget))
+        self.num_days = max(1, int(num_days))
+        self.max_attractions = self.num_days * max(1, int(attractions_per_day))
+        self.num_people = max(1, int(num_people))
+        self.time_limit = time_limit_ms / 1000
+        self.preferred_categories = set(preferred_categories)
+
+    def solve(self, hotels: List[Dict], transports: List[Dict], attractions: List[Dict],
+              hotel_scores: Optional[Sequence[float]] = None) -> Dict:
+        """
+        Args:
+            hotels: Candidate hotels, best preference match first
+            transports: Candidate transports
+            attractions: Available attractions (at most attractions_per_day are visited per day)
+            hotel_scores: Preference score of each hotel; without them all hotels form one tier
+
+        Returns:
+            Dict with the chosen 'hotel', 'transport' and 'attractions', the
+            resulting 'total_cost' and 'value', and solver status flags.
+        """
+        start = time.perf_counter()
+        deadline = start + self.time_limit
+
+        hotel_options = [(h, _number(h.get('price_per_night')) * self.num_days) for h in hotels] or [(None, 0.0)]
+        tiers = self._hotel_tiers(len(hotel_options), hotel_scores if hotels else None)
+        transport_options = [
+            (t, _number(t.get('price_per_person')) * self.num_people)
+            for t in cheapest(transports, 'price_per_person', MAX_TRANSPORT_CANDIDATES)
+        ] or [(None, 0.0)]
+
+        unit = max(1.0, self.budget / CAPACITY_UNITS)
+        items, pruned = self._attraction_items(attractions, unit)
+        dp, choose, processed = self._knapsack(items, int(self.budget // unit), deadline)
+        best_by_capacity = dp.max(axis=0)
+
+        best = None
+        cheapest_fixed = None
+        for tier in tiers:
+            for rank in tier:
+                hotel, hotel_cost = hotel_options[rank]
+                hotel_value = _number(hotel.get('rating')) * self.num_days if hotel else 0.0
+                # Earlier (better preference match) hotels win ties
+                hotel_value -= rank * 1e-6
+                for transport, transport_cost in transport_options:
+                    fixed_cost = hotel_cost + transport_cost
+                    if cheapest_fixed is None or fixed_cost < cheapest_fixed[0]:
+                        cheapest_fixed = (fixed_cost, hotel, transport)
+                    remaining = self.budget - fixed_cost
+                    if remaining < 0:
+                        continue
+                    capacity = min(int(remaining // unit), len(best_by_capacity) - 1)
+                    value = hotel_value + float(best_by_capacity[capacity])
+                    if best is None or value > best[0]:
+                        best = (value, hotel, transport, fixed_cost, capacity)
+            if best is not None:
+                break  # Never trade a better preference match for value
+
+        if best is None:
+            # Nothing fits: cheapest stay and only free attractions
+            fixed_cost, hotel, transport = cheapest_fixed
+            free = [item for item in items if item['cost'] == 0][:self.max_attractions]
+            chosen = [item['attraction'] for item in free]
+            value = sum(item['value'] for item in free)
+            feasible = False
+        else:
+            value, hotel, transport, fixed_cost, capacity = best
+            chosen = self._reconstruct(items, dp, choose, processed, capacity)
+            feasible = True
+
+        attraction_cost = sum(_number(a.get('price_per_person')) for a in chosen) * self.num_people
+        return {
+            'hotel': hotel,
+            'transport': transport,
+            'attractions': chosen,
+            'total_cost': round(fixed_cost + attraction_cost, 2),
+            'value': round(value, 3),
+            'feasible': feasible,
+            'optimal': processed == len(items) and not pruned,
+            'attractions_considered': processed,
+            'elapsed_ms': round((time.perf_counter() - start) * 1000, 2),
+        }
+
+    @staticmethod
+    def _hotel_tiers(count: int, scores: Optional[Sequence[float]]) -> List[List[int]]:
+        """Hotel indices grouped by equal preference score, best score first"""
+        if scores is None:
+            return [list(range(count))]
+        tiers = {}
+        for index, score in enumerate(scores):
+            tiers.setdefault(round(float(score), 6), []).append(index)
+        return [tiers[score] for score in sorted(tiers, reverse=True)]
+
+    def _attraction_items(self, attractions: List[Dict], unit: float) -> Tuple[List[Dict], bool]:
+        """
+        Deduplicated attraction items, highest value first, capped to a useful pool.
+        Returns (items, whether any attraction that could be picked was left out).
+        """
+        items = []
+        seen_names = set()
+        for attraction in attractions:
+            name = attraction.get('name')
+            if name in seen_names:
+                continue
+            seen_names.add(name)
+            value = _number(attraction.get('rating'), DEFAULT_ATTRACTION_RATING)
+            if attraction.get('category') in self.preferred_categories:
+                value += PREFERRED_CATEGORY_BONUS
+            cost = _number(attraction.get('price_per_person')) * self.num_people
+            items.append({
+                'attraction': attraction,
+                'value': value,
+                'cost': cost,
+                'units': math.ceil(cost / unit) if cost > 0 else 0,
+            })
+
+        # Only max_attractions free ones can be picked, and the best of them always beat the rest
+        free = [i for i in items if i['units'] == 0]
+        paid = [i for i in items if i['units'] > 0]
+        pool = top_k(free, self.max_attractions, key=lambda i: i['value'], reverse=True)
+
+        # Paid ones: the highest value, and the cheapest per unit of value, which fill a tight budget
+        pool_size = max(4 * self.max_attractions, 20)
+        kept = {id(i): i for i in top_k(paid, pool_size, key=lambda i: i['value'], reverse=True)}
+        kept.update((id(i), i) for i in top_k(paid, pool_size, key=lambda i: i['value'] / i['cost'], reverse=True))
+        pool.extend(kept.values())
+
+        pruned = len(paid) > len(kept)
+        return top_k(pool, key=lambda i: i['value'], reverse=True), pruned
+
+    def _knapsack(self, items: List[Dict], capacity: int, deadline: float):
+        """
+        dp[k][c] = best value using exactly k attractions and at most c budget units.
+        Returns (dp table, choice table, number of items processed).
+        """
+        dp = np.full((self.max_attractions + 1, capacity + 1), -np.inf)
+        dp[0, :] = 0.0
+        choose = []
+
+        processed = 0
+        for item in items:
+            if time.perf_counter() > deadline:
+                break
+            weight, value = item['units'], item['value']
+            taken = None
+            if weight <= capacity:
+                # All counts at once: candidates are computed from the values before this item
+                candidates = dp[:-1, :capacity + 1 - weight] + value
+                taken = candidates > dp[1:, weight:]
+                dp[1:, weight:] = np.where(taken, candidates, dp[1:, weight:])
+            choose.append((weight, taken))
+            processed += 1
+
+        return dp, choose, processed
+
+    def _reconstruct(self, items: List[Dict], dp: np.ndarray, choose: List, processed: int,
+                     capacity: int) -> List[Dict]:
+        """Walk the choice table backwards to recover the chosen attractions"""
+        k = int(np.argmax(dp[:, capacity]))
+        c = capacity
+        chosen = []
+        for index in range(processed - 1, -1, -1):
+            if k == 0:
+                break
+            weight, taken = choose[index]
+            # taken[k - 1, c - weight]: count k at capacity c was reached by adding this item
+            if taken is not None and c >= weight and taken[k - 1, c - weight]:
+                chosen.append(items[index]['attraction'])
+                k -= 1
+                c -= weight
+        chosen.reverse()
+        return chosen
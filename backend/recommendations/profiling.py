@@ -0,0 +1,205 @@
+"""
+On-demand request profiling.
+
+A request is profiled only when PROFILING_ENABLED is set and either:
+- a staff user sends the `X-Profile` header (`cprofile` or `sample`), or
+- the URL carries a `_profile` query parameter signed for that path
+  (see make_profile_token / the "Request profiles" admin page).
+
+Each profile is written to PROFILING_DIR as `<id>.pstats` (cProfile mode),
+`<id>.collapsed` (folded stacks for flamegraph.pl / speedscope) and
+`<id>.json` (request metadata). Only the newest PROFILING_MAX_PROFILES are kept.
+"""
+
+import cProfile
+import json
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.core import signing
+
+
+TOKEN_SALT = 'recommendations.profiling'
+PROFILE_MODES = ('cprofile', 'sample')
+
+
+def make_profile_token(path: str) -> str:
+    """Create a signed `_profile` query value that enables profiling for one path"""
+    return signing.TimestampSigner(salt=TOKEN_SALT).sign(path)
+
+
+def _token_is_valid(token: str, path: str) -> bool:
+    max_age = getattr(settings, 'PROFILING_TOKEN_MAX_AGE', 3600)
+    try:
+        return signing.TimestampSigner(salt=TOKEN_SALT).unsign(token, max_age=max_age) == path
+    except signing.BadSignature:
+        return False
+
+
+def get_profile_dir() -> str:
+    return str(getattr(settings, 'PROFILING_DIR', os.path.join(settings.BASE_DIR, 'profiles')))
+
+
+class StackSampler:
+    """
+    Periodically samples the Python stack of one thread.
+    Produces collapsed stacks ("root;child;leaf count") for flamegraphs.
+    """
+
+    def __init__(self, thread_id: int, interval: float = 0.005):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            frames = []
+            while frame is not None:
+                code = frame.f_code
+                frames.append(f'{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})')
+                frame = frame.f_back
+            if frames:
+                self.stacks[';'.join(reversed(frames))] += 1
+
+    def collapsed(self) -> str:
+        return ''.join(f'{stack} {count}\n' for stack, count in self.stacks.most_common())
+
+
+def list_profiles() -> List[Dict]:
+    """Metadata for stored profiles, newest first"""
+    directory = get_profile_dir()
+    if not os.path.isdir(directory):
+        return []
+
+    profiles = []
+    for filename in os.listdir(directory):
+        if not filename.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, filename)) as f:
+                profiles.append(json.load(f))
+        except (OSError, ValueError):
+            continue
+    return sorted(profiles, key=lambda p: p.get('created_at', ''), reverse=True)
+
+
+def profile_file_path(profile_id: str, kind: str) -> Optional[str]:
+    """Resolve a stored profile file, rejecting anything outside PROFILING_DIR"""
+    if kind not in ('pstats', 'collapsed') or not re.fullmatch(r'[\w-]+', profile_id):
+        return None
+    path = os.path.join(get_profile_dir(), f'{profile_id}.{kind}')
+    return path if os.path.isfile(path) else None
+
+
+def _prune_profiles(directory: str):
+    max_profiles = getattr(settings, 'PROFILING_MAX_PROFILES', 50)
+    stale = [p['id'] for p in list_profiles()[max_profiles:]]
+    for profile_id in stale:
+        for ext in ('json', 'pstats', 'collapsed'):
+            try:
+                os.remove(os.path.join(directory, f'{profile_id}.{ext}'))
+            except FileNotFoundError:
+                pass
+
+
+class ProfilingMiddleware:
+    """
+    Profile individual requests on demand.
+    Place after AuthenticationMiddleware (staff check) and last in MIDDLEWARE
+    so the profile covers the view rather than the rest of the middleware stack.
+    """
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        mode = self._requested_mode(request)
+        if mode is None:
+            return self.get_response(request)
+
+        sampler = StackSampler(
+            threading.get_ident(),
+            interval=getattr(settings, 'PROFILING_SAMPLE_INTERVAL', 0.005)
+        )
+        profiler = cProfile.Profile() if mode == 'cprofile' else None
+
+        start = time.perf_counter()
+        sampler.start()
+        if profiler:
+            profiler.enable()
+        try:
+            response = self.get_response(request)
+        finally:
+            if profiler:
+                profiler.disable()
+            sampler.stop()
+        duration = time.perf_counter() - start
+
+        profile_id = self._save(request, response, mode, duration, profiler, sampler)
+        response['X-Profile-Id'] = profile_id
+        return response
+
+    def _requested_mode(self, request) -> Optional[str]:
+        if not getattr(settings, 'PROFILING_ENABLED', False):
+            return None
+
+        header = request.headers.get('X-Profile', '').strip().lower()
+        if header:
+            user = getattr(request, 'user', None)
+            if user is not None and user.is_staff:
+                return header if header in PROFILE_MODES else 'cprofile'
+            return None
+
+        token = request.GET.get('_profile')
+        if token and _token_is_valid(token, request.path):
+            mode = request.GET.get('_profile_mode', 'cprofile')
+            return mode if mode in PROFILE_MODES else 'cprofile'
+        return None
+
+    def _save(self, request, response, mode, duration, profiler, sampler) -> str:
+        directory = get_profile_dir()
+        os.makedirs(directory, exist_ok=True)
+
+        now = datetime.now()
+        slug = re.sub(r'[^\w]+', '-', request.path).strip('-')[:40] or 'root'
+        profile_id = f"{now:%Y%m%d%H%M%S}-{request.method.lower()}-{slug}-{uuid.uuid4().hex[:6]}"
+
+        if profiler:
+            profiler.dump_stats(os.path.join(directory, f'{profile_id}.pstats'))
+        with open(os.path.join(directory, f'{profile_id}.collapsed'), 'w') as f:
+            f.write(sampler.collapsed())
+
+        user = getattr(request, 'user', None)
+        with open(os.path.join(directory, f'{profile_id}.json'), 'w') as f:
+            json.dump({
+                'id': profile_id,
+                'created_at': now.isoformat(),
+                'method': request.method,
+                'path': request.get_full_path(),
+                'status': response.status_code,
+                'mode': mode,
+                'duration_ms': round(duration * 1000, 2),
+                'samples': sum(sampler.stacks.values()),
+                'user': user.get_username() if user is not None and user.is_authenticated else None,
+            }, f)
+
+        _prune_profiles(directory)
+        return profile_id
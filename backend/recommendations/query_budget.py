@@ -0,0 +1,150 @@
+"""
+Per-request SQL query budgets.
+
+QueryBudgetMiddleware records the number of queries, total DB time and the
+slowest statements of every request through connection.execute_wrapper.
+Requests over budget are logged (and counted in /api/metrics/); with
+QUERY_BUDGET_RAISE enabled, as in tests, they raise QueryBudgetExceeded.
+
+Views can declare a tighter budget than the QUERY_BUDGET_* defaults:
+
+    class HotelViewSet(viewsets.ModelViewSet):
+        query_budget = {'max_queries': 4}
+
+    @query_budget(max_queries=2)
+    @api_view(['GET'])
+    def my_view(request): ...
+"""
+
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import connection
+
+from . import metrics
+
+logger = logging.getLogger(__name__)
+
+
+class QueryBudgetExceeded(AssertionError):
+    """Raised when a request or block goes over its declared query budget"""
+
+
+class QueryCollector:
+    """execute_wrapper hook recording query count, DB time and the N slowest statements"""
+
+    def __init__(self, top_n: int = 5):
+        self.top_n = top_n
+        self.count = 0
+        self.total_time = 0.0
+        self._slowest = []  # min-heap of (duration, seq, sql)
+        self._seq = itertools.count()
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.count += 1
+            self.total_time += duration
+            entry = (duration, next(self._seq), sql)
+            if len(self._slowest) < self.top_n:
+                heapq.heappush(self._slowest, entry)
+            elif duration > self._slowest[0][0]:
+                heapq.heapreplace(self._slowest, entry)
+
+    def slowest(self) -> List[Dict]:
+        return [
+            {'sql': sql, 'duration_ms': round(duration * 1000, 3)}
+            for duration, _, sql in sorted(self._slowest, reverse=True)
+        ]
+
+    def violations(self, max_queries: Optional[int], max_db_ms: Optional[float]) -> List[str]:
+        reasons = []
+        if max_queries is not None and self.count > max_queries:
+            reasons.append('queries')
+        if max_db_ms is not None and self.total_time * 1000 > max_db_ms:
+            reasons.append('db_time')
+        return reasons
+
+
+def query_budget(max_queries: Optional[int] = None, max_db_ms: Optional[float] = None):
+    """Declare a query budget on a function-based view"""
+    def decorator(view_func):
+        view_func.query_budget = {'max_queries': max_queries, 'max_db_ms': max_db_ms}
+        return view_func
+    return decorator
+
+
+def _default_budget() -> Dict:
+    return {
+        'max_queries': getattr(settings, 'QUERY_BUDGET_MAX_QUERIES', 50),
+        'max_db_ms': getattr(settings, 'QUERY_BUDGET_MAX_DB_MS', 500),
+    }
+
+
+@contextmanager
+def assert_query_budget(max_queries: Optional[int] = None, max_db_ms: Optional[float] = None):
+    """
+    Fail a block of code (e.g. a test) that goes over the given budget:
+
+        with assert_query_budget(max_queries=3):
+            client.get('/api/hotels/')
+    """
+    collector = QueryCollector(top_n=getattr(settings, 'QUERY_BUDGET_TOP_N', 5))
+    with connection.execute_wrapper(collector):
+        yield collector
+    if collector.violations(max_queries, max_db_ms):
+        raise QueryBudgetExceeded(
+            f"{collector.count} queries / {collector.total_time * 1000:.1f} ms DB time "
+            f"(budget: {max_queries} queries / {max_db_ms} ms). Slowest: {collector.slowest()}"
+        )
+
+
+class QueryBudgetMiddleware:
+    """Capture per-request SQL statistics and enforce query budgets"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        collector = QueryCollector(top_n=getattr(settings, 'QUERY_BUDGET_TOP_N', 5))
+        with connection.execute_wrapper(collector):
+            response = self.get_response(request)
+
+        match = getattr(request, 'resolver_match', None)
+        endpoint = (match.url_name or match.route) if match else '<unmatched>'
+        metrics.observe('db_time_per_request_seconds', collector.total_time, {'endpoint': endpoint})
+
+        budget = getattr(request, '_query_budget', None) or _default_budget()
+        reasons = collector.violations(budget.get('max_queries'), budget.get('max_db_ms'))
+        if reasons:
+            for reason in reasons:
+                metrics.inc('query_budget_exceeded_total', {'endpoint': endpoint, 'reason': reason})
+            message = (
+                f"Query budget exceeded for {request.method} {request.path}: "
+                f"{collector.count} queries, {collector.total_time * 1000:.1f} ms DB time "
+                f"(budget: {budget.get('max_queries')} queries, {budget.get('max_db_ms')} ms)"
+            )
+            logger.warning(message, extra={'slow_queries': collector.slowest()})
+            for statement in collector.slowest():
+                logger.warning("  %.3f ms: %s", statement['duration_ms'], statement['sql'])
+            if getattr(settings, 'QUERY_BUDGET_RAISE', False):
+                raise QueryBudgetExceeded(message)
+
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        # DRF's as_view() exposes the view class as `cls`
+        declared = getattr(view_func, 'query_budget', None)
+        if declared is None and hasattr(view_func, 'cls'):
+            declared = getattr(view_func.cls, 'query_budget', None)
+        if declared:
+            request._query_budget = {**_default_budget(), **{k: v for k, v in declared.items() if v is not None}}
+        return None
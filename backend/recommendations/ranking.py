@@ -0,0 +1,46 @@
+"""
+Shared ranking helpers.
+
+Result lists are usually consumed from the top (the planner only needs the
+best hotel/transport, the API returns a page), so selecting the k best items
+with a heap costs O(n log k) instead of the O(n log n) of a full sort.
+"""
+
+import heapq
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+
+def top_k(
+    items: Iterable[Any],
+    k: Optional[int] = None,
+    key: Optional[Callable[[Any], Any]] = None,
+    reverse: bool = False
+) -> List[Any]:
+    """
+    Return the k best items in ranked order.
+
+    Equivalent to sorted(items, key=key, reverse=reverse)[:k], including
+    stability for ties. k=None returns every item ranked.
+    """
+    if k is None:
+        return sorted(items, key=key, reverse=reverse)
+    if k <= 0:
+        return []
+    if hasattr(items, '__len__') and k >= len(items):
+        return sorted(items, key=key, reverse=reverse)
+    if reverse:
+        return heapq.nlargest(k, items, key=key)
+    return heapq.nsmallest(k, items, key=key)
+
+
+def price_key(field: str) -> Callable[[Dict], Any]:
+    """Sort key on a price field; items without a price rank last"""
+    def key(item: Dict):
+        price = item.get(field)
+        return (price is None, price or 0)
+    return key
+
+
+def cheapest(items: Iterable[Dict], field: str, k: Optional[int] = None) -> List[Dict]:
+    """The k cheapest items by the given price field"""
+    return top_k(items, k, key=price_key(field))
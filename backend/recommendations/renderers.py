@@ -0,0 +1,80 @@
+"""
+Response renderers.
+
+FastJSONRenderer renders JSON with orjson, several times faster than the
+stdlib encoder on the large search and planner payloads. It is enabled per
+view with the FAST_JSON_VIEWS setting and falls back to DRF's JSONRenderer
+for other views or when orjson isn't installed. Types orjson doesn't know
+(Decimal, lazy strings, timedelta, ...) and datetimes go through DRF's
+JSONEncoder, so datetimes are formatted exactly as the installed DRF does.
+Integers beyond 64 bits, which orjson can't encode, are rendered by the
+default renderer. The one remaining difference: NaN and infinite floats are
+rendered as null, where the default renderer (with STRICT_JSON) raises.
+
+EventStreamRenderer lets streaming views accept `Accept: text/event-stream`
+(as sent by the browser's EventSource); non-streaming responses from those
+views, such as validation errors, are delivered as a single `error` event.
+"""
+
+import json
+
+from django.conf import settings
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:  # Optional: the stdlib encoder is used instead
+    orjson = None
+
+
+_fallback_encoder = JSONEncoder()
+
+ORJSON_OPTIONS = (
+    orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_PASSTHROUGH_DATETIME
+) if orjson else 0
+
+
+def fast_json_enabled(context) -> bool:
+    """Whether orjson handles the view in this renderer / parser context"""
+    if orjson is None:
+        return False
+    views = getattr(settings, 'FAST_JSON_VIEWS', ['*'])
+    if '*' in views:
+        return True
+    view = (context or {}).get('view')
+    return view is not None and type(view).__name__ in views
+
+
+def sse_event(event: str, data) -> bytes:
+    """Encode one Server-Sent Event with a JSON payload"""
+    payload = json.dumps(data, cls=JSONEncoder, separators=(',', ':'))
+    return f"event: {event}\ndata: {payload}\n\n".encode('utf-8')
+
+
+class FastJSONRenderer(JSONRenderer):
+    """JSONRenderer using orjson for the views selected by FAST_JSON_VIEWS"""
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None or not fast_json_enabled(renderer_context):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        options = ORJSON_OPTIONS
+        if self.get_indent(accepted_media_type, renderer_context or {}):
+            options |= orjson.OPT_INDENT_2
+        try:
+            ret = orjson.dumps(data, default=_fallback_encoder.default, option=options)
+        except orjson.JSONEncodeError:
+            # e.g. integers beyond 64 bits; the default renderer handles them (or raises the same way)
+            return super().render(data, accepted_media_type, renderer_context)
+        # Like JSONRenderer, keep the output a strict JavaScript subset
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class EventStreamRenderer(BaseRenderer):
+    media_type = 'text/event-stream'
+    format = 'sse'
+    charset = 'utf-8'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return sse_event('error', data)
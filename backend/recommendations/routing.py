@@ -0,0 +1,165 @@
+"""
+Geographic routing of daily activities.
+
+plan_day_routes() splits the trip's stops into days by direction from the
+hotel (a sweep around the hotel, so each day covers one area of the city) and
+orders every day as a round trip from the hotel with a nearest-neighbour tour
+improved by 2-opt. Distances are great-circle (haversine) kilometres, computed
+as NumPy matrices so the heuristics stay fast for ~1k stops.
+"""
+
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+EARTH_RADIUS_KM = 6371.0
+TWO_OPT_TIME_LIMIT = 0.05  # seconds per day
+TWO_OPT_NEIGHBOURS = 10
+
+
+def coordinates(item: Optional[Dict]) -> Optional[Tuple[float, float]]:
+    """(lat, lon) of a hotel/attraction dict, or None when it has no usable coordinates"""
+    if not item:
+        return None
+    try:
+        lat, lon = float(item.get('latitude')), float(item.get('longitude'))
+    except (TypeError, ValueError):
+        return None
+    return (lat, lon) if np.isfinite(lat) and np.isfinite(lon) else None
+
+
+def distance_matrix(points: np.ndarray) -> np.ndarray:
+    """Pairwise haversine distances (km) between (lat, lon) rows"""
+    lat, lon = np.radians(points[:, 0]), np.radians(points[:, 1])
+    dlat = lat[:, None] - lat[None, :]
+    dlon = lon[:, None] - lon[None, :]
+    a = np.sin(dlat / 2) ** 2 + np.cos(lat)[:, None] * np.cos(lat)[None, :] * np.sin(dlon / 2) ** 2
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.sqrt(np.clip(a, 0, 1)))
+
+
+def _nearest_neighbour_tour(dist: np.ndarray) -> List[int]:
+    """Tour starting and ending at node 0 (the hotel), always moving to the closest unvisited node"""
+    n = len(dist)
+    visited = np.zeros(n, dtype=bool)
+    visited[0] = True
+    tour = [0]
+    current = 0
+    for _ in range(n - 1):
+        candidates = np.where(visited, np.inf, dist[current])
+        current = int(np.argmin(candidates))
+        visited[current] = True
+        tour.append(current)
+    tour.append(0)
+    return tour
+
+
+def _two_opt(tour: List[int], dist: np.ndarray, time_limit: float = TWO_OPT_TIME_LIMIT) -> List[int]:
+    """
+    Reverse tour segments while that shortens the closed tour (endpoints stay at the hotel).
+
+    Only moves that link a stop to one of its TWO_OPT_NEIGHBOURS nearest stops
+    are considered (improving 2-opt moves almost always do), so a round costs
+    O(n * neighbours) instead of O(n^2). Each round evaluates those moves at
+    once as arrays, then applies all improving reversals whose edge ranges
+    don't overlap (their gains are independent), so a round costs one
+    vectorized step instead of a Python loop.
+    """
+    route = np.array(tour)
+    num_edges = len(route) - 1
+    num_neighbours = min(TWO_OPT_NEIGHBOURS, num_edges - 1)
+    neighbours = np.argpartition(dist + np.diag(np.full(len(dist), np.inf)), num_neighbours - 1, axis=1)
+    neighbours = neighbours[:, :num_neighbours]
+    position = np.empty(len(dist), dtype=np.intp)
+    deadline = time.perf_counter() + time_limit
+    while time.perf_counter() < deadline:
+        starts, ends = route[:-1], route[1:]
+        edges = dist[starts, ends]
+        position[starts] = np.arange(num_edges)
+        # Edge pairs (i, j), i < j, where start_j is one of start_i's nearest stops or vice versa
+        first = np.repeat(np.arange(num_edges), num_neighbours)
+        second = position[neighbours[starts]].ravel()
+        i, j = np.minimum(first, second), np.maximum(first, second)
+        keep = j - i >= 2
+        i, j = i[keep], j[keep]
+        # Change in length from replacing edges i and j with (start_i, start_j), (end_i, end_j)
+        delta = dist[starts[i], starts[j]] + dist[ends[i], ends[j]] - edges[i] - edges[j]
+        improving = np.flatnonzero(delta < -1e-9)
+        if not len(improving):
+            break
+        improving = improving[np.argsort(delta[improving], kind='stable')][:num_edges]
+
+        used = bytearray(num_edges)
+        for a, b in zip(i[improving].tolist(), j[improving].tolist()):
+            if 1 in used[a:b + 1]:
+                continue
+            used[a:b + 1] = b'\x01' * (b + 1 - a)
+            route[a + 1:b + 1] = route[a + 1:b + 1][::-1]
+    return route.tolist()
+
+
+def _tour_length(tour: Sequence[int], dist: np.ndarray) -> float:
+    return float(dist[tour[:-1], tour[1:]].sum())
+
+
+def _split_by_direction(points: np.ndarray, origin: np.ndarray, num_days: int) -> List[np.ndarray]:
+    """Group stop indices into at most num_days contiguous sectors around the origin"""
+    bearings = np.arctan2(points[:, 0] - origin[0], (points[:, 1] - origin[1]) * np.cos(np.radians(origin[0])))
+    order = np.argsort(bearings, kind='stable')
+    groups = min(num_days, len(points))
+    return [group for group in np.array_split(order, groups) if len(group)] if groups else []
+
+
+def order_stops(origin: Tuple[float, float], stops: Sequence[Tuple[float, float]]) -> Tuple[List[int], float]:
+    """
+    Order stops as a round trip from origin.
+    Returns (stop indices in visiting order, round-trip distance in km).
+    """
+    if not stops:
+        return [], 0.0
+    points = np.vstack([np.asarray(origin, dtype=float), np.asarray(stops, dtype=float)])
+    dist = distance_matrix(points)
+    tour = _nearest_neighbour_tour(dist)
+    if len(stops) > 2:
+        tour = _two_opt(tour, dist)
+    return [node - 1 for node in tour[1:-1]], _tour_length(tour, dist)
+
+
+def plan_day_routes(hotel: Optional[Dict], stops: List[Dict], num_days: int) -> Dict:
+    """
+    Assign stops to days and order each day's visits from the hotel.
+
+    Stops without coordinates (or trips without a located hotel) keep their
+    original order and are spread over the remaining days unrouted.
+
+    Returns:
+        {'days': [{'stops': [...], 'distance_km': float or None}, ...] (num_days entries),
+         'total_distance_km': float, 'routed': bool}
+    """
+    num_days = max(1, num_days)
+    days = [{'stops': [], 'distance_km': None} for _ in range(num_days)]
+    origin = coordinates(hotel)
+
+    located = [(index, coordinates(stop)) for index, stop in enumerate(stops)] if origin else []
+    located = [(index, point) for index, point in located if point is not None]
+    located_indices = {index for index, _ in located}
+    unrouted = [stop for index, stop in enumerate(stops) if index not in located_indices]
+
+    total = 0.0
+    if located:
+        points = np.array([point for _, point in located], dtype=float)
+        for day, group in enumerate(_split_by_direction(points, np.asarray(origin, dtype=float), num_days)):
+            order, distance = order_stops(origin, points[group].tolist())
+            days[day]['stops'] = [stops[located[group[i]][0]] for i in order]
+            days[day]['distance_km'] = round(distance, 2)
+            total += distance
+
+    # Unlocated stops fill the days that have nothing planned yet, in their original order
+    empty_days = [day for day in days if not day['stops']]
+    for day, stop in zip(empty_days, unrouted):
+        day['stops'].append(stop)
+    for stop in unrouted[len(empty_days):]:
+        days[-1]['stops'].append(stop)
+
+    return {'days': days, 'total_distance_km': round(total, 2), 'routed': bool(located)}
@@ -0,0 +1,58 @@
+"""
+Attraction scheduling for generated itineraries.
+
+AttractionQueue hands out each attraction at most once, preferring the
+categories that fit the trip's travel type. Attractions are bucketed into one
+FIFO queue per category in a single pass, and each pick only compares the
+heads of the (at most ~10) category queues, so scheduling a whole trip is
+O(days + attractions).
+"""
+
+from collections import deque
+from typing import Dict, Iterable, List, Optional
+
+
+class AttractionQueue:
+    """Category-aware queue of not-yet-scheduled attractions"""
+
+    def __init__(self, attractions: Iterable[Dict], preferred_categories: Iterable[str] = ()):
+        self._queues: Dict[str, deque] = {}
+        seen_names = set()
+        for index, attraction in enumerate(attractions):
+            name = attraction.get('name')
+            if name in seen_names:
+                continue  # The same attraction is never visited twice
+            seen_names.add(name)
+            category = attraction.get('category') or ''
+            self._queues.setdefault(category, deque()).append((index, attraction))
+
+        self._preferred = [c for c in dict.fromkeys(preferred_categories) if c in self._queues]
+        self._others = [c for c in self._queues if c not in set(self._preferred)]
+
+    def __bool__(self) -> bool:
+        return any(self._queues.values())
+
+    def pop(self) -> Optional[Dict]:
+        """
+        Next attraction to schedule: the earliest-listed one from the preferred
+        categories, or from any category once those are exhausted.
+        """
+        for categories in (self._preferred, self._others):
+            best = None
+            for category in categories:
+                queue = self._queues[category]
+                if queue and (best is None or queue[0][0] < self._queues[best][0][0]):
+                    best = category
+            if best is not None:
+                return self._queues[best].popleft()[1]
+        return None
+
+    def take(self, count: int) -> List[Dict]:
+        """Pop up to `count` attractions"""
+        taken = []
+        while len(taken) < count:
+            attraction = self.pop()
+            if attraction is None:
+                break
+            taken.append(attraction)
+        return taken
@@ -1,3 +1,4 @@
+from django.conf import settings
 from rest_framework import serializers
 from .models import Destination, Hotel, Transport, Attraction, TravelPackage, SearchHistory
 
@@ -80,14 +81,11 @@ class TravelPackageSerializer(serializers.ModelSerializer):
     hotels = HotelSerializer(many=True, read_only=True)
     transports = TransportSerializer(many=True, read_only=True)
     attractions = AttractionSerializer(many=True, read_only=True)
-    discounted_price = serializers.SerializerMethodField()
+    discounted_price = serializers.FloatField(read_only=True)
     
     class Meta:
         model = TravelPackage
         fields = '__all__'
-    
-    def get_discounted_price(self, obj):
-        return obj.get_discounted_price()
 
 
 class SearchHistorySerializer(serializers.ModelSerializer):
@@ -105,6 +103,7 @@ class TravelSearchSerializer(serializers.Serializer):
     people = serializers.IntegerField(min_value=1, max_value=20, default=1)
     rooms = serializers.IntegerField(min_value=1, max_value=10, default=1)
     budget = serializers.IntegerField(min_value=0, required=False, allow_null=True, default=None)
+    limit = serializers.IntegerField(min_value=1, max_value=100, required=False, allow_null=True, default=None)
     
     def validate(self, data):
         if data['check_out'] <= data['check_in']:
@@ -112,6 +111,78 @@ class TravelSearchSerializer(serializers.Serializer):
         return data
 
 
+class CompareDestinationsSerializer(TravelSearchSerializer):
+    """Serializer for destination comparison input: one origin, dates and party, several destinations"""
+    destination = None
+    limit = None
+    destinations = serializers.ListField(child=serializers.CharField(max_length=200), min_length=1)
+    
+    def validate_destinations(self, value):
+        destinations = list(dict.fromkeys(d.strip() for d in value if d.strip()))
+        max_destinations = getattr(settings, 'SEARCH_COMPARE_MAX_DESTINATIONS', 10)
+        if not destinations:
+            raise serializers.ValidationError("At least one destination is required")
+        if len(destinations) > max_destinations:
+            raise serializers.ValidationError(f"At most {max_destinations} destinations can be compared")
+        return destinations
+
+
+class TripStopSerializer(serializers.Serializer):
+    """One stop of a multi-city trip"""
+    city = serializers.CharField(max_length=200)
+    nights = serializers.IntegerField(min_value=1, max_value=30)
+
+
+class MultiCitySearchSerializer(serializers.Serializer):
+    """Serializer for multi-city trip input: origin -> stops in order (-> origin)"""
+    origin = serializers.CharField(max_length=200, required=False, allow_blank=True, default='')
+    stops = TripStopSerializer(many=True)
+    start_date = serializers.DateField()
+    people = serializers.IntegerField(min_value=1, max_value=20, default=1)
+    rooms = serializers.IntegerField(min_value=1, max_value=10, default=1)
+    budget = serializers.IntegerField(min_value=0, required=False, allow_null=True, default=None)
+    return_to_origin = serializers.BooleanField(default=True)
+    limit = serializers.IntegerField(min_value=1, max_value=100, required=False, default=5)
+    
+    def validate_stops(self, value):
+        max_stops = getattr(settings, 'MULTI_CITY_MAX_STOPS', 8)
+        if not value:
+            raise serializers.ValidationError("At least one stop is required")
+        if len(value) > max_stops:
+            raise serializers.ValidationError(f"At most {max_stops} stops per trip")
+        return value
+
+
+class FlexibleDateSearchSerializer(serializers.Serializer):
+    """Serializer for flexible-date search input: every `nights`-night stay between date_from and date_to"""
+    origin = serializers.CharField(max_length=200, required=False, allow_blank=True, default='')
+    destination = serializers.CharField(max_length=200)
+    date_from = serializers.DateField()
+    date_to = serializers.DateField()
+    nights = serializers.IntegerField(min_value=1, max_value=30)
+    people = serializers.IntegerField(min_value=1, max_value=20, default=1)
+    rooms = serializers.IntegerField(min_value=1, max_value=10, default=1)
+    budget = serializers.IntegerField(min_value=0, required=False, allow_null=True, default=None)
+    limit = serializers.IntegerField(min_value=1, max_value=100, required=False, default=10)
+    
+    def validate(self, data):
+        span = (data['date_to'] - data['date_from']).days
+        if span < data['nights']:
+            raise serializers.ValidationError("Date range must be at least as long as the stay")
+        max_days = getattr(settings, 'FLEXIBLE_SEARCH_MAX_DAYS', 62)
+        if span > max_days:
+            raise serializers.ValidationError(f"Date range can't be longer than {max_days} days")
+        return data
+
+
+class SearchAnalyticsSerializer(serializers.Serializer):
+    """Query parameters of the search analytics endpoint"""
+    granularity = serializers.ChoiceField(choices=['hour', 'day'], default='day')
+    days = serializers.IntegerField(min_value=1, max_value=366, default=30)
+    destination = serializers.CharField(max_length=200, required=False, allow_blank=True, default='')
+    top = serializers.IntegerField(min_value=1, max_value=100, default=10)
+
+
 class TravelRecommendationSerializer(serializers.Serializer):
     """Serializer for travel recommendations response"""
     destination = DestinationSerializer()
@@ -2,15 +2,73 @@
 External API integration services for travel data.
 Uses mock data for hotels/transport/attractions.
 Supports switching between Mock and Amadeus API for real data.
+
+Mock data is deterministic: each catalog is generated once per (city, date)
+from a seeded RNG, kept as compact tuple rows in an in-memory LRU and turned
+into fresh dicts on every call. Identical searches return identical prices.
 """
 
 import os
+import hashlib
+import threading
 import requests
-from typing import Optional, Dict, List, Any
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Optional, Dict, List, Any, Callable, Collection, Iterator, Tuple
 from decimal import Decimal
 import random
 from django.conf import settings
 
+from . import metrics
+from .bundles import recommendation_bundles
+from .ranking import cheapest, top_k
+
+
+_catalog_lock = threading.Lock()
+_catalog_tables: 'OrderedDict[Tuple, Tuple]' = OrderedDict()
+
+
+def seeded_random(*parts: Any) -> random.Random:
+    """RNG seeded from the given values, so the same inputs always produce the same data"""
+    digest = hashlib.sha256('|'.join(str(p) for p in parts).encode()).digest()
+    return random.Random(int.from_bytes(digest[:8], 'big'))
+
+
+def get_catalog_table(key: Tuple, build: Callable[[], Tuple]) -> Tuple:
+    """Return the precomputed table for `key`, building it on first use"""
+    with _catalog_lock:
+        table = _catalog_tables.get(key)
+        if table is not None:
+            _catalog_tables.move_to_end(key)
+    metrics.record_cache('mock_catalog', hit=table is not None)
+    if table is not None:
+        return table
+
+    table = build()
+    with _catalog_lock:
+        _catalog_tables[key] = table
+        max_size = getattr(settings, 'MOCK_CATALOG_CACHE_SIZE', 1024)
+        while len(_catalog_tables) > max_size:
+            _catalog_tables.popitem(last=False)
+    return table
+
+
+def mock_location(city: str, *parts: Any, spread: float = 0.05) -> Tuple[float, float]:
+    """Stable mock (lat, lon) near the city's mock centre, different for each `parts`"""
+    center = MockAttractionService().get_coordinates(city)
+    rng = seeded_random('location', city, *parts)
+    return (
+        round(center['lat'] + rng.uniform(-spread, spread), 6),
+        round(center['lon'] + rng.uniform(-spread, spread), 6)
+    )
+
+
+def _materialize(fields: Tuple[str, ...], rows: Tuple[Tuple, ...], limit: Optional[int] = None) -> List[Dict]:
+    """Turn (the first `limit`) compact table rows into fresh dicts the caller is free to modify"""
+    if limit is not None:
+        rows = rows[:max(limit, 0)]
+    return [dict(zip(fields, row)) for row in rows]
+
 
 class MockAttractionService:
     """
@@ -95,33 +153,53 @@ class MockHotelService:
         "Business Center", "Laundry", "Concierge", "Beach Access"
     ]
     
-    def get_hotels(self, city: str, num_results: int = 10) -> List[Dict]:
-        """Generate mock hotel data for a city"""
-        hotels = []
+    HOTEL_FIELDS = (
+        'id', 'name', 'star_rating', 'price_per_night', 'currency', 'rating',
+        'reviews_count', 'amenities', 'address', 'description', 'image_url',
+        'latitude', 'longitude'
+    )
+    
+    def get_hotels(self, city: str, num_results: int = 10, date: str = '', limit: Optional[int] = None) -> List[Dict]:
+        """Get mock hotel data for a city, priced for the given check-in date (cheapest first)"""
+        rows = get_catalog_table(
+            ('hotels', city, date, num_results),
+            lambda: self._build_hotel_table(city, date, num_results)
+        )
+        hotels = _materialize(self.HOTEL_FIELDS, rows, limit)
+        for hotel in hotels:
+            hotel['amenities'] = list(hotel['amenities'])
+        return hotels
+    
+    def _build_hotel_table(self, city: str, date: str, num_results: int) -> Tuple[Tuple, ...]:
+        """Generate the hotel rows for one (city, date), sorted by price"""
+        rng = seeded_random('hotels', city, date)
+        rows = []
         for i, template in enumerate(self.HOTEL_TEMPLATES[:num_results]):
-            # Add some randomness to prices
-            price_variance = random.uniform(0.8, 1.3)
+            # Add some variance to prices
+            price_variance = rng.uniform(0.8, 1.3)
             price = round(template['base_price'] * price_variance, 2)
             
-            # Random amenities based on star rating
+            # Amenities based on star rating
             num_amenities = min(template['stars'] * 2, len(self.AMENITIES))
-            amenities = random.sample(self.AMENITIES, num_amenities)
+            amenities = tuple(rng.sample(self.AMENITIES, num_amenities))
             
-            hotels.append({
-                'id': i + 1,
-                'name': f"{template['name']} {city}",
-                'star_rating': template['stars'],
-                'price_per_night': price,
-                'currency': 'USD',
-                'rating': round(random.uniform(6.0, 9.8), 1),
-                'reviews_count': random.randint(50, 2000),
-                'amenities': amenities,
-                'address': f"{random.randint(1, 999)} Main Street, {city}",
-                'description': f"Experience comfort and hospitality at {template['name']} located in the heart of {city}.",
-                'image_url': f"https://picsum.photos/seed/{city.lower()}{i}/400/300"
-            })
+            rows.append((
+                i + 1,
+                f"{template['name']} {city}",
+                template['stars'],
+                price,
+                'USD',
+                round(rng.uniform(6.0, 9.8), 1),
+                rng.randint(50, 2000),
+                amenities,
+                f"{rng.randint(1, 999)} Main Street, {city}",
+                f"Experience comfort and hospitality at {template['name']} located in the heart of {city}.",
+                f"https://picsum.photos/seed/{city.lower()}{i}/400/300",
+                # Hotels don't move between dates
+                *mock_location(city, 'hotel', i)
+            ))
         
-        return sorted(hotels, key=lambda x: x['price_per_night'])
+        return tuple(top_k(rows, key=lambda row: row[3]))
 
 
 class MockTransportService:
@@ -176,56 +254,89 @@ class MockTransportService:
         {'type': 'bus', 'name': 'Standard Bus', 'base_price': 25, 'duration_range': (300, 840)},
     ]
     
-    def get_transport_options(self, origin: str, destination: str, num_results: int = 8, flights_only: bool = True) -> List[Dict]:
+    TRANSPORT_FIELDS = (
+        'id', 'type', 'category', 'name', 'provider', 'price_per_person', 'currency',
+        'duration_minutes', 'origin', 'destination', 'departure_time', 'description'
+    )
+    
+    LOCAL_TRANSPORT_FIELDS = (
+        'id', 'type', 'category', 'name', 'provider', 'price_per_person', 'total_price',
+        'price_note', 'per_day', 'currency', 'duration_minutes', 'origin', 'destination',
+        'departure_time', 'description'
+    )
+    
+    def get_transport_options(self, origin: str, destination: str, num_results: int = 8, flights_only: bool = True,
+                              date: str = '', limit: Optional[int] = None) -> List[Dict]:
         """
-        Generate mock inter-city transport options from origin to destination.
+        Get mock inter-city transport options from origin to destination.
         
         Args:
             origin: Origin city
             destination: Destination city
             num_results: Max number of results
             flights_only: If True, only return flights. If False, include ground transport.
+            date: Departure date the fares are generated for
+            limit: Only return the `limit` cheapest options
         """
-        options = []
+        rows = get_catalog_table(
+            ('transports', origin, destination, date, num_results),
+            lambda: self._build_transport_table(origin, destination, date, num_results)
+        )
+        return _materialize(self.TRANSPORT_FIELDS, rows, limit)
+    
+    def _build_transport_table(self, origin: str, destination: str, date: str, num_results: int) -> Tuple[Tuple, ...]:
+        """Generate the flight rows for one (origin, destination, date), sorted by price"""
+        rng = seeded_random('transports', origin, destination, date)
+        rows = []
         origin_display = origin if origin else "Your City"
         
         # Primary: Generate flight options
         flight_templates = self.FLIGHT_OPTIONS.copy()
-        random.shuffle(flight_templates)
+        rng.shuffle(flight_templates)
         
         for i, template in enumerate(flight_templates[:num_results]):
-            price_variance = random.uniform(0.7, 1.4)
+            price_variance = rng.uniform(0.7, 1.4)
             price = round(template['base_price'] * price_variance, 2)
             
-            duration = random.randint(template['duration_range'][0], template['duration_range'][1])
+            duration = rng.randint(template['duration_range'][0], template['duration_range'][1])
             
             # Generate departure and arrival times
-            departure_hour = random.randint(6, 20)
-            departure_minute = random.choice([0, 15, 30, 45])
+            departure_hour = rng.randint(6, 20)
+            departure_minute = rng.choice([0, 15, 30, 45])
             
-            options.append({
-                'id': i + 1,
-                'type': template['type'],
-                'category': 'intercity',  # Mark as inter-city transport
-                'name': template['name'],
-                'provider': random.choice(self.INTERCITY_PROVIDERS),
-                'price_per_person': price,
-                'currency': 'USD',
-                'duration_minutes': duration,
-                'origin': origin_display,
-                'destination': destination,
-                'departure_time': f"{departure_hour:02d}:{departure_minute:02d}",
-                'description': f"{template['name']} from {origin_display} to {destination}"
-            })
+            rows.append((
+                i + 1,
+                template['type'],
+                'intercity',  # Mark as inter-city transport
+                template['name'],
+                rng.choice(self.INTERCITY_PROVIDERS),
+                price,
+                'USD',
+                duration,
+                origin_display,
+                destination,
+                f"{departure_hour:02d}:{departure_minute:02d}",
+                f"{template['name']} from {origin_display} to {destination}"
+            ))
         
-        return sorted(options, key=lambda x: x['price_per_person'])
+        return tuple(top_k(rows, key=lambda row: row[5]))
+    
+    def get_local_transport(self, destination: str, num_days: int = 1, num_results: int = 6,
+                            limit: Optional[int] = None) -> List[Dict]:
+        """Get mock local transport options at the destination (cheapest first)"""
+        rows = get_catalog_table(
+            ('local_transports', destination, num_days, num_results),
+            lambda: self._build_local_transport_table(destination, num_days, num_results)
+        )
+        return _materialize(self.LOCAL_TRANSPORT_FIELDS, rows, limit)
     
-    def get_local_transport(self, destination: str, num_days: int = 1, num_results: int = 6) -> List[Dict]:
-        """Generate mock local transport options at the destination"""
-        options = []
+    def _build_local_transport_table(self, destination: str, num_days: int, num_results: int) -> Tuple[Tuple, ...]:
+        """Generate the local transport rows for one destination, sorted by total price"""
+        rng = seeded_random('local_transports', destination)
+        rows = []
         
-        for i, template in enumerate(random.sample(self.LOCAL_TRANSPORT, min(num_results, len(self.LOCAL_TRANSPORT)))):
-            price_variance = random.uniform(0.8, 1.2)
+        for i, template in enumerate(rng.sample(self.LOCAL_TRANSPORT, min(num_results, len(self.LOCAL_TRANSPORT)))):
+            price_variance = rng.uniform(0.8, 1.2)
             base_price = round(template['base_price'] * price_variance, 2)
             
             # Calculate total price based on whether it's per-day pricing
@@ -236,25 +347,25 @@ class MockTransportService:
                 total_price = base_price
                 price_note = "One-time fee"
             
-            options.append({
-                'id': 100 + i,  # Offset ID to avoid conflicts
-                'type': template['type'],
-                'category': 'local',  # Mark as local transport
-                'name': template['name'],
-                'provider': random.choice(self.LOCAL_PROVIDERS),
-                'price_per_person': base_price,
-                'total_price': total_price,
-                'price_note': price_note,
-                'per_day': template['per_day'],
-                'currency': 'USD',
-                'duration_minutes': None,
-                'origin': destination,
-                'destination': destination,
-                'departure_time': None,
-                'description': f"{template['name']} in {destination}"
-            })
+            rows.append((
+                100 + i,  # Offset ID to avoid conflicts
+                template['type'],
+                'local',  # Mark as local transport
+                template['name'],
+                rng.choice(self.LOCAL_PROVIDERS),
+                base_price,
+                total_price,
+                price_note,
+                template['per_day'],
+                'USD',
+                None,
+                destination,
+                destination,
+                None,
+                f"{template['name']} in {destination}"
+            ))
         
-        return sorted(options, key=lambda x: x['total_price'])
+        return tuple(top_k(rows, key=lambda row: row[6]))
 
 
 class TravelRecommendationService:
@@ -269,10 +380,13 @@ class TravelRecommendationService:
     Set API_MODE in your .env file to switch modes.
     """
     
-    def __init__(self):
+    def __init__(self, memo=None):
         self.attraction_service = MockAttractionService()
         self.hotel_service = MockHotelService()
         self.transport_service = MockTransportService()
+        # Optional batching.CallMemo shared by a batch of searches, so that
+        # overlapping queries fetch each section and upstream call only once
+        self.memo = memo
         
         # Get API mode from settings
         self.api_mode = getattr(settings, 'API_MODE', 'mock')
@@ -282,11 +396,14 @@ class TravelRecommendationService:
         if self.api_mode in ['amadeus', 'hybrid']:
             try:
                 from .amadeus_service import AmadeusService
-                self.amadeus_service = AmadeusService()
+                self.amadeus_service = AmadeusService(request_memo=memo)
             except ImportError:
                 print("Warning: AmadeusService not available, falling back to mock data")
                 self.api_mode = 'mock'
     
+    # Result sections, in the order they are fetched and returned
+    SECTIONS = ('hotels', 'transports', 'local_transports', 'attractions')
+    
     def get_recommendations(
         self,
         destination: str,
@@ -295,7 +412,9 @@ class TravelRecommendationService:
         people: int = 1,
         rooms: int = 1,
         origin: str = '',
-        budget: int = None
+        budget: int = None,
+        limit: int = None,
+        fields: Optional[Collection[str]] = None
     ) -> Dict[str, Any]:
         """
         Get comprehensive travel recommendations for a destination.
@@ -303,52 +422,479 @@ class TravelRecommendationService:
         
         Args:
             budget: Maximum total budget in USD. If provided, filters results.
+            limit: Maximum number of hotels, transports and local transports to return.
+            fields: Sections to return ('summary' and/or SECTIONS); all by default.
+                Sections that aren't returned aren't fetched, unless the summary needs them.
+        
+        Sections precomputed for popular searches (see bundles.py) are served
+        from the bundle; summary.precomputed then says which ones and how old.
+        """
+        wanted = set(fields) if fields is not None else {'summary', *self.SECTIONS}
+        query = self._search_query(destination, check_in, check_out, people, rooms, origin, budget, limit)
+        bundle = recommendation_bundles.lookup(query)
+        needed = [name for name in self.SECTIONS if name in wanted or 'summary' in wanted]
+        sections = {name: self._get_section(name, query, bundle) for name in needed}
+        
+        result = {'summary': self._build_summary(query, sections, bundle)} if 'summary' in wanted else {}
+        result.update((name, sections[name]) for name in self.SECTIONS if name in wanted)
+        return result
+    
+    def stream_recommendations(
+        self,
+        destination: str,
+        check_in: str,
+        check_out: str,
+        people: int = 1,
+        rooms: int = 1,
+        origin: str = '',
+        budget: int = None,
+        limit: int = None
+    ) -> Iterator[Tuple[str, Any]]:
+        """
+        Same results as get_recommendations(), yielded as (section, data) pairs.
+        Sections are fetched concurrently and yielded as soon as each one is
+        ready; ('summary', summary) comes last. A section whose source fails is
+        reported as ('section_error', {'section': ..., 'error': ...}) and left empty.
+        """
+        query = self._search_query(destination, check_in, check_out, people, rooms, origin, budget, limit)
+        bundle = recommendation_bundles.lookup(query)
+        sections = {}
+        with ThreadPoolExecutor(max_workers=len(self.SECTIONS), thread_name_prefix='search') as pool:
+            futures = {pool.submit(self._get_section, name, query, bundle): name for name in self.SECTIONS}
+            for future in as_completed(futures):
+                name = futures[future]
+                try:
+                    sections[name] = future.result()
+                except Exception as e:
+                    print(f"Search section '{name}' failed: {e}")
+                    sections[name] = []
+                    yield 'section_error', {'section': name, 'error': str(e)}
+                    continue
+                yield name, sections[name]
+        yield 'summary', self._build_summary(query, sections, bundle)
+    
+    def compare_destinations(
+        self,
+        destinations: List[str],
+        check_in: str,
+        check_out: str,
+        people: int = 1,
+        rooms: int = 1,
+        origin: str = '',
+        budget: int = None
+    ) -> Dict[str, Any]:
+        """
+        Side-by-side trip costs from one origin to several destinations.
+        
+        Each destination's price_breakdown is the one get_recommendations()
+        would report, computed from the cheapest option of every section only.
+        Destinations are priced concurrently with one shared memo, so origin
+        lookups are resolved once. A destination that fails is reported with
+        an `error` instead of prices.
+        
+        Returns:
+            {'trip_details': ..., 'comparison': rows sorted by total_min (failures last)}
+        """
+        # Shared by every destination; only the cheapest option of each section is needed
+        shared = self._search_query('', check_in, check_out, people, rooms, origin, budget, 1)
+        
+        def price(destination):
+            query = dict(shared, destination=destination)
+            sections = {name: self._get_section(name, query) for name in self.SECTIONS}
+            summary = self._build_summary(query, sections)
+            hotel, transport = sections['hotels'], sections['transports']
+            return {
+                'destination': destination,
+                **summary['price_breakdown'],
+                'cheapest_hotel': hotel[0]['name'] if hotel else None,
+                'cheapest_transport': transport[0]['name'] if transport else None,
+                'within_budget': summary['price_breakdown']['total_min'] <= budget if budget else None,
+            }
+        
+        def safe_price(destination):
+            try:
+                return price(destination)
+            except Exception as e:
+                print(f"Comparison failed for {destination}: {e}")
+                return {'destination': destination, 'error': str(e)}
+        
+        workers = min(getattr(settings, 'SEARCH_BATCH_MAX_WORKERS', 4), max(len(destinations), 1))
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='compare') as pool:
+            rows = list(pool.map(safe_price, destinations))
+        rows.sort(key=lambda row: ('error' in row, row.get('total_min', 0)))
+        
+        return {
+            'trip_details': {
+                'origin': origin if origin else 'Not specified',
+                'check_in': check_in,
+                'check_out': check_out,
+                'nights': shared['nights'],
+                'people': people,
+                'rooms': rooms,
+                'budget': budget,
+            },
+            'comparison': rows,
+            'data_source': self.api_mode,
+        }
+    
+    def multi_city_trip(
+        self,
+        stops: List[Dict[str, Any]],
+        start_date: str,
+        people: int = 1,
+        rooms: int = 1,
+        origin: str = '',
+        budget: int = None,
+        return_to_origin: bool = True,
+        limit: int = 5
+    ) -> Dict[str, Any]:
+        """
+        Multi-city trip: origin -> stop 1 -> ... -> stop N (-> origin).
+        
+        Args:
+            stops: [{'city': ..., 'nights': ...}, ...] in travel order
+            start_date: Departure date of the first leg (YYYY-MM-DD)
+            limit: Options returned per leg and per stay
+        
+        Every leg's transport and every stop's hotels, local transport and
+        attractions are fetched concurrently, so latency follows the slowest
+        fetch rather than the number of legs. Fetches go through the per-city
+        catalogs and the service memo like a regular search.
+        
+        Returns:
+            {'itinerary': legs and stays in travel order, 'cost_breakdown': ...,
+             'trip_details': ...}
+        """
+        from datetime import datetime, timedelta
+        
+        # Dates of every stay and leg, in travel order
+        day = datetime.strptime(start_date, '%Y-%m-%d').date()
+        stays, legs = [], []
+        previous = origin
+        for stop in stops:
+            check_out = day + timedelta(days=stop['nights'])
+            legs.append({'from': previous, 'to': stop['city'], 'date': str(day), 'next_date': str(check_out)})
+            stays.append({'city': stop['city'], 'check_in': str(day), 'check_out': str(check_out),
+                          'nights': stop['nights']})
+            previous, day = stop['city'], check_out
+        if return_to_origin:
+            legs.append({'from': previous, 'to': origin, 'date': str(day), 'next_date': str(day)})
+        
+        def leg_transports(leg):
+            return self._shared(
+                ('transports', leg['from'], leg['to'], leg['date'], leg['next_date'], people, limit),
+                lambda: self._get_transports(leg['from'], leg['to'], leg['date'], leg['next_date'], people, limit=limit)
+            )
+        
+        def stay_sections(stay):
+            query = self._search_query(stay['city'], stay['check_in'], stay['check_out'], people, rooms,
+                                       origin, None, limit)
+            return {name: self._get_section(name, query) for name in ('hotels', 'local_transports', 'attractions')}
+        
+        workers = max(len(legs) + len(stays), 1)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='multi-city') as pool:
+            leg_futures = [pool.submit(leg_transports, leg) for leg in legs]
+            stay_futures = [pool.submit(stay_sections, stay) for stay in stays]
+            leg_options = [future.result() for future in leg_futures]
+            stay_options = [future.result() for future in stay_futures]
+        
+        itinerary = []
+        transport_total = hotel_total = local_transport_total = attractions_total = 0
+        for i, leg in enumerate(legs):
+            transports = leg_options[i]
+            leg_cost = transports[0]['price_per_person'] * people if transports else 0
+            transport_total += leg_cost
+            itinerary.append({
+                'type': 'leg',
+                'from': leg['from'] if leg['from'] else 'Not specified',
+                'to': leg['to'] if leg['to'] else 'Not specified',
+                'date': leg['date'],
+                'transports': transports,
+                'cost_min': round(leg_cost, 2),
+            })
+            if i < len(stays):
+                stay, sections = stays[i], stay_options[i]
+                hotels, local_transports = sections['hotels'], sections['local_transports']
+                stay_hotel = hotels[0]['price_per_night'] * stay['nights'] * rooms if hotels else 0
+                stay_local = local_transports[0].get('total_price', 0) if local_transports else 0
+                stay_attractions = sum(a['price_per_person'] for a in sections['attractions'][:5]) * people
+                hotel_total += stay_hotel
+                local_transport_total += stay_local
+                attractions_total += stay_attractions
+                itinerary.append({
+                    'type': 'stay',
+                    **stay,
+                    'coordinates': self.attraction_service.get_coordinates(stay['city']),
+                    **sections,
+                    'cost_min': round(stay_hotel + stay_local + stay_attractions, 2),
+                })
+        
+        total = round(hotel_total + transport_total + local_transport_total + attractions_total, 2)
+        return {
+            'trip_details': {
+                'origin': origin if origin else 'Not specified',
+                'cities': [stay['city'] for stay in stays],
+                'start_date': start_date,
+                'end_date': str(day),
+                'nights': sum(stay['nights'] for stay in stays),
+                'people': people,
+                'rooms': rooms,
+                'budget': budget,
+                'return_to_origin': return_to_origin,
+            },
+            'itinerary': itinerary,
+            'cost_breakdown': {
+                'hotel_min': round(hotel_total, 2),
+                'transport_min': round(transport_total, 2),
+                'local_transport_min': round(local_transport_total, 2),
+                'attractions_estimated': attractions_total,
+                'total_min': total,
+                'currency': 'USD',
+                'within_budget': total <= budget if budget else None,
+            },
+            'data_source': self.api_mode,
+        }
+    
+    def flexible_date_search(
+        self,
+        destination: str,
+        date_from: str,
+        date_to: str,
+        nights: int,
+        people: int = 1,
+        rooms: int = 1,
+        origin: str = '',
+        budget: int = None,
+        limit: int = 10
+    ) -> Dict[str, Any]:
         """
+        Price every `nights`-night stay between date_from and date_to (last check-out).
+        
+        Hotels are fetched once per night of the range and window stays are
+        summed from the nightly prices (flexible_dates), so overlapping
+        windows share their nights; transport is priced per departure date
+        and local transport / attractions once for the whole search.
+        
+        Returns:
+            {'summary': ..., 'cheapest': the `limit` cheapest windows,
+             'calendar': every window in date order, each with its rank}
+        """
+        from datetime import datetime, timedelta
+        from .flexible_dates import night_dates, nightly_price_matrix, window_sums, cheapest_per_window
+        
+        first = datetime.strptime(date_from, '%Y-%m-%d').date()
+        last = datetime.strptime(date_to, '%Y-%m-%d').date()
+        night_list = night_dates(first, last)
+        starts = night_list[:max(len(night_list) - nights + 1, 0)]
+        
+        def hotels_for(night):
+            check_in, check_out = str(night), str(night + timedelta(days=1))
+            return self._shared(('hotels', destination, check_in, check_out, people, rooms, None),
+                                lambda: self._get_hotels(destination, check_in, check_out, people, rooms))
+        
+        def transport_for(start):
+            check_in, check_out = str(start), str(start + timedelta(days=nights))
+            return self._shared(('transports', origin, destination, check_in, check_out, people, 1),
+                                lambda: self._get_transports(origin, destination, check_in, check_out, people, limit=1))
+        
+        workers = getattr(settings, 'FLEXIBLE_SEARCH_MAX_WORKERS', 4)
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='flexible-search') as pool:
+            hotels_by_night = pool.map(hotels_for, night_list)
+            transports_by_start = pool.map(transport_for, starts)
+            hotels, prices = nightly_price_matrix(list(hotels_by_night))
+            transports_by_start = list(transports_by_start)
+        
+        hotel_totals, hotel_rows = cheapest_per_window(window_sums(prices, nights))
+        local_transports = self.transport_service.get_local_transport(destination, num_days=nights, limit=1)
+        local_transport_total = local_transports[0].get('total_price', 0) if local_transports else 0
+        attractions_total = sum(a['price_per_person'] for a in self._generate_mock_attractions(destination)[:5]) * people
+        
+        calendar = []
+        for i, start in enumerate(starts):
+            hotel = hotels[hotel_rows[i]] if hotel_rows[i] >= 0 else None
+            transport = transports_by_start[i][0] if transports_by_start[i] else None
+            hotel_total = round(float(hotel_totals[i]) * rooms, 2) if hotel else None
+            transport_total = transport['price_per_person'] * people if transport else 0
+            total = (round(hotel_total + transport_total + local_transport_total + attractions_total, 2)
+                     if hotel else None)
+            calendar.append({
+                'check_in': str(start),
+                'check_out': str(start + timedelta(days=nights)),
+                'rank': None,
+                'total': total,
+                'hotel_total': hotel_total,
+                'transport_total': transport_total,
+                'local_transport_total': local_transport_total,
+                'attractions_estimated': attractions_total,
+                'hotel': {
+                    'id': hotel['id'],
+                    'name': hotel['name'],
+                    'average_price_per_night': round(float(hotel_totals[i]) / nights, 2),
+                } if hotel else None,
+                'transport': {
+                    'id': transport['id'],
+                    'name': transport['name'],
+                    'provider': transport.get('provider'),
+                    'price_per_person': transport['price_per_person'],
+                } if transport else None,
+                'within_budget': total <= budget if budget and total is not None else None,
+            })
+        
+        # Windows without any hotel for all their nights can't be booked and aren't ranked
+        ranked = sorted((w for w in calendar if w['total'] is not None), key=lambda w: (w['total'], w['check_in']))
+        for rank, window in enumerate(ranked, 1):
+            window['rank'] = rank
+        
+        return {
+            'summary': {
+                'origin': origin if origin else 'Not specified',
+                'destination': destination,
+                'date_from': date_from,
+                'date_to': date_to,
+                'nights': nights,
+                'people': people,
+                'rooms': rooms,
+                'budget': budget,
+                'windows_evaluated': len(calendar),
+                'windows_available': len(ranked),
+                'nights_priced': len(night_list),
+                'hotels_compared': len(hotels),
+                'currency': 'USD',
+                'data_source': self.api_mode,
+            },
+            'cheapest': ranked[:limit] if limit is not None else ranked,
+            'calendar': calendar,
+        }
+    
+    def _search_query(self, destination: str, check_in: str, check_out: str, people: int, rooms: int,
+                      origin: str, budget: Optional[int], limit: Optional[int]) -> Dict[str, Any]:
+        """Normalized search parameters shared by the section fetchers"""
         from datetime import datetime
         
         # Calculate nights
         check_in_date = datetime.strptime(check_in, '%Y-%m-%d')
         check_out_date = datetime.strptime(check_out, '%Y-%m-%d')
-        nights = (check_out_date - check_in_date).days
-        
-        # Get coordinates for the destination (mock)
-        coords = self.attraction_service.get_coordinates(destination)
-        
-        # Get hotels based on API mode
-        hotels = self._get_hotels(destination, check_in, check_out, people, rooms)
         
-        # Get inter-city transport (flights, trains, buses) based on API mode
-        transports = self._get_transports(origin, destination, check_in, check_out, people)
-        
-        # Get local transport options (car rental, taxi, metro) at destination
-        local_transports = self.transport_service.get_local_transport(destination, num_days=nights)
+        return {
+            'destination': destination,
+            'origin': origin,
+            'check_in': check_in,
+            'check_out': check_out,
+            'nights': (check_out_date - check_in_date).days,
+            'people': people,
+            'rooms': rooms,
+            'budget': budget,
+            'limit': limit,
+            # Budget filtering needs the full lists; otherwise only fetch the top `limit`
+            'fetch_limit': None if budget and budget > 0 else limit,
+        }
+    
+    def precompute_sections(self, destination: str, check_in: str, check_out: str, people: int, rooms: int,
+                            origins: Collection[str] = ('',)) -> Tuple[Dict[str, List[Dict]], Dict[str, List[Dict]]]:
+        """
+        Unfiltered sections of a search, for recommendation bundles.
         
-        # Generate mock attractions
-        attractions = self._generate_mock_attractions(destination)
+        Returns:
+            ({section: rows} for the origin-independent sections, {origin: transports})
+        """
+        query = self._search_query(destination, check_in, check_out, people, rooms, '', None, None)
+        sections = {name: self._get_section(name, query) for name in self.SECTIONS if name != 'transports'}
+        transports = {origin: self._get_section('transports', dict(query, origin=origin)) for origin in origins}
+        return sections, transports
+    
+    def _get_section(self, name: str, query: Dict[str, Any], bundle=None) -> List[Dict]:
+        """Fetch one result section (from `bundle` if it has it) and apply the budget filter to it"""
+        budget, limit = query['budget'], query['limit']
+        has_budget = bool(budget and budget > 0)
         
-        # Apply budget filter if specified
-        if budget and budget > 0:
+        if name == 'hotels':
+            # Get hotels based on API mode
+            hotels = self._source(
+                bundle, query,
+                ('hotels', query['destination'], query['check_in'], query['check_out'],
+                 query['people'], query['rooms'], query['fetch_limit']),
+                lambda: self._get_hotels(query['destination'], query['check_in'], query['check_out'],
+                                         query['people'], query['rooms'], limit=query['fetch_limit'])
+            )
+            if not has_budget:
+                return hotels
             # Filter hotels: total cost (per night * nights * rooms) must be within budget portion
             hotel_budget = budget * 0.6  # Allocate 60% of budget to hotels (increased from 50%)
-            transport_budget = budget * 0.3  # Allocate 30% to transport
-            
             # Filter but keep at least some hotels
-            filtered_hotels = [h for h in hotels if h['price_per_night'] * nights * rooms <= hotel_budget]
+            filtered_hotels = [h for h in hotels
+                               if h['price_per_night'] is not None
+                               and h['price_per_night'] * query['nights'] * query['rooms'] <= hotel_budget]
             if filtered_hotels:
-                hotels = filtered_hotels
-            # If no hotels match budget, keep all but sort by price
-            else:
-                hotels = sorted(hotels, key=lambda x: x['price_per_night'])
-            
-            filtered_transports = [t for t in transports if t['price_per_person'] * people <= transport_budget]
+                return filtered_hotels[:limit] if limit is not None else filtered_hotels
+            # If no hotels match budget, keep the cheapest ones
+            return cheapest(hotels, 'price_per_night', limit)
+        
+        if name == 'transports':
+            # Get inter-city transport (flights, trains, buses) based on API mode
+            transports = self._source(
+                bundle, query,
+                ('transports', query['origin'], query['destination'], query['check_in'],
+                 query['check_out'], query['people'], query['fetch_limit']),
+                lambda: self._get_transports(query['origin'], query['destination'], query['check_in'],
+                                             query['check_out'], query['people'], limit=query['fetch_limit'])
+            )
+            if not has_budget:
+                return transports
+            transport_budget = budget * 0.3  # Allocate 30% to transport
+            filtered_transports = [t for t in transports if t['price_per_person'] * query['people'] <= transport_budget]
             if filtered_transports:
                 transports = filtered_transports
-            
+            return transports[:limit] if limit is not None else transports
+        
+        if name == 'local_transports':
+            # Get local transport options (car rental, taxi, metro) at destination
+            local_transports = self._source(
+                bundle, query,
+                ('local_transports', query['destination'], query['nights'], query['fetch_limit']),
+                lambda: self.transport_service.get_local_transport(
+                    query['destination'], num_days=query['nights'], limit=query['fetch_limit']
+                )
+            )
+            if not has_budget:
+                return local_transports
             # Filter local transport too
             local_transport_budget = budget * 0.1  # 10% for local transport
             filtered_local = [lt for lt in local_transports if lt.get('total_price', 0) <= local_transport_budget]
             if filtered_local:
                 local_transports = filtered_local
+            return local_transports[:limit] if limit is not None else local_transports
+        
+        if name == 'attractions':
+            # Generate mock attractions
+            return self._source(bundle, query, ('attractions', query['destination']),
+                                 lambda: self._generate_mock_attractions(query['destination']))
+        
+        raise ValueError(f'Unknown section: {name}')
+    
+    def _source(self, bundle, query: Dict[str, Any], key: Tuple, fetch: Callable[[], List[Dict]]) -> List[Dict]:
+        """Rows of the section key[0]: from the bundle if it has them, else fetch() through the memo"""
+        name = key[0]
+        if bundle is not None and bundle.has_section(name, query['origin']):
+            # Bundles hold full cheapest-first lists, whose first `fetch_limit`
+            # rows are what a live fetch with that limit returns
+            return bundle.section(name, query['origin'], None if name == 'attractions' else query['fetch_limit'])
+        return self._shared(key, fetch)
+    
+    def _shared(self, key: Tuple, fetch: Callable[[], List[Dict]]) -> List[Dict]:
+        """Run fetch() once per key when a memo is set (results are shared, not copied)"""
+        if self.memo is None:
+            return fetch()
+        return self.memo.call(key, fetch)
+    
+    def _build_summary(self, query: Dict[str, Any], sections: Dict[str, List[Dict]], bundle=None) -> Dict[str, Any]:
+        """Trip summary and cheapest-option price breakdown for the fetched sections"""
+        destination, origin, budget = query['destination'], query['origin'], query['budget']
+        nights, people, rooms = query['nights'], query['people'], query['rooms']
+        hotels, transports = sections['hotels'], sections['transports']
+        local_transports, attractions = sections['local_transports'], sections['attractions']
+        
+        # Get coordinates for the destination (mock)
+        coords = self.attraction_service.get_coordinates(destination)
         
         # Calculate price summary
         cheapest_hotel = hotels[0] if hotels else None
@@ -360,7 +906,11 @@ class TravelRecommendationService:
         local_transport_total = cheapest_local.get('total_price', 0) if cheapest_local else 0
         attractions_total = sum(a['price_per_person'] for a in attractions[:5]) * people
         
-        summary = {
+        precomputed = None
+        if bundle is not None:
+            precomputed = bundle.freshness([name for name in self.SECTIONS if bundle.has_section(name, origin)])
+        
+        return {
             'origin': {
                 'name': origin if origin else 'Not specified'
             },
@@ -370,8 +920,8 @@ class TravelRecommendationService:
             },
             'trip_details': {
                 'origin': origin if origin else 'Not specified',
-                'check_in': check_in,
-                'check_out': check_out,
+                'check_in': query['check_in'],
+                'check_out': query['check_out'],
                 'nights': nights,
                 'people': people,
                 'rooms': rooms,
@@ -392,32 +942,29 @@ class TravelRecommendationService:
                 'attractions': len(attractions)
             },
             'data_source': self.api_mode,  # Tell frontend which data source was used
+            'precomputed': precomputed,  # Sections served from a precomputed bundle, and its age
             'budget_applied': budget is not None and budget > 0
         }
-        
-        return {
-            'summary': summary,
-            'hotels': hotels,
-            'transports': transports,  # Inter-city transport (flights, trains, buses)
-            'local_transports': local_transports,  # Local transport (car rental, taxi, metro)
-            'attractions': attractions
-        }
     
-    def _get_hotels(self, city: str, check_in: str, check_out: str, adults: int, rooms: int) -> List[Dict]:
-        """Get hotels from configured source"""
+    def _get_hotels(self, city: str, check_in: str, check_out: str, adults: int, rooms: int,
+                    limit: int = None) -> List[Dict]:
+        """Get hotels from configured source, cheapest first"""
         if self.api_mode == 'amadeus' and self.amadeus_service and self.amadeus_service.is_configured():
             try:
-                hotels = self.amadeus_service.search_hotels(city, check_in, check_out, adults, rooms)
+                hotels = self.amadeus_service.search_hotels(city, check_in, check_out, adults, rooms, limit=limit)
                 if hotels:
                     return hotels
+                metrics.inc('mock_fallback_total', {'source': 'hotels', 'reason': 'empty'})
             except Exception as e:
                 print(f"Amadeus hotel search failed, falling back to mock: {e}")
+                metrics.inc('mock_fallback_total', {'source': 'hotels', 'reason': 'error'})
         
         # Fallback to mock data
-        return self.hotel_service.get_hotels(city)
+        return self.hotel_service.get_hotels(city, date=check_in, limit=limit)
     
-    def _get_transports(self, origin: str, destination: str, departure_date: str, return_date: str, adults: int) -> List[Dict]:
-        """Get transport options from configured source"""
+    def _get_transports(self, origin: str, destination: str, departure_date: str, return_date: str, adults: int,
+                        limit: int = None) -> List[Dict]:
+        """Get transport options from configured source (flights first, cheapest first)"""
         if self.api_mode in ['amadeus', 'hybrid'] and self.amadeus_service and self.amadeus_service.is_configured():
             try:
                 flights = self.amadeus_service.search_flights(
@@ -425,19 +972,25 @@ class TravelRecommendationService:
                     destination,
                     departure_date,
                     return_date,
-                    adults
+                    adults,
+                    limit=limit
                 )
                 if flights:
                     # Add mock ground transport options to flight results
-                    ground_transport = self.transport_service.get_transport_options(origin, destination, num_results=3)
+                    ground_transport = self.transport_service.get_transport_options(
+                        origin, destination, num_results=3, date=departure_date
+                    )
                     # Filter out flights from mock to avoid duplicates
                     ground_transport = [t for t in ground_transport if t['type'] != 'flight']
-                    return flights + ground_transport
+                    transports = flights + ground_transport
+                    return transports[:limit] if limit is not None else transports
+                metrics.inc('mock_fallback_total', {'source': 'transports', 'reason': 'empty'})
             except Exception as e:
                 print(f"Amadeus flight search failed, falling back to mock: {e}")
+                metrics.inc('mock_fallback_total', {'source': 'transports', 'reason': 'error'})
         
         # Fallback to mock data
-        return self.transport_service.get_transport_options(origin, destination)
+        return self.transport_service.get_transport_options(origin, destination, date=departure_date, limit=limit)
     
     def _map_kinds_to_category(self, kinds: str) -> str:
         """Map OpenTripMap kinds to our category choices"""
@@ -461,8 +1014,22 @@ class TravelRecommendationService:
         else:
             return 'landmark'
     
+    ATTRACTION_FIELDS = (
+        'id', 'name', 'category', 'price_per_person', 'currency', 'rating', 'description',
+        'latitude', 'longitude'
+    )
+    
     def _generate_mock_attractions(self, destination: str) -> List[Dict]:
-        """Generate mock attractions when API is unavailable"""
+        """Get mock attractions when API is unavailable"""
+        rows = get_catalog_table(
+            ('attractions', destination),
+            lambda: self._build_attraction_table(destination)
+        )
+        return _materialize(self.ATTRACTION_FIELDS, rows)
+    
+    def _build_attraction_table(self, destination: str) -> Tuple[Tuple, ...]:
+        """Generate the attraction rows for one destination"""
+        rng = seeded_random('attractions', destination)
         templates = [
             {'name': 'City Museum', 'category': 'museum', 'price': 15},
             {'name': 'Central Park', 'category': 'nature', 'price': 0},
@@ -476,16 +1043,16 @@ class TravelRecommendationService:
             {'name': 'Food Street', 'category': 'food', 'price': 0},
         ]
         
-        attractions = []
-        for i, template in enumerate(templates):
-            attractions.append({
-                'id': f'mock_{i}',
-                'name': f"{destination} {template['name']}",
-                'category': template['category'],
-                'price_per_person': template['price'],
-                'currency': 'USD',
-                'rating': round(random.uniform(7.0, 9.5), 1),
-                'description': f"Visit the famous {template['name']} in {destination}"
-            })
-        
-        return attractions
+        return tuple(
+            (
+                f'mock_{i}',
+                f"{destination} {template['name']}",
+                template['category'],
+                template['price'],
+                'USD',
+                round(rng.uniform(7.0, 9.5), 1),
+                f"Visit the famous {template['name']} in {destination}",
+                *mock_location(destination, 'attraction', i)
+            )
+            for i, template in enumerate(templates)
+        )
@@ -0,0 +1,18 @@
+"""
+Model signal receivers, connected in RecommendationsConfig.ready().
+"""
+
+from django.db.models.signals import m2m_changed, post_delete, post_save
+
+from .featured import invalidate_featured
+from .models import Attraction, Destination, Hotel, Transport, TravelPackage
+
+
+# Featured packages nest their destination, hotels, transports and attractions
+for model in (TravelPackage, Destination, Hotel, Transport, Attraction):
+    post_save.connect(invalidate_featured, sender=model, dispatch_uid=f'featured_save_{model.__name__}')
+    post_delete.connect(invalidate_featured, sender=model, dispatch_uid=f'featured_delete_{model.__name__}')
+
+for relation in (TravelPackage.hotels, TravelPackage.transports, TravelPackage.attractions):
+    m2m_changed.connect(invalidate_featured, sender=relation.through,
+                        dispatch_uid=f'featured_m2m_{relation.field.name}')
@@ -0,0 +1,600 @@
+import datetime
+import math
+import random
+from datetime import timedelta
+from decimal import Decimal
+from itertools import combinations, permutations
+
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+
+from .ai_planner_service import TravelPlannerService
+from .alternatives import pareto_alternatives
+from .analytics import prune_search_history, rollup_searches
+from .hotel_scoring import HotelColumns, rank_hotels
+from .models import Destination, Hotel, RollupCheckpoint, SavedPlan, SearchHistory, SearchRollup
+from .plan_optimizer import BudgetPlanOptimizer
+from .ranking import top_k
+from .renderers import FastJSONRenderer
+from .routing import distance_matrix, order_stops, plan_day_routes
+from .trending import MAX_EXPONENT, TrendingDetector
+
+
+AMENITIES = ['Free WiFi', 'Breakfast', 'Pool', 'Spa', 'Gym', 'Concierge', 'Fine Dining', 'Kitchen',
+             'Comfortable Rooms', 'Clean Rooms', 'Central Location', 'Social Areas', 'Tours', 'Parking']
+
+
+def legacy_rank_hotels(hotels, hotel_preference, hotel_pref_config, limit=None):
+    """The per-hotel scoring loop rank_hotels() replaced"""
+    price_min, price_max = hotel_pref_config.get('price_range', (0, 1000))
+    scored_hotels = []
+    for hotel in hotels:
+        price = hotel.get('price_per_night', 0) or 0
+        score = 0
+        if price_min <= price <= price_max:
+            score += 50
+        elif price < price_min:
+            score += 30
+        else:
+            score += max(0, 20 - (price - price_max) / 50)
+        score += (hotel.get('rating', 0) or 0) * 5
+        hotel_amenities = set(hotel.get('amenities', []) or [])
+        preferred_amenities = set(hotel_pref_config.get('amenities', []) or [])
+        score += len(hotel_amenities & preferred_amenities) * 5
+        stars = hotel.get('stars', 3) or hotel.get('star_rating', 3) or 3
+        if hotel_preference == 'luxury' and stars >= 5:
+            score += 20
+        elif hotel_preference == 'boutique' and 3 <= stars <= 4:
+            score += 15
+        elif hotel_preference == 'mid-range' and 3 <= stars <= 4:
+            score += 15
+        elif hotel_preference == 'budget' and stars <= 3:
+            score += 15
+        elif hotel_preference == 'hostel' and stars <= 2:
+            score += 15
+        scored_hotels.append((score, hotel))
+    best = top_k(scored_hotels, limit, key=lambda x: x[0], reverse=True)
+    return [hotel for score, hotel in best]
+
+
+def make_hotels(count, seed):
+    """Hotels with missing fields and few distinct values, so many scores tie"""
+    rng = random.Random(seed)
+    hotels = []
+    for i in range(count):
+        hotel = {
+            'name': f'Hotel {i}',
+            'price_per_night': rng.choice([rng.choice([25, 60, 120, 250, 500]), round(rng.uniform(20, 900), 2),
+                                           None, 0]),
+            'rating': rng.choice([4.0, 4.5, round(rng.uniform(1, 5), 1), None]),
+            'amenities': rng.sample(AMENITIES, rng.randint(0, 4)),
+        }
+        if rng.random() < 0.8:
+            hotel['stars'] = rng.choice([0, 1, 2, 3, 4, 5, None])
+        if rng.random() < 0.3:
+            hotel['star_rating'] = rng.randint(1, 5)
+        if rng.random() < 0.1:
+            del hotel['amenities']
+        hotels.append(hotel)
+    return hotels
+
+
+class RankHotelsTests(SimpleTestCase):
+    """rank_hotels() must keep the legacy loop's order exactly, ties included"""
+
+    def assertSameRanking(self, hotels, preference, config, limit):
+        expected = legacy_rank_hotels(hotels, preference, config, limit)
+        actual = rank_hotels(hotels, preference, config, limit)
+        self.assertEqual([id(h) for h in actual], [id(h) for h in expected],
+                         f'{preference} limit={limit}')
+
+    def test_matches_legacy_loop(self):
+        for seed in range(5):
+            hotels = make_hotels(300, seed)
+            for preference, config in TravelPlannerService.HOTEL_PREFERENCES.items():
+                for limit in (None, 1, 5, 10, 299, 300, 1000):
+                    self.assertSameRanking(hotels, preference, config, limit)
+
+    def test_ties_keep_input_order(self):
+        # Identical hotels score the same; a limit inside the tie keeps the earliest ones
+        hotels = [{'name': f'Twin {i}', 'price_per_night': 100, 'rating': 4, 'stars': 3} for i in range(6)]
+        hotels.insert(3, {'name': 'Better', 'price_per_night': 100, 'rating': 5, 'stars': 3})
+        config = TravelPlannerService.HOTEL_PREFERENCES['mid-range']
+        for limit in (None, 1, 2, 4, 7):
+            self.assertSameRanking(hotels, 'mid-range', config, limit)
+        self.assertEqual([h['name'] for h in rank_hotels(hotels, 'mid-range', config, 3)],
+                         ['Better', 'Twin 0', 'Twin 1'])
+
+    def test_empty_and_non_positive_limit(self):
+        config = TravelPlannerService.HOTEL_PREFERENCES['budget']
+        hotels = make_hotels(10, 0)
+        self.assertEqual(rank_hotels([], 'budget', config), [])
+        self.assertEqual(rank_hotels(hotels, 'budget', config, 0), [])
+        self.assertSameRanking(hotels, 'budget', config, 0)
+
+    def test_prebuilt_columns_are_reused(self):
+        hotels = make_hotels(200, 6)
+        columns = HotelColumns(hotels)
+        for preference, config in TravelPlannerService.HOTEL_PREFERENCES.items():
+            for limit in (None, 1, 10):
+                self.assertEqual([id(h) for h in rank_hotels(columns, preference, config, limit)],
+                                 [id(h) for h in rank_hotels(hotels, preference, config, limit)])
+        self.assertEqual(rank_hotels(HotelColumns([]), 'budget', TravelPlannerService.HOTEL_PREFERENCES['budget']), [])
+
+
+class BudgetPlanOptimizerTests(SimpleTestCase):
+    """Preference-first hotel choice and the attraction knapsack"""
+
+    HOTELS = [
+        {'name': 'Palace', 'price_per_night': 400, 'rating': 4.0, 'stars': 5, 'amenities': ['Spa', 'Pool']},
+        {'name': 'Grand', 'price_per_night': 320, 'rating': 4.2, 'stars': 5, 'amenities': ['Spa']},
+        {'name': 'Express', 'price_per_night': 85, 'rating': 4.9, 'stars': 3, 'amenities': []},
+        {'name': 'Hostel', 'price_per_night': 30, 'rating': 4.6, 'stars': 2, 'amenities': []},
+    ]
+
+    def solve(self, preference, budget, num_days=3):
+        config = TravelPlannerService.HOTEL_PREFERENCES[preference]
+        hotels = rank_hotels(self.HOTELS, preference, config)
+        return BudgetPlanOptimizer(budget=budget, num_days=num_days, num_people=1).solve(
+            hotels, [], [], hotel_scores=HotelColumns(hotels).score(preference, config)
+        )
+
+    def test_preference_beats_rating_when_it_fits(self):
+        # Express has the best rating, but a luxury stay that fits the budget wins
+        self.assertEqual(self.solve('luxury', 3000)['hotel']['name'], 'Palace')
+        self.assertEqual(self.solve('hostel', 3000)['hotel']['name'], 'Hostel')
+        self.assertEqual(self.solve('budget', 3000)['hotel']['name'], 'Hostel')
+
+    def test_widens_to_the_next_match_only_when_nothing_fits(self):
+        self.assertEqual(self.solve('luxury', 1000)['hotel']['name'], 'Grand')
+        self.assertEqual(self.solve('luxury', 500)['hotel']['name'], 'Express')
+        solution = self.solve('luxury', 50)
+        self.assertFalse(solution['feasible'])
+        self.assertEqual(solution['hotel']['name'], 'Hostel')
+
+    def test_knapsack_reconstruction_matches_brute_force(self):
+        rng = random.Random(7)
+        for _ in range(20):
+            attractions = [
+                {'name': f'A{i}', 'rating': rng.choice([3.0, 3.5, 4.0, 4.5, 5.0]),
+                 'price_per_person': rng.choice([0, 5, 10, 20, 35, 50, 80])}
+                for i in range(9)
+            ]
+            budget = rng.choice([40, 75, 120, 200])
+            num_days = rng.choice([1, 2, 3])
+            solution = BudgetPlanOptimizer(budget=budget, num_days=num_days, num_people=1).solve([], [], attractions)
+
+            best = max(
+                sum(a['rating'] for a in chosen)
+                for count in range(num_days + 1)
+                for chosen in combinations(attractions, count)
+                if sum(a['price_per_person'] for a in chosen) <= budget
+            )
+            chosen = solution['attractions']
+            self.assertTrue(solution['optimal'])
+            self.assertLessEqual(len(chosen), num_days)
+            self.assertLessEqual(sum(a['price_per_person'] for a in chosen), budget)
+            self.assertAlmostEqual(sum(a['rating'] for a in chosen), best)
+            self.assertAlmostEqual(solution['value'], best, places=3)
+
+
+class RoutingTests(SimpleTestCase):
+    """Day routing: every stop visited once, tours as short as brute force on small inputs"""
+
+    ORIGIN = (48.8566, 2.3522)
+
+    def random_stops(self, rng, count):
+        return [(self.ORIGIN[0] + rng.uniform(-0.05, 0.05), self.ORIGIN[1] + rng.uniform(-0.08, 0.08))
+                for _ in range(count)]
+
+    def round_trip(self, order, stops):
+        points = [self.ORIGIN] + [stops[i] for i in order] + [self.ORIGIN]
+        dist = distance_matrix(np.array(points))
+        return sum(dist[k, k + 1] for k in range(len(points) - 1))
+
+    def test_order_stops_is_a_permutation_with_its_length(self):
+        rng = random.Random(1)
+        for count in (0, 1, 2, 3, 8, 40):
+            stops = self.random_stops(rng, count)
+            order, distance = order_stops(self.ORIGIN, stops)
+            self.assertEqual(sorted(order), list(range(count)))
+            self.assertAlmostEqual(distance, self.round_trip(order, stops) if count else 0.0, places=6)
+
+    def test_small_tours_match_brute_force(self):
+        rng = random.Random(2)
+        for _ in range(15):
+            stops = self.random_stops(rng, 6)
+            _, distance = order_stops(self.ORIGIN, stops)
+            best = min(self.round_trip(order, stops) for order in permutations(range(len(stops))))
+            # 2-opt is a heuristic; on six stops it should stay within a few percent of optimal
+            self.assertLessEqual(distance, best * 1.05)
+
+    def test_points_on_a_circle_are_visited_around_it(self):
+        # With all points on a circle the only uncrossed tour is the circle itself
+        scale = math.cos(math.radians(self.ORIGIN[0]))
+        circle = [(self.ORIGIN[0] + 0.05 * math.sin(2 * math.pi * k / 12),
+                   self.ORIGIN[1] + 0.05 * math.cos(2 * math.pi * k / 12) / scale) for k in range(12)]
+        origin, stops = circle[0], circle[1:]
+        shuffled = list(range(len(stops)))
+        random.Random(3).shuffle(shuffled)
+        order, _ = order_stops(origin, [stops[i] for i in shuffled])
+        visited = [shuffled[i] for i in order]
+        self.assertIn(visited, (list(range(11)), list(range(10, -1, -1))))
+
+    def test_plan_day_routes_visits_every_stop_once(self):
+        rng = random.Random(4)
+        hotel = {'name': 'Hotel', 'latitude': self.ORIGIN[0], 'longitude': self.ORIGIN[1]}
+        stops = [{'name': f'Stop {i}', 'latitude': lat, 'longitude': lon}
+                 for i, (lat, lon) in enumerate(self.random_stops(rng, 10))]
+        stops += [{'name': 'Nowhere'}, {'name': 'Bad', 'latitude': 'n/a', 'longitude': 2.0}]
+
+        routes = plan_day_routes(hotel, stops, 4)
+        self.assertTrue(routes['routed'])
+        self.assertEqual(len(routes['days']), 4)
+        visited = [stop['name'] for day in routes['days'] for stop in day['stops']]
+        self.assertCountEqual(visited, [stop['name'] for stop in stops])
+        routed_days = [day['distance_km'] for day in routes['days'] if day['distance_km'] is not None]
+        self.assertAlmostEqual(routes['total_distance_km'], sum(routed_days), places=1)
+
+    def test_plan_day_routes_without_a_located_hotel_keeps_order(self):
+        stops = [{'name': f'Stop {i}', 'latitude': 48.85 + i / 100, 'longitude': 2.35} for i in range(5)]
+        routes = plan_day_routes({'name': 'Hotel'}, stops, 3)
+        self.assertFalse(routes['routed'])
+        self.assertEqual([[stop['name'] for stop in day['stops']] for day in routes['days']],
+                         [['Stop 0'], ['Stop 1'], ['Stop 2', 'Stop 3', 'Stop 4']])
+
+
+class ParetoAlternativesTests(SimpleTestCase):
+    """Alternatives are non-dominated (hotel, transport) pairs with the right labels"""
+
+    def make_options(self, rng):
+        hotels = [{'name': f'H{i}', 'price_per_night': rng.choice([40, 80, 120, 200, 350, None]),
+                   'rating': rng.choice([3.0, 3.5, 4.0, 4.5, 5.0])} for i in range(12)]
+        transports = [{'name': f'T{i}', 'price_per_person': rng.choice([30, 60, 90, 150, 'n/a']),
+                       'duration_minutes': rng.choice([60, 90, 180, 300, None])} for i in range(8)]
+        return hotels, transports
+
+    def objectives(self, hotel, transport, num_days, num_people):
+        duration = transport['duration_minutes']
+        return (hotel['price_per_night'] * num_days + transport['price_per_person'] * num_people,
+                -hotel['rating'], duration if duration is not None else math.inf)
+
+    def test_every_alternative_is_non_dominated(self):
+        rng = random.Random(5)
+        for _ in range(30):
+            hotels, transports = self.make_options(rng)
+            num_days, num_people = rng.randint(1, 5), rng.randint(1, 3)
+            pairs = [self.objectives(h, t, num_days, num_people) for h in hotels for t in transports
+                     if h['price_per_night'] is not None and isinstance(t['price_per_person'], int)]
+            alternatives = pareto_alternatives(hotels, transports, num_days, num_people)
+            if not pairs:
+                self.assertEqual(alternatives, [])
+                continue
+
+            self.assertTrue(1 <= len(alternatives) <= 4)
+            totals = [a['cost_breakdown']['estimated_total'] for a in alternatives]
+            self.assertEqual(totals, sorted(totals))
+            for alternative in alternatives:
+                point = self.objectives(alternative['hotel'], alternative['transport'], num_days, num_people)
+                dominated = any(all(o <= p for o, p in zip(other, point)) and other != point for other in pairs)
+                self.assertFalse(dominated, alternative)
+
+            by_label = {label: a for a in alternatives for label in a['labels']}
+            self.assertEqual(set(by_label), {'cheapest', 'best_rated', 'fastest', 'balanced'})
+            self.assertEqual(by_label['cheapest']['cost_breakdown']['estimated_total'], min(p[0] for p in pairs))
+            self.assertEqual(-by_label['best_rated']['hotel_rating'], min(p[1] for p in pairs))
+            fastest = by_label['fastest']['travel_minutes']
+            self.assertEqual(fastest if fastest is not None else math.inf, min(p[2] for p in pairs))
+
+    def test_budget_and_current_plan_flags(self):
+        hotels = [{'name': 'Cheap', 'price_per_night': 50, 'rating': 3.0},
+                  {'name': 'Nice', 'price_per_night': 150, 'rating': 4.8}]
+        transports = [{'name': 'Bus', 'price_per_person': 20, 'duration_minutes': 400},
+                      {'name': 'Flight', 'price_per_person': 120, 'duration_minutes': 90}]
+        alternatives = pareto_alternatives(hotels, transports, 2, 1, activities_cost=30, budget=300,
+                                           current=(hotels[1], transports[0]))
+        by_pair = {(a['hotel']['name'], a['transport']['name']): a for a in alternatives}
+
+        self.assertEqual(by_pair['Cheap', 'Bus']['cost_breakdown']['estimated_total'], 150)
+        self.assertTrue(by_pair['Cheap', 'Bus']['within_budget'])
+        self.assertFalse(by_pair['Nice', 'Flight']['within_budget'])
+        self.assertEqual([a['is_current'] for a in alternatives],
+                         [pair == ('Nice', 'Bus') for pair in by_pair])
+
+    def test_missing_options(self):
+        self.assertEqual(pareto_alternatives([], [], 3, 2), [])
+        hotels = [{'name': 'Only', 'price_per_night': 90, 'rating': 4.0}]
+        [alternative] = pareto_alternatives(hotels, [], 3, 2)
+        self.assertIsNone(alternative['transport'])
+        self.assertEqual(alternative['cost_breakdown']['estimated_total'], 270)
+        self.assertIsNone(alternative['travel_minutes'])
+
+
+class PlanChangesTests(TestCase):
+    """PATCH on a saved plan only replaces what was asked for"""
+
+    PLAN_REQUEST = {'origin': 'London', 'destination': 'Paris', 'travel_type': 'culture', 'num_days': 4,
+                    'num_people': 2, 'budget': 3000, 'user_set_budget': True}
+
+    def setUp(self):
+        response = self.client.post(reverse('ai-planner'), self.PLAN_REQUEST, content_type='application/json')
+        self.assertEqual(response.status_code, 200)
+        self.plan_id = response.json()['plan_id']
+        self.url = reverse('ai-planner-plan', args=[self.plan_id])
+
+    def day_stops(self):
+        return [[stop['name'] for stop in day] for day in SavedPlan.objects.get(pk=self.plan_id).state['day_stops']]
+
+    def activities(self, plan):
+        return [[activity['activity'] for activity in day['activities']] for day in plan['itinerary']]
+
+    def patch(self, changes):
+        return self.client.patch(self.url, changes, content_type='application/json')
+
+    def test_day_change_keeps_other_activities(self):
+        before = self.activities(self.client.get(self.url).json()['plan'])
+        stops = self.day_stops()
+
+        response = self.patch({'days': [{'day': 2}]})
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('day:2', response.json()['updated'])
+        after = self.activities(response.json()['plan'])
+
+        for day in (0, 2, 3):
+            self.assertEqual(after[day], before[day])
+        # Morning and evening of the edited day stay, only the attraction visits change
+        self.assertEqual((after[1][0], after[1][-1]), (before[1][0], before[1][-1]))
+        new_stops = self.day_stops()
+        self.assertEqual([new_stops[i] for i in (0, 2, 3)], [stops[i] for i in (0, 2, 3)])
+        self.assertTrue(new_stops[1])
+        self.assertFalse(set(new_stops[1]) & set(stops[1]))
+        self.assertEqual(self.activities(self.client.get(self.url).json()['plan']), after)
+
+    def test_named_attractions_replace_the_day(self):
+        stops = self.day_stops()
+        response = self.patch({'days': [{'day': 3, 'attractions': [stops[2][1]]}]})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.day_stops()[2], [stops[2][1]])
+        self.assertEqual(len(self.activities(response.json()['plan'])[2]), 3)
+
+    def test_rejects_double_booked_and_invalid_days(self):
+        stops = self.day_stops()
+        before = self.client.get(self.url).json()
+
+        for changes in ({'days': [{'day': 2, 'attraction': stops[0][0]}]},
+                        {'days': [{'day': 2, 'attractions': [stops[1][0], 'x', 'y']}]},
+                        {'days': [{'day': 3, 'attraction': 'Nowhere'}]},
+                        {'days': [{'day': 9}]},
+                        {'unknown': 1}):
+            response = self.patch(changes)
+            self.assertEqual(response.status_code, 400, changes)
+            self.assertIn('error', response.json())
+
+        self.assertEqual(self.day_stops(), stops)
+        self.assertEqual(self.client.get(self.url).json(), before)
+
+
+class KeysetPaginationTests(TestCase):
+    """Walking the hotel catalog by cursor visits every row once, in order, both ways"""
+
+    SORTS = {
+        'price': lambda h: (float(h['price_per_night']), h['id']),
+        'rating': lambda h: (-float(h['rating']), -h['id']),
+        'stars': lambda h: (-h['star_rating'], -h['id']),
+        # Unsupported sort: the model ordering, (-rating, price_per_night), then id
+        'relevance': lambda h: (-float(h['rating']), float(h['price_per_night']), h['id']),
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        rng = random.Random(1)
+        destination = Destination.objects.create(name='Keyset', city='Keyset', country='Nowhere')
+        # Few distinct values, so pages break inside runs of equal sort keys
+        Hotel.objects.bulk_create([
+            Hotel(name=f'Hotel {i}', destination=destination, address='Main street',
+                  price_per_night=rng.choice([50, 60, 70]), rating=rng.choice([7, 8, 9]),
+                  star_rating=rng.randint(1, 5), is_available=i % 7 != 0)
+            for i in range(57)
+        ])
+        cls.available = Hotel.objects.filter(is_available=True).count()
+
+    def url(self, sort, **params):
+        query = {'destination': 'Keyset', 'sort': sort, 'page_size': 5, **params}
+        return reverse('hotel-list') + '?' + '&'.join(f'{k}={v}' for k, v in query.items())
+
+    def test_next_and_previous_walks(self):
+        for sort, key in self.SORTS.items():
+            page = self.client.get(self.url(sort, count='exact')).json()
+            self.assertEqual(page['count'], self.available)
+            self.assertIsNone(page['previous'])
+            pages = []
+            while True:
+                pages.append([hotel['id'] for hotel in page['results']])
+                rows = page['results']
+                self.assertEqual(rows, sorted(rows, key=key), sort)
+                if not page['next']:
+                    break
+                page = self.client.get(page['next']).json()
+                self.assertLess(key(rows[-1]), key(page['results'][0]), sort)
+
+            seen = [hotel_id for ids in pages for hotel_id in ids]
+            self.assertEqual(len(seen), self.available, sort)
+            self.assertEqual(len(set(seen)), len(seen), sort)
+
+            back = []
+            while page['previous']:
+                page = self.client.get(page['previous']).json()
+                back.append([hotel['id'] for hotel in page['results']])
+            self.assertEqual(back, pages[-2::-1], sort)
+
+    def test_invalid_cursors_are_rejected(self):
+        other_sort = self.client.get(self.url('rating')).json()['next']
+        cursor = other_sort.split('cursor=')[1].split('&')[0]
+        for bad in ('garbage', 'e30=', cursor):
+            response = self.client.get(self.url('price', cursor=bad))
+            self.assertEqual(response.status_code, 404, bad)
+
+
+class SearchRollupTests(TestCase):
+    """The rollup checkpoint only advances over settled searches; pruning follows it"""
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def add_search(self, age_seconds, destination='Paris', nights=2):
+        check_in = self.now.date() + timedelta(days=5)
+        search = SearchHistory.objects.create(destination_query=destination, check_in_date=check_in,
+                                              check_out_date=check_in + timedelta(days=nights), num_people=2)
+        SearchHistory.objects.filter(pk=search.pk).update(created_at=self.now - timedelta(seconds=age_seconds))
+        return search
+
+    def checkpoint(self):
+        return RollupCheckpoint.objects.get().last_id
+
+    def daily(self, field='searches'):
+        return sum(getattr(rollup, field) for rollup in SearchRollup.objects.filter(granularity='day'))
+
+    def test_checkpoint_stops_at_the_first_unsettled_search(self):
+        first = self.add_search(1000)
+        recent = self.add_search(10)
+        settled_after = self.add_search(900)
+
+        # The settled search after the recent one waits, so nothing is skipped or counted twice
+        self.assertEqual(rollup_searches(batch_size=2, settle_seconds=300), 1)
+        self.assertEqual(self.checkpoint(), first.pk)
+        self.assertEqual(rollup_searches(batch_size=2, settle_seconds=300), 0)
+
+        SearchHistory.objects.filter(pk=recent.pk).update(created_at=self.now - timedelta(seconds=600))
+        self.assertEqual(rollup_searches(batch_size=2, settle_seconds=300), 2)
+        self.assertEqual(self.checkpoint(), settled_after.pk)
+        self.assertEqual(self.daily(), 3)
+
+    def test_batches_advance_until_caught_up(self):
+        for i in range(7):
+            self.add_search(1000, destination=' paris ' if i % 2 else 'Paris', nights=i)
+        self.assertEqual(rollup_searches(batch_size=3, settle_seconds=0), 7)
+        self.assertEqual(rollup_searches(batch_size=3, settle_seconds=0), 0)
+        self.assertEqual(self.daily(), 7)
+        self.assertEqual(self.daily('nights'), sum(range(7)))
+        self.assertEqual(SearchRollup.objects.filter(granularity='day').values('destination').distinct().count(), 1)
+
+    def test_prune_deletes_old_rolled_up_searches_in_batches(self):
+        old = [self.add_search(10 * 86400) for _ in range(5)]
+        rollup_searches(settle_seconds=0)
+        late = self.add_search(10 * 86400)  # old, but not rolled up yet
+        recent = self.add_search(0)
+
+        batches = []
+        self.assertEqual(prune_search_history(7, batch_size=2, on_batch=batches.append), 5)
+        self.assertEqual([[row['id'] for row in batch] for batch in batches],
+                         [[s.pk for s in old[i:i + 2]] for i in range(0, 5, 2)])
+        self.assertEqual(set(SearchHistory.objects.values_list('pk', flat=True)), {late.pk, recent.pk})
+
+    def test_prune_keeps_a_batch_its_callback_rejects(self):
+        for _ in range(3):
+            self.add_search(10 * 86400)
+        rollup_searches(settle_seconds=0)
+
+        def archive(rows):
+            raise RuntimeError('archive unavailable')
+
+        with self.assertRaises(RuntimeError):
+            prune_search_history(7, batch_size=2, on_batch=archive)
+        self.assertEqual(SearchHistory.objects.count(), 3)
+
+
+class TrendingDetectorTests(SimpleTestCase):
+    """Decayed counts and Space-Saving eviction, on an injected clock"""
+
+    def setUp(self):
+        self.now = 1000.0
+
+    def detector(self, half_life=60, capacity=100):
+        return TrendingDetector(half_life=half_life, capacity=capacity, clock=lambda: self.now)
+
+    def scores(self, detector):
+        return {key: score for key, _, score in detector.top(detector.capacity)}
+
+    def test_counts_halve_every_half_life(self):
+        detector = self.detector()
+        for _ in range(8):
+            detector.record('Paris')
+        self.assertAlmostEqual(self.scores(detector)['paris'], 8)
+        self.now += 60
+        self.assertAlmostEqual(self.scores(detector)['paris'], 4)
+        detector.record('  PARIS ')
+        self.now += 120
+        self.assertAlmostEqual(self.scores(detector)['paris'], 5 / 4)
+
+    def test_recent_searches_outrank_an_old_burst(self):
+        detector = self.detector()
+        for _ in range(10):
+            detector.record('Rome')
+        self.now += 300
+        for _ in range(2):
+            detector.record('Lisbon')
+        self.assertEqual([key for key, _, _ in detector.top(2)], ['lisbon', 'rome'])
+        self.assertEqual(detector.top(1)[0][1], 'Lisbon')
+
+    def test_eviction_inherits_the_lowest_count(self):
+        detector = self.detector(capacity=3)
+        for name, searches in (('Paris', 5), ('Rome', 2), ('Oslo', 3)):
+            for _ in range(searches):
+                detector.record(name)
+        # Counts change after their heap entries were pushed: Paris 5, Rome 3, Oslo 5
+        detector.record('Rome')
+        detector.record('Oslo')
+        detector.record('Oslo')
+        detector.record('Tokyo')
+
+        scores = self.scores(detector)
+        self.assertEqual(set(scores), {'paris', 'oslo', 'tokyo'})
+        self.assertAlmostEqual(scores['tokyo'], 3 + 1)
+
+    def test_capacity_bound_keeps_frequent_destinations(self):
+        detector = self.detector(half_life=10 ** 6, capacity=20)
+        rng = random.Random(9)
+        for i in range(3000):
+            detector.record('Paris' if i % 3 == 0 else 'Tokyo' if i % 5 == 0 else f'Noise {rng.random()}')
+        self.assertEqual(len(detector.top(100)), 20)
+        self.assertEqual([key for key, _, _ in detector.top(2)], ['paris', 'tokyo'])
+        # Space-Saving only ever overestimates
+        self.assertGreaterEqual(self.scores(detector)['paris'], 1000)
+
+    def test_rebase_keeps_scores_and_drops_faded_counters(self):
+        detector = self.detector(half_life=1)
+        detector.record('Paris')
+        self.now += 10
+        detector.record('Rome')
+        self.now += 2 * MAX_EXPONENT  # the next record's exponent would pass MAX_EXPONENT
+        detector.record('Oslo')
+        self.assertEqual(detector.landmark, self.now)
+        self.assertEqual(set(self.scores(detector)), {'oslo'})
+        self.assertAlmostEqual(self.scores(detector)['oslo'], 1)
+
+    def test_blank_destinations_are_ignored(self):
+        detector = self.detector()
+        detector.record('   ')
+        detector.record('')
+        self.assertEqual(detector.top(), [])
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """orjson output is byte-for-byte the default renderer's"""
+
+    def assertSameJSON(self, data):
+        self.assertEqual(FastJSONRenderer().render(data), JSONRenderer().render(data))
+
+    def test_datetimes_and_fallback_types(self):
+        now = timezone.now().replace(microsecond=123456)
+        self.assertSameJSON({
+            'aware': now, 'naive': datetime.datetime(2026, 1, 2, 3, 4, 5, 678901), 'date': now.date(),
+            'time': datetime.time(1, 2, 3, 456789), 'nested': [{'at': now}], 'price': Decimal('12.50'),
+            'duration': timedelta(hours=2), 1: 'non-string key', 'separator': 'a\u2028b',
+        })
+
+    def test_integers_beyond_64_bits(self):
+        self.assertSameJSON({'big': 2 ** 70, 'negative': -2 ** 64})
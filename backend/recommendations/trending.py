@@ -0,0 +1,104 @@
+"""
+Trending destinations from the live search stream.
+
+TrendingDetector keeps an exponentially decayed search count per normalized
+destination: a search counts 1 now, 1/2 after TRENDING_HALF_LIFE seconds and
+so on, so a destination's score approximates its recent search rate and
+yesterday's burst fades out on its own. Counts use forward decay - each
+search adds exp(rate * (t - landmark)) and scores are scaled down on read -
+so no counter is ever touched just to age it.
+
+Memory is bounded by TRENDING_CAPACITY counters (Space-Saving): when a new
+destination arrives at capacity, the lowest counter is evicted and the
+newcomer inherits its count, which can only overestimate (never hide) a
+destination that is actually trending. The lowest counter comes from a lazy
+min-heap: counts only grow, so a heap entry may lag behind its counter and is
+refreshed when it reaches the top. Recording costs O(1), plus amortized
+O(log capacity) when it evicts. top(k) is a heap selection over the counters.
+
+Counters live in the memory of each worker process, like the plan jobs and
+the recommendation bundles.
+"""
+
+import heapq
+import math
+import threading
+import time
+from typing import Callable, List, Tuple
+
+from django.conf import settings
+
+from .analytics import normalize_destination
+
+
+# Rebase the landmark before exp() gets anywhere near overflowing a float
+MAX_EXPONENT = 50
+
+
+class TrendingDetector:
+    """Bounded set of decayed per-destination search counters"""
+
+    def __init__(self, half_life: float = 3600, capacity: int = 1000, clock: Callable[[], float] = time.time):
+        self.rate = math.log(2) / half_life
+        self.capacity = capacity
+        self.clock = clock
+        self.landmark = clock()
+        self._counts = {}  # destination -> [forward-decayed weight, latest spelling]
+        self._heap = []  # one (weight, destination) per counter, weight <= the counter's
+        self._lock = threading.Lock()
+
+    def record(self, destination: str):
+        """Count one search for `destination`"""
+        key = normalize_destination(destination)
+        if not key:
+            return
+        with self._lock:
+            exponent = self.rate * (self.clock() - self.landmark)
+            if exponent > MAX_EXPONENT:
+                self._rebase()
+                exponent = 0.0
+            entry = self._counts.get(key)
+            if entry is None:
+                floor = 0.0
+                if len(self._counts) >= self.capacity:
+                    floor = self._evict_lowest()
+                entry = self._counts[key] = [floor, '']
+                heapq.heappush(self._heap, (floor, key))
+            entry[0] += math.exp(exponent)
+            # Searches are matched on the exact spelling, so keep one worth precomputing
+            entry[1] = ' '.join(destination.split())
+
+    def top(self, k: int = 10) -> List[Tuple[str, str, float]]:
+        """The k highest-scoring destinations as (normalized name, spelling, score), best first"""
+        with self._lock:
+            scale = math.exp(-self.rate * (self.clock() - self.landmark))
+            best = heapq.nlargest(k, self._counts.items(), key=lambda item: item[1][0])
+        return [(key, label, weight * scale) for key, (weight, label) in best]
+
+    def _evict_lowest(self) -> float:
+        """Drop the lowest counter and return its weight"""
+        while True:
+            weight, key = self._heap[0]
+            current = self._counts[key][0]
+            if current == weight:
+                heapq.heappop(self._heap)
+                del self._counts[key]
+                return weight
+            # Stale entry: the counter grew since it was pushed
+            heapq.heapreplace(self._heap, (current, key))
+
+    def _rebase(self):
+        """Move the landmark to now, dropping counters that decayed to nothing"""
+        now = self.clock()
+        scale = math.exp(-self.rate * (now - self.landmark))
+        self.landmark = now
+        self._counts = {key: [weight * scale, label] for key, (weight, label) in self._counts.items()
+                        if weight * scale >= 1e-3}
+        self._heap = [(weight, key) for key, (weight, _) in self._counts.items()]
+        heapq.heapify(self._heap)
+
+
+trending_destinations = TrendingDetector(
+    half_life=getattr(settings, 'TRENDING_HALF_LIFE', 3600),
+    capacity=getattr(settings, 'TRENDING_CAPACITY', 1000),
+)
@@ -2,8 +2,11 @@ from django.urls import path, include
 from rest_framework.routers import DefaultRouter
 from .views import (
     DestinationViewSet, HotelViewSet, TransportViewSet,
-    AttractionViewSet, TravelPackageViewSet, TravelSearchView,
-    health_check, api_info, api_status, AITravelPlannerView, ai_planner_status
+    AttractionViewSet, TravelPackageViewSet, TravelSearchView, TravelSearchStreamView,
+    TravelSearchBatchView, FlexibleDateSearchView, CompareDestinationsView,
+    MultiCitySearchView, SearchAnalyticsView,
+    health_check, api_info, api_status, metrics_view, AITravelPlannerView, AITravelPlanDetailView,
+    AITravelPlanJobView, ai_planner_status
 )
 
 router = DefaultRouter()
@@ -17,9 +20,19 @@ urlpatterns = [
     path('', api_info, name='api-info'),
     path('health/', health_check, name='health-check'),
     path('api-status/', api_status, name='api-status'),
+    path('metrics/', metrics_view, name='metrics'),
     path('search/', TravelSearchView.as_view(), name='travel-search'),
+    path('search/stream/', TravelSearchStreamView.as_view(), name='travel-search-stream'),
+    path('search/batch/', TravelSearchBatchView.as_view(), name='travel-search-batch'),
+    path('search/flexible/', FlexibleDateSearchView.as_view(), name='travel-search-flexible'),
+    path('search/compare/', CompareDestinationsView.as_view(), name='travel-search-compare'),
+    path('search/multi-city/', MultiCitySearchView.as_view(), name='travel-search-multi-city'),
+    path('analytics/searches/', SearchAnalyticsView.as_view(), name='search-analytics'),
     path('ai-planner/', AITravelPlannerView.as_view(), name='ai-planner'),
     path('ai-planner/status/', ai_planner_status, name='ai-planner-status'),
+    path('ai-planner/plans/<uuid:plan_id>/', AITravelPlanDetailView.as_view(), name='ai-planner-plan'),
+    path('ai-planner/jobs/', AITravelPlanJobView.as_view(), name='ai-planner-jobs'),
+    path('ai-planner/jobs/<str:job_id>/', AITravelPlanJobView.as_view(), name='ai-planner-job'),
     path('', include(router.urls)),
 ]
 
@@ -1,22 +1,38 @@
 from rest_framework import viewsets, status
-from rest_framework.decorators import api_view, action
+from rest_framework.decorators import api_view, action, permission_classes
 from rest_framework.response import Response
+from rest_framework.settings import api_settings
 from rest_framework.views import APIView
+from django.conf import settings
+from django.db import transaction
 from django.db.models import Q
-from datetime import datetime
+from django.db.models.functions import Lower
+from django.http import HttpResponse, StreamingHttpResponse
+from django.utils import timezone
+from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
 
-from .models import Destination, Hotel, Transport, Attraction, TravelPackage, SearchHistory
+from .models import Destination, Hotel, Transport, Attraction, TravelPackage, SearchHistory, SavedPlan
 from .serializers import (
     DestinationSerializer, HotelSerializer, TransportSerializer,
-    AttractionSerializer, TravelPackageSerializer, TravelSearchSerializer
+    AttractionSerializer, TravelPackageSerializer, TravelSearchSerializer, FlexibleDateSearchSerializer,
+    CompareDestinationsSerializer, MultiCitySearchSerializer, SearchAnalyticsSerializer
 )
 from .services import TravelRecommendationService
+from .analytics import search_analytics
+from .trending import trending_destinations
+from .batching import CallMemo
+from .conditional import ConditionalPageMixin, conditional_get, request_etag
+from .featured import get_featured
+from .renderers import EventStreamRenderer, sse_event
+from . import metrics
 
 
-class DestinationViewSet(viewsets.ModelViewSet):
+class DestinationViewSet(ConditionalPageMixin, viewsets.ModelViewSet):
     """ViewSet for Destination CRUD operations"""
     queryset = Destination.objects.all()
     serializer_class = DestinationSerializer
+    query_budget = {'max_queries': 4}
     
     def get_queryset(self):
         queryset = Destination.objects.all()
@@ -33,20 +49,45 @@ class DestinationViewSet(viewsets.ModelViewSet):
         return queryset
     
     @action(detail=False, methods=['get'])
+    @conditional_get(lambda view: Destination.objects.filter(is_popular=True))
     def popular(self, request):
         """Get popular destinations"""
         popular = Destination.objects.filter(is_popular=True)[:10]
         serializer = self.get_serializer(popular, many=True)
         return Response(serializer.data)
+    
+    @action(detail=False, methods=['get'])
+    def trending(self, request):
+        """Most searched destinations right now, by decayed search count (see trending.py)"""
+        try:
+            limit = min(max(int(request.query_params.get('limit', 10)), 1), 50)
+        except ValueError:
+            limit = 10
+        top = trending_destinations.top(limit)
+        known = {
+            destination.city_key: destination
+            for destination in Destination.objects.annotate(city_key=Lower('city'))
+            .filter(city_key__in=[key for key, _, _ in top])
+        }
+        return Response([
+            {
+                'name': name,
+                'score': round(score, 3),
+                'destination': self.get_serializer(known[key]).data if key in known else None,
+            }
+            for key, name, score in top
+        ])
 
 
-class HotelViewSet(viewsets.ModelViewSet):
+class HotelViewSet(ConditionalPageMixin, viewsets.ModelViewSet):
     """ViewSet for Hotel CRUD operations"""
     queryset = Hotel.objects.filter(is_available=True)
     serializer_class = HotelSerializer
+    query_budget = {'max_queries': 5}
+    page_timestamp_fields = ('updated_at', 'destination__updated_at')
     
     def get_queryset(self):
-        queryset = Hotel.objects.filter(is_available=True)
+        queryset = Hotel.objects.filter(is_available=True).select_related('destination')
         
         destination = self.request.query_params.get('destination', None)
         if destination:
@@ -78,9 +119,10 @@ class TransportViewSet(viewsets.ModelViewSet):
     """ViewSet for Transport CRUD operations"""
     queryset = Transport.objects.filter(is_available=True)
     serializer_class = TransportSerializer
+    query_budget = {'max_queries': 5}
     
     def get_queryset(self):
-        queryset = Transport.objects.filter(is_available=True)
+        queryset = Transport.objects.filter(is_available=True).select_related('origin', 'destination')
         
         destination = self.request.query_params.get('destination', None)
         if destination:
@@ -97,9 +139,10 @@ class AttractionViewSet(viewsets.ModelViewSet):
     """ViewSet for Attraction CRUD operations"""
     queryset = Attraction.objects.filter(is_available=True)
     serializer_class = AttractionSerializer
+    query_budget = {'max_queries': 5}
     
     def get_queryset(self):
-        queryset = Attraction.objects.filter(is_available=True)
+        queryset = Attraction.objects.filter(is_available=True).select_related('destination')
         
         destination = self.request.query_params.get('destination', None)
         if destination:
@@ -120,56 +163,117 @@ class TravelPackageViewSet(viewsets.ModelViewSet):
     """ViewSet for TravelPackage CRUD operations"""
     queryset = TravelPackage.objects.filter(is_available=True)
     serializer_class = TravelPackageSerializer
+    query_budget = {'max_queries': 9}
+    
+    # Query parameters the nested serializers price with
+    PRICING_PARAMS = ('people', 'nights', 'rooms')
+    
+    def get_queryset(self):
+        queryset = TravelPackage.objects.filter(is_available=True)
+        
+        max_price = self.request.query_params.get('max_price', None)
+        if max_price:
+            queryset = queryset.filter(discounted_price__lte=float(max_price))
+        
+        sort_by = self.request.query_params.get('sort', None)
+        if sort_by == 'price':
+            queryset = queryset.order_by('discounted_price')
+        
+        return self._with_related(queryset)
+    
+    def _with_related(self, queryset):
+        """Load nested hotels/transports/attractions without per-row queries"""
+        return queryset.select_related('destination').prefetch_related(
+            'hotels__destination',
+            'transports__origin',
+            'transports__destination',
+            'attractions__destination',
+        )
+    
+    def _featured(self, request):
+        """Prebuilt featured payload for the request's pricing parameters (see featured.py)"""
+        if not hasattr(request, '_featured'):
+            def build():
+                featured = self._with_related(TravelPackage.objects.filter(is_featured=True, is_available=True))[:6]
+                return self.get_serializer(featured, many=True).data
+            variant = tuple(request.query_params.get(param, '') for param in self.PRICING_PARAMS)
+            request._featured = get_featured(variant, build)
+        return request._featured
     
     @action(detail=False, methods=['get'])
+    @conditional_get(validators=lambda view, request: (
+        request_etag(request, view._featured(request)['fingerprint']), None
+    ))
     def featured(self, request):
         """Get featured travel packages"""
-        featured = TravelPackage.objects.filter(is_featured=True, is_available=True)[:6]
-        serializer = self.get_serializer(featured, many=True)
-        return Response(serializer.data)
+        return Response(self._featured(request)['data'])
 
 
 class TravelSearchView(APIView):
     """
     Main API endpoint for travel search and recommendations.
     POST /api/search/
+    
+    `?fields=hotels,summary` returns (and fetches) only the listed sections:
+    summary, hotels, transports, local_transports, attractions.
     """
     
     def post(self, request):
         serializer = TravelSearchSerializer(data=request.data)
         if not serializer.is_valid():
             return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        try:
+            fields = requested_fields(request, 'fields', ('summary', *TravelRecommendationService.SECTIONS))
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
         
         data = serializer.validated_data
-        
-        # Log search history
-        try:
-            SearchHistory.objects.create(
-                destination_query=data['destination'],
-                check_in_date=data['check_in'],
-                check_out_date=data['check_out'],
-                num_people=data['people'],
-                num_rooms=data['rooms'],
-                ip_address=self._get_client_ip(request),
-                user_agent=request.META.get('HTTP_USER_AGENT', '')[:500]
-            )
-        except Exception:
-            pass  # Don't fail if history logging fails
+        self._log_search(request, data)
         
         # Get recommendations
         service = TravelRecommendationService()
-        recommendations = service.get_recommendations(
-            origin=data.get('origin', ''),
-            destination=data['destination'],
-            check_in=str(data['check_in']),
-            check_out=str(data['check_out']),
-            people=data['people'],
-            rooms=data['rooms'],
-            budget=data.get('budget')
-        )
+        recommendations = service.get_recommendations(**self._search_params(data), fields=fields)
         
         return Response(recommendations, status=status.HTTP_200_OK)
     
+    def _log_search(self, request, data):
+        """Log search history"""
+        self._log_searches([self._history_entry(request, data)])
+    
+    def _log_searches(self, entries):
+        """Save SearchHistory rows; once they are saved, the searches count towards trending"""
+        try:
+            SearchHistory.objects.bulk_create(entries)
+        except Exception:
+            return  # Don't fail if history logging fails
+        for entry in entries:
+            trending_destinations.record(entry.destination_query)
+    
+    def _history_entry(self, request, data):
+        """Unsaved SearchHistory row for a validated search"""
+        return SearchHistory(
+            destination_query=data['destination'],
+            check_in_date=data['check_in'],
+            check_out_date=data['check_out'],
+            num_people=data['people'],
+            num_rooms=data['rooms'],
+            ip_address=self._get_client_ip(request),
+            user_agent=request.META.get('HTTP_USER_AGENT', '')[:500]
+        )
+    
+    def _search_params(self, data):
+        """Validated search data as TravelRecommendationService arguments"""
+        return {
+            'origin': data.get('origin', ''),
+            'destination': data['destination'],
+            'check_in': str(data['check_in']),
+            'check_out': str(data['check_out']),
+            'people': data['people'],
+            'rooms': data['rooms'],
+            'budget': data.get('budget'),
+            'limit': data.get('limit')
+        }
+    
     def _get_client_ip(self, request):
         x_forwarded_for = request.META.get('HTTP_X_FORWARDED_FOR')
         if x_forwarded_for:
@@ -179,6 +283,235 @@ class TravelSearchView(APIView):
         return ip
 
 
+class TravelSearchStreamView(TravelSearchView):
+    """
+    Streaming travel search (Server-Sent Events).
+    GET (query string, for EventSource) or POST /api/search/stream/ with the /api/search/ parameters.
+    
+    Emits one event per section - hotels, transports, local_transports,
+    attractions - as soon as its source responds, then `summary` (with the
+    price_breakdown) and a final `done` event.
+    """
+    renderer_classes = [*api_settings.DEFAULT_RENDERER_CLASSES, EventStreamRenderer]
+    
+    def get(self, request):
+        return self._stream(request, request.query_params)
+    
+    def post(self, request):
+        return self._stream(request, request.data)
+    
+    def _stream(self, request, params):
+        serializer = TravelSearchSerializer(data=params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = serializer.validated_data
+        self._log_search(request, data)
+        search_params = self._search_params(data)
+        
+        def events():
+            service = TravelRecommendationService()
+            for section, payload in service.stream_recommendations(**search_params):
+                yield sse_event(section, payload)
+            yield sse_event('done', {})
+        
+        response = StreamingHttpResponse(events(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # Don't let nginx buffer the stream
+        return response
+
+
+class TravelSearchBatchView(TravelSearchView):
+    """
+    Several travel searches in one request.
+    POST /api/search/batch/ with a list of /api/search/ payloads (or {"queries": [...]})
+    
+    Returns {"results": [...], "stats": {...}} with one result per query, in
+    input order: {"status": 200, "data": <search response>} or {"status": 400
+    / 500, "errors": ...}. Identical queries are answered once, and all queries
+    share section fetches and upstream API calls (city-code lookups, hotel
+    lists, offers for the same dates) through one CallMemo. Unique queries run
+    on SEARCH_BATCH_MAX_WORKERS threads.
+    """
+    query_budget = {'max_queries': 2}  # one bulk insert of the search history
+    
+    def post(self, request):
+        queries = request.data.get('queries') if isinstance(request.data, dict) else request.data
+        if not isinstance(queries, list) or not queries:
+            return Response({'error': 'Expected a non-empty list of search queries'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        max_queries = getattr(settings, 'SEARCH_BATCH_MAX_QUERIES', 50)
+        if len(queries) > max_queries:
+            return Response({'error': f'At most {max_queries} queries per batch'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        
+        results = [None] * len(queries)
+        unique = {}  # search params -> indices of the queries asking for them
+        history = []
+        for index, query in enumerate(queries):
+            serializer = TravelSearchSerializer(data=query)
+            if not serializer.is_valid():
+                results[index] = {'status': status.HTTP_400_BAD_REQUEST, 'errors': serializer.errors}
+                continue
+            data = serializer.validated_data
+            history.append(self._history_entry(request, data))
+            params = self._search_params(data)
+            unique.setdefault(tuple(sorted(params.items())), []).append(index)
+        
+        self._log_searches(history)
+        
+        memo = CallMemo('search_batch')
+        service = TravelRecommendationService(memo=memo)
+        
+        def search(params):
+            try:
+                return {'status': status.HTTP_200_OK, 'data': service.get_recommendations(**dict(params))}
+            except Exception as e:
+                print(f"Batch search failed for {dict(params)}: {e}")
+                return {'status': status.HTTP_500_INTERNAL_SERVER_ERROR, 'errors': {'detail': str(e)}}
+        
+        if unique:
+            workers = min(getattr(settings, 'SEARCH_BATCH_MAX_WORKERS', 4), len(unique))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix='search-batch') as pool:
+                for indices, result in zip(unique.values(), pool.map(search, unique)):
+                    for index in indices:
+                        results[index] = result
+        
+        return Response({
+            'results': results,
+            'stats': {
+                'queries': len(queries),
+                'valid_queries': sum(len(indices) for indices in unique.values()),
+                'unique_queries': len(unique),
+                'shared_calls': memo.hits,
+                'upstream_calls': memo.misses,
+            },
+        }, status=status.HTTP_200_OK)
+
+
+class CompareDestinationsView(TravelSearchView):
+    """
+    Compare trip costs to several destinations.
+    POST /api/search/compare/ with origin, check_in, check_out, people, rooms,
+    budget and a list of `destinations`.
+    
+    Returns one compact price_breakdown row per destination, cheapest total first.
+    """
+    query_budget = {'max_queries': 2}  # one bulk insert of the search history
+    
+    def post(self, request):
+        serializer = CompareDestinationsSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = serializer.validated_data
+        self._log_searches([
+            self._history_entry(request, {**data, 'destination': destination})
+            for destination in data['destinations']
+        ])
+        
+        service = TravelRecommendationService(memo=CallMemo('search_compare'))
+        comparison = service.compare_destinations(
+            destinations=data['destinations'],
+            check_in=str(data['check_in']),
+            check_out=str(data['check_out']),
+            people=data['people'],
+            rooms=data['rooms'],
+            origin=data.get('origin', ''),
+            budget=data.get('budget')
+        )
+        return Response(comparison, status=status.HTTP_200_OK)
+
+
+class MultiCitySearchView(TravelSearchView):
+    """
+    Multi-city trip search.
+    POST /api/search/multi-city/ with origin, start_date, people, rooms, budget
+    and `stops`: [{"city": ..., "nights": ...}, ...] in travel order.
+    
+    Returns the itinerary (transport legs and stays in order, each with its
+    options) and the combined cost breakdown of the cheapest choices.
+    """
+    query_budget = {'max_queries': 2}  # one bulk insert of the search history
+    
+    def post(self, request):
+        serializer = MultiCitySearchSerializer(data=request.data)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = serializer.validated_data
+        service = TravelRecommendationService(memo=CallMemo('search_multi_city'))
+        trip = service.multi_city_trip(
+            stops=[dict(stop) for stop in data['stops']],
+            start_date=str(data['start_date']),
+            people=data['people'],
+            rooms=data['rooms'],
+            origin=data.get('origin', ''),
+            budget=data.get('budget'),
+            return_to_origin=data['return_to_origin'],
+            limit=data['limit']
+        )
+        
+        self._log_searches([
+            self._history_entry(request, {
+                'destination': stay['city'], 'check_in': stay['check_in'], 'check_out': stay['check_out'],
+                'people': data['people'], 'rooms': data['rooms'],
+            })
+            for stay in trip['itinerary'] if stay['type'] == 'stay'
+        ])
+        
+        return Response(trip, status=status.HTTP_200_OK)
+
+
+class FlexibleDateSearchView(TravelSearchView):
+    """
+    Flexible-date search: the cheapest stays of a given length within a date range.
+    GET or POST /api/search/flexible/ with destination, date_from, date_to
+    (last check-out), nights and the usual origin / people / rooms / budget;
+    `limit` caps the ranked `cheapest` list (the `calendar` has every window).
+    """
+    
+    def get(self, request):
+        return self._search(request.query_params)
+    
+    def post(self, request):
+        return self._search(request.data)
+    
+    def _search(self, params):
+        serializer = FlexibleDateSearchSerializer(data=params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        
+        data = serializer.validated_data
+        service = TravelRecommendationService(memo=CallMemo('flexible_search'))
+        result = service.flexible_date_search(
+            origin=data.get('origin', ''),
+            destination=data['destination'],
+            date_from=str(data['date_from']),
+            date_to=str(data['date_to']),
+            nights=data['nights'],
+            people=data['people'],
+            rooms=data['rooms'],
+            budget=data.get('budget'),
+            limit=data['limit']
+        )
+        return Response(result, status=status.HTTP_200_OK)
+
+
+class SearchAnalyticsView(APIView):
+    """
+    Search volume from the hourly / daily rollups (see analytics.py).
+    GET /api/analytics/searches/?granularity=day&days=30&destination=paris&top=10
+    """
+    query_budget = {'max_queries': 4}
+    
+    def get(self, request):
+        serializer = SearchAnalyticsSerializer(data=request.query_params)
+        if not serializer.is_valid():
+            return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+        return Response(search_analytics(**serializer.validated_data))
+
+
 @api_view(['GET'])
 def health_check(request):
     """Health check endpoint"""
@@ -200,16 +533,34 @@ def api_info(request):
         'api_mode': getattr(settings, 'API_MODE', 'mock'),
         'endpoints': {
             'search': '/api/search/',
+            'search_stream': '/api/search/stream/',
+            'search_batch': '/api/search/batch/',
+            'search_flexible': '/api/search/flexible/',
+            'search_compare': '/api/search/compare/',
+            'search_multi_city': '/api/search/multi-city/',
             'destinations': '/api/destinations/',
+            'trending_destinations': '/api/destinations/trending/',
             'hotels': '/api/hotels/',
             'transports': '/api/transports/',
             'attractions': '/api/attractions/',
             'packages': '/api/packages/',
+            'search_analytics': '/api/analytics/searches/',
             'api_status': '/api/api-status/',
+            'metrics': '/api/metrics/',
         }
     })
 
 
+@api_view(['GET'])
+@permission_classes([metrics.MetricsScrapePermission])
+def metrics_view(request):
+    """Prometheus scrape endpoint with request, upstream, cache and DB statistics"""
+    return HttpResponse(
+        metrics.render(metrics.registry.collect()),
+        content_type='text/plain; version=0.0.4; charset=utf-8'
+    )
+
+
 @api_view(['GET'])
 def api_status(request):
     """Check the status of external API connections"""
@@ -247,10 +598,165 @@ def api_status(request):
     return Response(status_info)
 
 
+PLANNER_REQUIRED_FIELDS = ['origin', 'destination', 'travel_type', 'budget', 'num_days', 'num_people']
+
+# Top-level sections of a planner response that can be left out with `include=`
+PLANNER_INCLUDES = ('recommendations',)
+
+# Recommendation sections a saved plan's state already holds (see saved_plan_result)
+SAVED_PLAN_SHARED_SECTIONS = ('hotels', 'transports', 'attractions')
+
+
+def requested_fields(request, param: str, allowed):
+    """
+    Names listed in a comma-separated query parameter (`?fields=a,b`), or None
+    when the parameter isn't given. Raises ValueError for unknown names.
+    """
+    if param not in request.query_params:
+        return None
+    names = [name.strip() for name in request.query_params[param].split(',') if name.strip()]
+    unknown = sorted(set(names) - set(allowed))
+    if unknown:
+        raise ValueError(f"Unknown {param}: {', '.join(unknown)} (choose from {', '.join(allowed)})")
+    return names
+
+
+def _planner_fieldsets(request):
+    """(fields, include) of a planner request: plan keys and embedded sections to return"""
+    from .ai_planner_service import TravelPlannerService
+    
+    return (requested_fields(request, 'fields', TravelPlannerService.PLAN_FIELDS),
+            requested_fields(request, 'include', PLANNER_INCLUDES))
+
+
+def shape_plan_response(result: dict, fields=None, include=None) -> dict:
+    """Planner response with only the requested plan keys and embedded sections"""
+    shaped = {}
+    for key, value in result.items():
+        if key == 'plan' and fields is not None:
+            value = {name: section for name, section in value.items() if name in fields}
+        elif key in PLANNER_INCLUDES and include is not None and key not in include:
+            continue
+        shaped[key] = value
+    return shaped
+
+
+def _planner_params(data) -> dict:
+    """
+    Normalized planner inputs.
+    Raises KeyError for a missing required field and ValueError for bad numbers.
+    """
+    for field in PLANNER_REQUIRED_FIELDS:
+        if field not in data:
+            raise KeyError(field)
+    return {
+        'origin': data['origin'],
+        'destination': data['destination'],
+        'travel_type': data['travel_type'],
+        'hotel_preference': data.get('hotel_preference', 'mid-range'),
+        'budget': int(data['budget']),
+        'num_days': int(data['num_days']),
+        'num_people': int(data['num_people']),
+        'user_set_budget': data.get('user_set_budget', False),
+    }
+
+
+def generate_planner_response(params: dict, report=None, fields=None) -> dict:
+    """
+    Fetch recommendations, generate the plan and save it for later edits.
+    `report(stage, percent)` is called as the work progresses; optional plan
+    sections (itinerary text, alternatives) are only computed when `fields`
+    asks for them (None: all).
+    """
+    from .ai_planner_service import TravelPlannerService
+    
+    report = report or (lambda stage, percent: None)
+    
+    # Get travel recommendations first (hotels, transport, attractions)
+    report('fetching recommendations', 10)
+    service = TravelRecommendationService()
+    
+    # Calculate dates (use tomorrow as check_in for AI planning)
+    check_in = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
+    check_out = (datetime.now() + timedelta(days=1 + params['num_days'])).strftime('%Y-%m-%d')
+    
+    recommendations = service.get_recommendations(
+        origin=params['origin'],
+        destination=params['destination'],
+        check_in=check_in,
+        check_out=check_out,
+        people=params['num_people'],
+        rooms=max(1, params['num_people'] // 2),
+        budget=params['budget']
+    )
+    
+    # Debug: Log hotel count
+    print(f"AI Planner - Hotels found: {len(recommendations.get('hotels', []))}")
+    if recommendations.get('hotels'):
+        print(f"First hotel: {recommendations['hotels'][0].get('name')} - ${recommendations['hotels'][0].get('price_per_night')}/night")
+    
+    # Generate smart travel plan
+    report('generating plan', 60)
+    planner = TravelPlannerService()
+    
+    plan_state = {}
+    plan = planner.generate_travel_plan(
+        origin=params['origin'],
+        destination=params['destination'],
+        travel_type=params['travel_type'],
+        hotel_preference=params['hotel_preference'],
+        budget=params['budget'],
+        num_days=params['num_days'],
+        num_people=params['num_people'],
+        hotels=recommendations.get('hotels', []),
+        transports=recommendations.get('transports', []),
+        attractions=recommendations.get('attractions', []),
+        # Whether the user explicitly set the budget
+        user_set_budget=params['user_set_budget'],
+        plan_state=plan_state,
+        sections=fields
+    )
+    
+    # Combine with recommendations
+    plan['recommendations'] = recommendations
+    
+    # Keep the plan so it can be edited without regenerating it. The state already
+    # holds the fetched hotels, transports and attractions, so they are stored once
+    report('saving plan', 90)
+    plan_state['recommendations'] = {
+        key: None if key in SAVED_PLAN_SHARED_SECTIONS else value for key, value in recommendations.items()
+    }
+    saved = SavedPlan.objects.create(
+        destination=params['destination'],
+        result={key: value for key, value in plan.items() if key != 'recommendations'},
+        state=plan_state
+    )
+    plan['plan_id'] = str(saved.id)
+    
+    return plan
+
+
+def saved_plan_result(saved: SavedPlan) -> dict:
+    """A saved plan's result with its embedded recommendations put back together"""
+    stored = saved.state.get('recommendations')
+    if stored is None:
+        return dict(saved.result)
+    recommendations = {
+        key: saved.state[key] if key in SAVED_PLAN_SHARED_SECTIONS else value for key, value in stored.items()
+    }
+    return {**saved.result, 'recommendations': recommendations}
+
+
 class AITravelPlannerView(APIView):
     """
     Smart travel planning endpoint using template-based generation.
     POST /api/ai-planner/
+    
+    Optional query parameters slim the response: `fields=itinerary,cost_breakdown`
+    returns only those plan keys (and skips computing `itinerary_text` /
+    `alternatives` unless listed), `include=` (empty) drops the embedded
+    `recommendations`. The same parameters work on /api/ai-planner/jobs/ and
+    /api/ai-planner/plans/<plan_id>/.
     """
     
     def get(self, request):
@@ -265,67 +771,22 @@ class AITravelPlannerView(APIView):
     
     def post(self, request):
         """Generate smart travel plan"""
-        from .ai_planner_service import TravelPlannerService
-        
         try:
-            data = request.data
-            
             # Validate required fields
-            required_fields = ['origin', 'destination', 'travel_type', 'budget', 'num_days', 'num_people']
-            for field in required_fields:
-                if field not in data:
-                    return Response(
-                        {'error': f'Missing required field: {field}'},
-                        status=status.HTTP_400_BAD_REQUEST
-                    )
-            
-            # Get travel recommendations first (hotels, transport, attractions)
-            service = TravelRecommendationService()
-            
-            # Calculate dates (use tomorrow as check_in for AI planning)
-            from datetime import datetime, timedelta
-            check_in = (datetime.now() + timedelta(days=1)).strftime('%Y-%m-%d')
-            check_out = (datetime.now() + timedelta(days=1 + int(data['num_days']))).strftime('%Y-%m-%d')
-            
-            recommendations = service.get_recommendations(
-                origin=data.get('origin', ''),
-                destination=data['destination'],
-                check_in=check_in,
-                check_out=check_out,
-                people=int(data['num_people']),
-                rooms=max(1, int(data['num_people']) // 2),
-                budget=int(data.get('budget', 0))
-            )
-            
-            # Debug: Log hotel count
-            print(f"AI Planner - Hotels found: {len(recommendations.get('hotels', []))}")
-            if recommendations.get('hotels'):
-                print(f"First hotel: {recommendations['hotels'][0].get('name')} - ${recommendations['hotels'][0].get('price_per_night')}/night")
-            
-            # Generate smart travel plan
-            planner = TravelPlannerService()
-            
-            # Check if user explicitly set budget
-            user_set_budget = data.get('user_set_budget', False)
-            
-            plan = planner.generate_travel_plan(
-                origin=data['origin'],
-                destination=data['destination'],
-                travel_type=data['travel_type'],
-                hotel_preference=data.get('hotel_preference', 'mid-range'),
-                budget=int(data['budget']),
-                num_days=int(data['num_days']),
-                num_people=int(data['num_people']),
-                hotels=recommendations.get('hotels', []),
-                transports=recommendations.get('transports', []),
-                attractions=recommendations.get('attractions', []),
-                user_set_budget=user_set_budget
-            )
+            try:
+                params = _planner_params(request.data)
+            except KeyError as e:
+                return Response(
+                    {'error': f'Missing required field: {e.args[0]}'},
+                    status=status.HTTP_400_BAD_REQUEST
+                )
+            try:
+                fields, include = _planner_fieldsets(request)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
             
-            # Combine with recommendations
-            plan['recommendations'] = recommendations
-            
-            return Response(plan, status=status.HTTP_200_OK)
+            plan = generate_planner_response(params, fields=fields)
+            return Response(shape_plan_response(plan, fields, include), status=status.HTTP_200_OK)
         
         except Exception as e:
             import traceback
@@ -337,6 +798,113 @@ class AITravelPlannerView(APIView):
             )
 
 
+class AITravelPlanJobView(APIView):
+    """
+    Background plan generation for slow (e.g. Amadeus-backed) searches.
+    POST /api/ai-planner/jobs/ - same body as /api/ai-planner/, returns a job id right away
+    GET /api/ai-planner/jobs/<job_id>/ - status, progress and, once done, the plan
+    """
+    
+    def post(self, request):
+        from .jobs import QueueFull, job_key, plan_jobs
+        
+        try:
+            params = _planner_params(request.data)
+        except KeyError as e:
+            return Response({'error': f'Missing required field: {e.args[0]}'}, status=status.HTTP_400_BAD_REQUEST)
+        except (TypeError, ValueError):
+            return Response({'error': 'budget, num_days and num_people must be numbers'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        try:
+            fields, include = _planner_fieldsets(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        try:
+            # Identical requests share one job
+            job = plan_jobs.submit(
+                job_key('ai-planner', {**params, 'fields': fields, 'include': include}),
+                lambda report: shape_plan_response(generate_planner_response(params, report, fields), fields, include)
+            )
+        except QueueFull:
+            return Response({'error': 'Too many plans are being generated, try again shortly'},
+                            status=status.HTTP_503_SERVICE_UNAVAILABLE)
+        
+        return Response({
+            **job.to_dict(),
+            'status_url': request.build_absolute_uri(f'{job.id}/')
+        }, status=status.HTTP_202_ACCEPTED)
+    
+    def get(self, request, job_id):
+        from .jobs import plan_jobs
+        
+        job = plan_jobs.get(job_id)
+        if job is None:
+            return Response({'error': 'Job not found'}, status=status.HTTP_404_NOT_FOUND)
+        return Response(job.to_dict())
+
+
+class AITravelPlanDetailView(APIView):
+    """
+    Stored travel plan, editable without regenerating it.
+    GET /api/ai-planner/plans/<plan_id>/
+    PATCH /api/ai-planner/plans/<plan_id>/ with any of:
+        {"budget": 2500, "hotel": "<id or name>", "hotel_preference": "budget",
+         "days": [{"day": 2, "attractions": ["<name>", ...] (optional)}]}
+    GET doesn't write: optional sections missing from the stored plan are
+    computed per request until a PATCH saves them.
+    """
+    query_budget = {'max_queries': 4}
+    
+    def _saved_plans(self):
+        cutoff = timezone.now() - timedelta(days=getattr(settings, 'PLAN_RETENTION_DAYS', 7))
+        return SavedPlan.objects.filter(updated_at__gte=cutoff)
+    
+    def get(self, request, plan_id):
+        from .ai_planner_service import TravelPlannerService
+        
+        try:
+            fields, include = _planner_fieldsets(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        saved = self._saved_plans().filter(pk=plan_id).first()
+        if saved is None:
+            return Response({'error': 'Plan not found'}, status=status.HTTP_404_NOT_FOUND)
+        
+        # Sections skipped at generation time are computed for the response only; PATCH keeps them
+        planner = TravelPlannerService()
+        planner.add_plan_sections(saved.result, saved.state, planner.OPTIONAL_SECTIONS if fields is None else fields)
+        
+        return Response(shape_plan_response({**saved_plan_result(saved), 'plan_id': str(saved.id)}, fields, include))
+    
+    def patch(self, request, plan_id):
+        from .ai_planner_service import TravelPlannerService
+        
+        try:
+            fields, include = _planner_fieldsets(request)
+        except ValueError as e:
+            return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+        
+        with transaction.atomic():
+            saved = self._saved_plans().select_for_update().filter(pk=plan_id).first()
+            if saved is None:
+                return Response({'error': 'Plan not found'}, status=status.HTTP_404_NOT_FOUND)
+            planner = TravelPlannerService()
+            try:
+                updated = planner.apply_plan_changes(saved.result, saved.state, request.data)
+            except ValueError as e:
+                return Response({'error': str(e)}, status=status.HTTP_400_BAD_REQUEST)
+            updated += planner.add_plan_sections(
+                saved.result, saved.state, planner.OPTIONAL_SECTIONS if fields is None else fields
+            )
+            saved.save(update_fields=['result', 'state', 'updated_at'])
+        
+        return Response(shape_plan_response(
+            {**saved_plan_result(saved), 'plan_id': str(saved.id), 'updated': updated}, fields, include
+        ))
+
+
 @api_view(['GET'])
 def ai_planner_status(request):
     """Check travel planner status"""
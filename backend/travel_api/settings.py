@@ -30,6 +30,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'recommendations.metrics.MetricsMiddleware',
+    'recommendations.compression.CompressionMiddleware',
     'corsheaders.middleware.CorsMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -38,6 +40,8 @@ MIDDLEWARE = [
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
+    'recommendations.query_budget.QueryBudgetMiddleware',
+    'recommendations.profiling.ProfilingMiddleware',
 ]
 
 ROOT_URLCONF = 'travel_api.urls'
@@ -131,10 +135,27 @@ REST_FRAMEWORK = {
     'DEFAULT_PERMISSION_CLASSES': [
         'rest_framework.permissions.AllowAny',
     ],
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
-    'PAGE_SIZE': 20
+    'DEFAULT_PAGINATION_CLASS': 'recommendations.pagination.KeysetPagination',
+    'PAGE_SIZE': 20,
+    'DEFAULT_RENDERER_CLASSES': [
+        'recommendations.renderers.FastJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+    'DEFAULT_PARSER_CLASSES': [
+        'recommendations.parsers.FastJSONParser',
+        'rest_framework.parsers.FormParser',
+        'rest_framework.parsers.MultiPartParser',
+    ],
 }
 
+# Views whose JSON is rendered and parsed with orjson (when installed): '*' for
+# every view, or comma-separated view names (class names, or function names for
+# @api_view views); empty to always use the stdlib encoder
+FAST_JSON_VIEWS = [name.strip() for name in os.getenv('FAST_JSON_VIEWS', '*').split(',') if name.strip()]
+
+# Responses smaller than this are sent uncompressed (see recommendations.compression)
+COMPRESSION_MIN_BYTES = int(os.getenv('COMPRESSION_MIN_BYTES', '1024'))
+
 # ===========================================
 # API CONFIGURATION
 # ===========================================
@@ -150,3 +171,112 @@ AMADEUS_API_KEY = os.getenv('AMADEUS_API_KEY', '')
 AMADEUS_API_SECRET = os.getenv('AMADEUS_API_SECRET', '')
 AMADEUS_PRODUCTION = os.getenv('AMADEUS_PRODUCTION', 'False').lower() == 'true'
 
+# Time cap for the planner's budget optimizer (best-so-far plan is used after it)
+PLANNER_SOLVER_TIME_LIMIT_MS = int(os.getenv('PLANNER_SOLVER_TIME_LIMIT_MS', '200'))
+
+# Number of precomputed mock catalogs (one per city/date) kept in memory
+MOCK_CATALOG_CACHE_SIZE = int(os.getenv('MOCK_CATALOG_CACHE_SIZE', '1024'))
+
+# Days a generated plan stays editable (see `manage.py prune_plans`)
+PLAN_RETENTION_DAYS = int(os.getenv('PLAN_RETENTION_DAYS', '7'))
+
+# Days raw search history and hourly search rollups are kept (see
+# `manage.py rollup_searches` and `manage.py prune_search_history`);
+# daily rollups are kept indefinitely
+SEARCH_HISTORY_RETENTION_DAYS = int(os.getenv('SEARCH_HISTORY_RETENTION_DAYS', '30'))
+SEARCH_ROLLUP_HOURLY_RETENTION_DAYS = int(os.getenv('SEARCH_ROLLUP_HOURLY_RETENTION_DAYS', '90'))
+# Searches younger than this many seconds aren't rolled up yet, so rows whose
+# transaction commits late (after a higher id) aren't skipped by the checkpoint
+SEARCH_ROLLUP_SETTLE_SECONDS = int(os.getenv('SEARCH_ROLLUP_SETTLE_SECONDS', '300'))
+
+# Background plan jobs (/api/ai-planner/jobs/): worker threads, max unfinished
+# jobs, and seconds a finished job's result is kept for polling
+PLANNER_JOB_WORKERS = int(os.getenv('PLANNER_JOB_WORKERS', '4'))
+PLANNER_JOB_MAX_PENDING = int(os.getenv('PLANNER_JOB_MAX_PENDING', '32'))
+PLANNER_JOB_TTL = int(os.getenv('PLANNER_JOB_TTL', '600'))
+
+# Batch search (/api/search/batch/): max queries per request and worker threads
+# (the worker count is shared with /api/search/compare/)
+SEARCH_BATCH_MAX_QUERIES = int(os.getenv('SEARCH_BATCH_MAX_QUERIES', '50'))
+SEARCH_BATCH_MAX_WORKERS = int(os.getenv('SEARCH_BATCH_MAX_WORKERS', '4'))
+SEARCH_COMPARE_MAX_DESTINATIONS = int(os.getenv('SEARCH_COMPARE_MAX_DESTINATIONS', '10'))
+
+# Multi-city trips (/api/search/multi-city/): max stops per trip
+MULTI_CITY_MAX_STOPS = int(os.getenv('MULTI_CITY_MAX_STOPS', '8'))
+
+# Flexible-date search (/api/search/flexible/): longest date range in days and
+# worker threads for the per-night price fetches
+FLEXIBLE_SEARCH_MAX_DAYS = int(os.getenv('FLEXIBLE_SEARCH_MAX_DAYS', '62'))
+FLEXIBLE_SEARCH_MAX_WORKERS = int(os.getenv('FLEXIBLE_SEARCH_MAX_WORKERS', '4'))
+
+# Precomputed search bundles for popular destinations: whether each process
+# runs the refresher (enable it for the web server processes only), refresh
+# period in seconds (0 disables), oldest bundle served, and what is bundled -
+# stay lengths in nights, check-in days ahead, party sizes and transport
+# origins ('' = none)
+BUNDLE_REFRESH_ENABLED = os.getenv('BUNDLE_REFRESH_ENABLED', 'False').lower() == 'true'
+BUNDLE_REFRESH_INTERVAL = int(os.getenv('BUNDLE_REFRESH_INTERVAL', '900'))
+BUNDLE_MAX_AGE = int(os.getenv('BUNDLE_MAX_AGE', '1800'))
+BUNDLE_STAY_NIGHTS = [int(n) for n in os.getenv('BUNDLE_STAY_NIGHTS', '3,6,7').split(',') if n.strip()]
+BUNDLE_CHECKIN_DAYS = int(os.getenv('BUNDLE_CHECKIN_DAYS', '7'))
+BUNDLE_PARTY_SIZES = [int(n) for n in os.getenv('BUNDLE_PARTY_SIZES', '1,2').split(',') if n.strip()]
+BUNDLE_ORIGINS = [origin.strip() for origin in os.getenv('BUNDLE_ORIGINS', '').split(',')]
+# Bundles built per refresh when API_MODE calls a live API (0: none)
+BUNDLE_LIVE_MAX_BUNDLES = int(os.getenv('BUNDLE_LIVE_MAX_BUNDLES', '0'))
+
+# Trending destinations (/api/destinations/trending/): half-life in seconds of
+# the decayed search counts, max destinations tracked, and how many of the top
+# trending destinations get precomputed bundles alongside the popular ones
+TRENDING_HALF_LIFE = int(os.getenv('TRENDING_HALF_LIFE', '3600'))
+TRENDING_CAPACITY = int(os.getenv('TRENDING_CAPACITY', '1000'))
+TRENDING_BUNDLE_DESTINATIONS = int(os.getenv('TRENDING_BUNDLE_DESTINATIONS', '5'))
+
+# Cache backend, e.g. django.core.cache.backends.redis.RedisCache with
+# CACHE_LOCATION=redis://host:6379 to share cached payloads between processes
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+    }
+}
+
+# Seconds a prebuilt /api/packages/featured/ payload is kept (model signals
+# invalidate it sooner; the TTL bounds staleness after queryset.update())
+FEATURED_CACHE_TTL = int(os.getenv('FEATURED_CACHE_TTL', '300'))
+
+
+# ===========================================
+# METRICS
+# ===========================================
+
+# Shared directory for per-worker metric snapshots when running several
+# processes (e.g. gunicorn workers). Leave empty for a single process.
+METRICS_MULTIPROC_DIR = os.getenv('METRICS_MULTIPROC_DIR', '')
+METRICS_FLUSH_INTERVAL = int(os.getenv('METRICS_FLUSH_INTERVAL', '5'))
+
+# Client addresses allowed to scrape /api/metrics/ without a staff login
+METRICS_ALLOWED_IPS = [ip.strip() for ip in os.getenv('METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if ip.strip()]
+
+# ===========================================
+# REQUEST PROFILING
+# ===========================================
+
+# Profile single requests on demand: staff users send `X-Profile: cprofile`
+# (or `sample`), others need a signed `_profile` URL from /admin/profiles/.
+PROFILING_ENABLED = os.getenv('PROFILING_ENABLED', 'False').lower() == 'true'
+PROFILING_DIR = os.getenv('PROFILING_DIR', str(BASE_DIR / 'profiles'))
+PROFILING_MAX_PROFILES = int(os.getenv('PROFILING_MAX_PROFILES', '50'))
+PROFILING_TOKEN_MAX_AGE = int(os.getenv('PROFILING_TOKEN_MAX_AGE', '3600'))
+PROFILING_SAMPLE_INTERVAL = float(os.getenv('PROFILING_SAMPLE_INTERVAL', '0.005'))
+
+# ===========================================
+# QUERY BUDGETS
+# ===========================================
+
+# Default per-request limits; views may declare tighter ones via `query_budget`.
+# Requests over budget are logged with their slowest statements.
+QUERY_BUDGET_MAX_QUERIES = int(os.getenv('QUERY_BUDGET_MAX_QUERIES', '50'))
+QUERY_BUDGET_MAX_DB_MS = float(os.getenv('QUERY_BUDGET_MAX_DB_MS', '500'))
+QUERY_BUDGET_TOP_N = int(os.getenv('QUERY_BUDGET_TOP_N', '5'))
+# Raise QueryBudgetExceeded instead of logging (enable in test settings/CI)
+QUERY_BUDGET_RAISE = os.getenv('QUERY_BUDGET_RAISE', 'False').lower() == 'true'
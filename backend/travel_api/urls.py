@@ -4,8 +4,12 @@ URL configuration for travel_api project.
 
 from django.contrib import admin
 from django.urls import path, include
+from recommendations.admin import profile_list_view, profile_download_view
 
 urlpatterns = [
+    path('admin/profiles/', admin.site.admin_view(profile_list_view), name='profile-list'),
+    path('admin/profiles/<str:profile_id>.<str:kind>', admin.site.admin_view(profile_download_view),
+         name='profile-download'),
     path('admin/', admin.site.urls),
     path('api/', include('recommendations.urls')),
 ]
@@ -9,7 +9,7 @@ import AttractionCard from '../components/AttractionCard';
 import PriceSummary from '../components/PriceSummary';
 import LoadingSpinner from '../components/LoadingSpinner';
 import AITripRecommendation from '../components/AITripRecommendation';
-import { searchTravel } from '../services/api';
+import { searchTravel, streamTravelSearch } from '../services/api';
 
 function SearchResultsPage() {
   const [searchParams] = useSearchParams();
@@ -40,12 +40,7 @@ function SearchResultsPage() {
         return;
       }
 
-      try {
-        setLoading(true);
-        setError(null);
-        const data = await searchTravel(searchData);
-        setResults(data);
-        
+      const applyDefaults = (data) => {
         // Set default selections
         if (data.hotels?.length > 0) {
           setSelectedHotel(data.hotels[0]);
@@ -56,11 +51,38 @@ function SearchResultsPage() {
         if (data.local_transports?.length > 0) {
           setSelectedLocalTransport(data.local_transports[0]);
         }
-      } catch (err) {
-        console.error('Search error:', err);
-        setError('Failed to fetch travel recommendations. Please try again.');
-      } finally {
-        setLoading(false);
+      };
+
+      setLoading(true);
+      setError(null);
+      setResults(null);
+      let received = false;
+      try {
+        // Show each section as soon as the server has it
+        await streamTravelSearch(searchData, (section, payload) => {
+          received = true;
+          setResults((prev) => ({ ...prev, [section]: payload }));
+          applyDefaults({ [section]: payload });
+          setLoading(false);
+        });
+      } catch (streamError) {
+        if (received) {
+          console.error('Search stream interrupted:', streamError);
+          setError('Some travel recommendations could not be loaded. Please try again.');
+          setLoading(false);
+          return;
+        }
+        // Streaming unavailable: fall back to the regular search
+        try {
+          const data = await searchTravel(searchData);
+          setResults(data);
+          applyDefaults(data);
+        } catch (err) {
+          console.error('Search error:', err);
+          setError('Failed to fetch travel recommendations. Please try again.');
+        } finally {
+          setLoading(false);
+        }
       }
     };
 
@@ -268,14 +290,17 @@ function SearchResultsPage() {
 
             {/* Sidebar - Price Summary & AI Trip */}
             <div className="lg:w-80 space-y-4 lg:sticky lg:top-4 lg:self-start">
-              <PriceSummary
-                summary={results.summary}
-                selectedHotel={selectedHotel}
-                selectedTransport={selectedTransport}
-                selectedLocalTransport={selectedLocalTransport}
-                selectedAttractions={selectedAttractions}
-                userBudget={searchData.budget ? parseInt(searchData.budget) : 0}
-              />
+              {/* The summary arrives after all sections when streaming */}
+              {results.summary && (
+                <PriceSummary
+                  summary={results.summary}
+                  selectedHotel={selectedHotel}
+                  selectedTransport={selectedTransport}
+                  selectedLocalTransport={selectedLocalTransport}
+                  selectedAttractions={selectedAttractions}
+                  userBudget={searchData.budget ? parseInt(searchData.budget) : 0}
+                />
+              )}
               
               {/* AI Trip Plan Button - Under Price Summary */}
               <AITripRecommendation searchData={searchData} results={results} />
@@ -30,6 +30,99 @@ export const searchTravel = async (searchData) => {
   }
 };
 
+// Streaming travel search (Server-Sent Events): calls onSection(name, data) for
+// hotels, transports, local_transports and attractions as each one is ready,
+// then for summary; resolves once the stream is complete
+export const streamTravelSearch = (searchData, onSection) =>
+  new Promise((resolve, reject) => {
+    const params = new URLSearchParams({
+      origin: searchData.origin || '',
+      destination: searchData.destination,
+      check_in: searchData.checkIn,
+      check_out: searchData.checkOut,
+      people: parseInt(searchData.people) || 1,
+      rooms: parseInt(searchData.rooms) || 1,
+    });
+    if (searchData.budget) {
+      params.set('budget', parseInt(searchData.budget));
+    }
+
+    const source = new EventSource(`${API_BASE_URL}/search/stream/?${params}`);
+    ['hotels', 'transports', 'local_transports', 'attractions', 'summary'].forEach((name) => {
+      source.addEventListener(name, (event) => onSection(name, JSON.parse(event.data)));
+    });
+    source.addEventListener('section_error', (event) => {
+      console.error('Search section failed:', JSON.parse(event.data));
+    });
+    source.addEventListener('done', () => {
+      source.close();
+      resolve();
+    });
+    source.onerror = () => {
+      source.close();
+      reject(new Error('Search stream failed'));
+    };
+  });
+
+// Batch travel search: one result per query, in order ({ status, data } or { status, errors })
+export const searchTravelBatch = async (queries) => {
+  const response = await api.post('/search/batch/', queries.map((searchData) => ({
+    origin: searchData.origin || '',
+    destination: searchData.destination,
+    check_in: searchData.checkIn,
+    check_out: searchData.checkOut,
+    people: parseInt(searchData.people) || 1,
+    rooms: parseInt(searchData.rooms) || 1,
+    budget: searchData.budget ? parseInt(searchData.budget) : null,
+  })));
+  return response.data;
+};
+
+// Flexible dates: cheapest `nights`-night stays between dateFrom and dateTo
+// Returns { summary, cheapest, calendar }
+export const searchFlexibleDates = async (searchData) => {
+  const response = await api.post('/search/flexible/', {
+    origin: searchData.origin || '',
+    destination: searchData.destination,
+    date_from: searchData.dateFrom,
+    date_to: searchData.dateTo,
+    nights: parseInt(searchData.nights),
+    people: parseInt(searchData.people) || 1,
+    rooms: parseInt(searchData.rooms) || 1,
+    budget: searchData.budget ? parseInt(searchData.budget) : null,
+  });
+  return response.data;
+};
+
+// Compare trip costs to several destinations: { trip_details, comparison, data_source }
+export const compareDestinations = async (searchData, destinations) => {
+  const response = await api.post('/search/compare/', {
+    origin: searchData.origin || '',
+    destinations,
+    check_in: searchData.checkIn,
+    check_out: searchData.checkOut,
+    people: parseInt(searchData.people) || 1,
+    rooms: parseInt(searchData.rooms) || 1,
+    budget: searchData.budget ? parseInt(searchData.budget) : null,
+  });
+  return response.data;
+};
+
+// Multi-city trip: stops = [{ city, nights }] in travel order
+// Returns { trip_details, itinerary, cost_breakdown, data_source }
+export const searchMultiCity = async (searchData, stops) => {
+  const response = await api.post('/search/multi-city/', {
+    origin: searchData.origin || '',
+    start_date: searchData.checkIn,
+    stops,
+    people: parseInt(searchData.people) || 1,
+    rooms: parseInt(searchData.rooms) || 1,
+    budget: searchData.budget ? parseInt(searchData.budget) : null,
+    return_to_origin: searchData.returnToOrigin ?? true,
+  });
+  return response.data;
+};
+
 // Destinations
 export const getDestinations = async (params = {}) => {
   const response = await api.get('/destinations/', { params });
@@ -41,6 +134,12 @@ export const getPopularDestinations = async () => {
   return response.data;
 };
 
+// Most searched destinations right now: [{ name, score, destination }]
+export const getTrendingDestinations = async (limit = 10) => {
+  const response = await api.get('/destinations/trending/', { params: { limit } });
+  return response.data;
+};
+
 // Hotels
 export const getHotels = async (params = {}) => {
   const response = await api.get('/hotels/', { params });
@@ -94,6 +193,23 @@ export const generateAITravelPlan = async (planData) => {
   }
 };
 
+// Background plan generation: returns { job_id, status, ... }; poll getAITravelPlanJob
+export const startAITravelPlanJob = async (planData) => {
+  const response = await api.post('/ai-planner/jobs/', planData);
+  return response.data;
+};
+
+export const getAITravelPlanJob = async (jobId) => {
+  const response = await api.get(`/ai-planner/jobs/${jobId}/`);
+  return response.data;
+};
+
+// Edit a generated plan: { budget, hotel, hotel_preference, days: [{ day, attractions }] }
+export const updateAITravelPlan = async (planId, changes) => {
+  const response = await api.patch(`/ai-planner/plans/${planId}/`, changes);
+  return response.data;
+};
+
 export const checkAIPlannerStatus = async () => {
   const response = await api.get('/ai-planner/status/');
   return response.data;